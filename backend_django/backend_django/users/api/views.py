@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from rest_framework import status, generics, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
@@ -12,6 +12,7 @@ from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
 from center.models import Center
+from core.pagination import KeysetPagination
 
 from .serializers import UserSerializer, UserSerializerForCenter, UserWithCentersSerializer
 
@@ -232,54 +233,53 @@ class UserViewSet(RetrieveModelMixin, ListModelMixin, UpdateModelMixin, GenericV
 
 
 class UserSearchView(generics.ListAPIView):
+    """
+    Búsqueda de usuarios por nombre o email (?q=, o ?name= por compatibilidad),
+    opcionalmente dentro de un centro (?center_id=, ?center_name=).
+
+    Paginada por id con KeysetPagination (?cursor=, ?page_size=), la
+    respuesta es {'next': url o null, 'results': [...]}.
+    """
     serializer_class = UserSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = ('id',)
 
     def get_queryset(self):
         queryset = User.objects.all()
+        params = self.request.query_params
 
         # Filtrar por ID de usuario
-        user_id = self.request.query_params.get('id', None)
+        user_id = params.get('id')
         if user_id:
             queryset = queryset.filter(id=user_id)
 
-        # Filtrar por nombre o apellido (búsqueda parcial)
-        name = self.request.query_params.get('name', None)
-        if name:
-            queryset = queryset.filter(
-                Q(first_name__icontains=name) |
-                Q(last_name__icontains=name) |
-                Q(username__icontains=name)
-            )
+        # Búsqueda parcial por nombre o email, servida por los índices trigram sobre UPPER()
+        term = (params.get('q') or params.get('name') or '').strip()
+        if term:
+            queryset = queryset.filter(Q(name__icontains=term) | Q(email__icontains=term))
 
-        # Filtrar por ID del centro de acopio
-        center_id = self.request.query_params.get('center_id', None)
+        # Filtrar por centro de acopio con un join, sin consultar Center antes
+        center_id = params.get('center_id')
         if center_id:
-            try:
-                center = Center.objects.get(id=center_id)
-                queryset = queryset.filter(centers=center)
-            except Center.DoesNotExist:
-                raise NotFound(detail="Centro de acopio no encontrado.")
-
-        # Filtrar por nombre del centro de acopio
-        center_name = self.request.query_params.get('center_name', None)
-        if center_name:
-            centers = Center.objects.filter(name__icontains=center_name)
-            if not centers.exists():
-                raise NotFound(detail="No se encontraron centros de acopio con ese nombre.")
-            queryset = queryset.filter(centers__in=centers).distinct()
+            queryset = queryset.filter(centers__id=center_id)
 
-        if not queryset.exists():
-            raise NotFound(detail="No se encontraron usuarios con los criterios especificados.")
+        center_name = params.get('center_name')
+        if center_name:
+            queryset = queryset.filter(Exists(
+                Center.users.through.objects.filter(
+                    user_id=OuterRef('pk'),
+                    center__name__icontains=center_name
+                )
+            ))
 
         return queryset
 
     def list(self, request, *args, **kwargs):
-        try:
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
-        except NotFound as e:
-            return Response(
-                {"error": str(e.detail)},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        for param in ('id', 'center_id'):
+            value = request.query_params.get(param)
+            if value and not value.isdigit():
+                return Response(
+                    {"error": f"{param} debe ser un número entero"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return super().list(request, *args, **kwargs)
@@ -2,8 +2,11 @@
 from typing import ClassVar
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import OpClass
 from django.db.models import CharField
 from django.db.models import EmailField
+from django.db.models.functions import Upper
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
@@ -29,6 +32,14 @@ class User(AbstractUser):
 
     objects: ClassVar[UserManager] = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Partial matches in the user search: __icontains compiles to
+            # UPPER(column::text) LIKE UPPER('%term%'), so the index is on UPPER()
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="users_name_upper_trgm_idx"),
+            GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="users_email_upper_trgm_idx"),
+        ]
+
     def get_absolute_url(self) -> str:
         """Get URL for user's detail view.
 
@@ -1,8 +1,11 @@
 import pytest
+from rest_framework.test import APIClient
 from rest_framework.test import APIRequestFactory
 
 from backend_django.users.api.views import UserViewSet
 from backend_django.users.models import User
+from backend_django.users.tests.factories import UserFactory
+from center.models import Center
 
 
 class TestUserViewSet:
@@ -32,3 +35,49 @@ class TestUserViewSet:
             "url": f"http://testserver/api/users/{user.pk}/",
             "name": user.name,
         }
+
+
+class TestUserSearchView:
+    @pytest.fixture
+    def api_client(self, user: User) -> APIClient:
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_search_by_name_and_email(self, api_client: APIClient):
+        UserFactory(name="Ana Pérez", email="ana@example.com")
+        UserFactory(name="Luis Gómez", email="luis.perez@example.com")
+        UserFactory(name="Marta Ruiz", email="marta@example.com")
+
+        response = api_client.get("/users/api/users/search/", {"q": "perez"})
+
+        assert response.status_code == 200
+        assert [u["email"] for u in response.data["results"]] == ["luis.perez@example.com"]
+        response = api_client.get("/users/api/users/search/", {"q": "pérez"})
+        assert [u["email"] for u in response.data["results"]] == ["ana@example.com"]
+
+    def test_center_filter_and_keyset_pages(self, api_client: APIClient):
+        center = Center.objects.create(name="Centro Norte", address="Calle 1")
+        members = UserFactory.create_batch(5)
+        center.users.add(*members)
+        UserFactory.create_batch(3)
+
+        emails, url = [], "/users/api/users/search/?center_name=norte&page_size=2"
+        while url:
+            response = api_client.get(url)
+            emails += [u["email"] for u in response.data["results"]]
+            url = response.data["next"]
+
+        assert emails == [u.email for u in members]
+        response = api_client.get("/users/api/users/search/", {"center_id": center.id})
+        assert len(response.data["results"]) == 5
+
+    def test_no_matches_is_an_empty_page(self, api_client: APIClient):
+        response = api_client.get("/users/api/users/search/", {"center_id": 999})
+        assert response.status_code == 200
+        assert response.data == {"next": None, "results": []}
+
+    def test_invalid_center_id(self, api_client: APIClient):
+        response = api_client.get("/users/api/users/search/", {"center_id": "norte"})
+        assert response.status_code == 400
+        assert "center_id" in response.data["error"]
@@ -1,5 +1,18 @@
+import pytest
+from django.db import connection
+
 from backend_django.users.models import User
 
 
 def test_user_get_absolute_url(user: User):
     assert user.get_absolute_url() == f"/users/{user.pk}/"
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="GIN indexes are Postgres only")
+@pytest.mark.django_db
+@pytest.mark.parametrize("field", ["name", "email"])
+def test_search_index_sql(field: str):
+    index = next(index for index in User._meta.indexes if index.name == f"users_{field}_upper_trgm_idx")
+    with connection.schema_editor() as editor:
+        sql = str(index.create_sql(User, editor))
+    assert f'USING gin ((UPPER("{field}")) gin_trgm_ops)' in sql
@@ -1,14 +1,18 @@
 from rest_framework import status, viewsets, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from backend_django.users.api.serializers import UserSerializer
 from center.api.serializer import CenterRegistrationSerializer, CenterSerializer
 from center.models import Center
+from center.services.directory import DirectoryPagination, list_centers
+from uploads.api.serializers import ImageSerializer
+from uploads.models import Image
 
 
 @api_view(['POST'])
@@ -55,10 +59,48 @@ def login_user(request):
     }, status=status.HTTP_401_UNAUTHORIZED)
 
 
+def directory_response(request):
+    """
+    Page of the center directory, see center.services.directory. Same
+    parameters and response as KeysetPagination: ?page_size=, ?cursor=,
+    {'next': url or null, 'results': [...]}
+    """
+    paginator = DirectoryPagination()
+    page = list_centers(
+        search=request.query_params.get('search'),
+        cursor=request.query_params.get(paginator.cursor_query_param),
+        limit=paginator.get_page_size(request)
+    )
+    next_link = None
+    if page['next']:
+        next_link = replace_query_param(request.build_absolute_uri(), paginator.cursor_query_param, page['next'])
+    return Response({'next': next_link, 'results': page['results']})
+
+
 class CenterViewSet(viewsets.ModelViewSet):
     queryset = Center.objects.all()
     serializer_class = CenterSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Directorio paginado, ?search= filtra por prefijo del nombre y ?cursor= pide la siguiente página"""
+        return directory_response(request)
+
+    @action(detail=True, methods=['GET'])
+    def images(self, request, pk=None):
+        """
+        Obtiene todas las imágenes de un centro específico
+        """
+        center = self.get_object()
+        images = Image.objects.filter(center=center)
+
+        # Filtra por processed si se especifica
+        processed = request.query_params.get('processed')
+        if processed is not None:
+            images = images.filter(processed=(processed.lower() == 'true'))
+
+        serializer = ImageSerializer(images, many=True)
+        return Response(serializer.data)
+
 
 class CenterUsersView(generics.ListAPIView):
     serializer_class = UserSerializer
@@ -76,20 +118,17 @@ class CenterUsersView(generics.ListAPIView):
 
     def list(self, request, *args, **kwargs):
         try:
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
+            users = self.paginate_queryset(self.get_queryset())
+            serializer = self.get_serializer(users, many=True)
+            return self.get_paginated_response(serializer.data)
         except NotFound as e:
             return Response(
                 {"error": str(e.detail)},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class ObtainAllCenters(generics.ListAPIView):
+class ObtainAllCenters(generics.GenericAPIView):
     serializer_class = CenterSerializer
 
-    def get_queryset(self):
-        queryset = Center.objects.all()
-        if not queryset.exists():
-            raise NotFound(detail="No se encontraron centros de acopio.")
-        return queryset
+    def get(self, request, *args, **kwargs):
+        return directory_response(request)
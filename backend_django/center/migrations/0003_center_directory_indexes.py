@@ -0,0 +1,24 @@
+# Generated by Django 5.0.11 on 2026-10-19 05:29
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('center', '0002_alter_center_options'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='center',
+            index=models.Index(fields=['name', 'id'], name='center_cent_name_af774f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='center',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='center_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.11 on 2026-10-19 06:19
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('center', '0003_center_directory_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='center',
+            name='center_name_trgm_idx',
+        ),
+        migrations.AddIndex(
+            model_name='center',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='center_name_upper_trgm_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 from backend_django.users.models import User
 
@@ -13,6 +15,13 @@ class Center(models.Model):
     class Meta:
         verbose_name = 'Centro de Acopio'
         verbose_name_plural = 'Centros de Acopio'
+        indexes = [
+            # Orden y paginación del directorio de centros
+            models.Index(fields=['name', 'id']),
+            # Búsqueda por prefijo del nombre: name__istartswith compila a
+            # UPPER(name::text) LIKE UPPER('abc%'), así que el índice va sobre UPPER(name)
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='center_name_upper_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,91 @@
+"""
+Center directory: the paginated list of collection centers every client
+fetches at start up.
+
+Pages are ordered by (name, id) and paginated with the keyset cursor of
+core.pagination.KeysetPagination, so deep pages cost the same as the
+first one. Serialized pages are kept in an in-process cache that is
+dropped whenever the shared 'centers' version changes, so every worker
+sees a new or renamed center on its next request.
+"""
+import threading
+from collections import OrderedDict
+
+from center.api.serializer import CenterSerializer
+from core.metrics import cache_lookup
+from core.pagination import KeysetPagination
+from center.models import Center
+from inventory.services.versions import global_version
+
+DIRECTORY_PAGE_SIZE = 50
+DIRECTORY_MAX_PAGE_SIZE = 200
+DIRECTORY_ORDERING = ('name', 'id')
+LOCAL_CACHE_SIZE = 256
+
+
+class DirectoryPagination(KeysetPagination):
+    page_size = DIRECTORY_PAGE_SIZE
+    max_page_size = DIRECTORY_MAX_PAGE_SIZE
+
+
+class _PageCache:
+    """LRU of serialized pages, valid for one 'centers' version"""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+        self._version = None
+
+    def get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                self._pages.clear()
+                self._version = version
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+            return page
+
+    def put(self, key, version, page):
+        with self._lock:
+            # A page fetched under an older version is already stale
+            if version == self._version:
+                self._pages[key] = page
+                if len(self._pages) > self.size:
+                    self._pages.popitem(last=False)
+
+
+_pages = _PageCache(LOCAL_CACHE_SIZE)
+
+
+def _fetch_page(search, cursor, limit):
+    centers = Center.objects.all()
+    if search:
+        # UPPER(name) LIKE UPPER('abc%'), served by the trigram index on UPPER(name)
+        centers = centers.filter(name__istartswith=search)
+
+    paginator = DirectoryPagination()
+    centers, position = paginator.paginate_ordered(centers, DIRECTORY_ORDERING, cursor, limit)
+    return {
+        'results': list(CenterSerializer(centers, many=True).data),
+        'next': paginator.encode_cursor(position) if position else None,
+    }
+
+
+def list_centers(search=None, cursor=None, limit=DIRECTORY_PAGE_SIZE):
+    """
+    One page of the directory as {'results': [...], 'next': cursor or None}.
+    Raises NotFound when the cursor is malformed, like KeysetPagination.
+    """
+    search = (search or '').strip()
+    limit = max(1, min(limit, DIRECTORY_MAX_PAGE_SIZE))
+    key = (search.lower(), cursor or '', limit)
+    version = global_version('centers')
+
+    page = _pages.get(key, version)
+    cache_lookup('center_directory', page is not None)
+    if page is None:
+        page = _fetch_page(search, cursor, limit)
+        _pages.put(key, version, page)
+    return page
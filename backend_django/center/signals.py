@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from inventory.services.versions import bump_global_version
+from .models import Center
+
+
+@receiver(post_save, sender=Center)
+@receiver(post_delete, sender=Center)
+def center_changed(sender, instance, **kwargs):
+    # Drops the cached directory pages in every process
+    bump_global_version('centers')
@@ -1,3 +1,65 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from backend_django.users.tests.factories import UserFactory
+from rest_framework.test import APIClient
+
+from center.models import Center
+from center.services.directory import list_centers
+
+
+class CenterDirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Center.objects.bulk_create(
+            Center(name=f'Centro {i:02d}', address='Calle') for i in range(25)
+        )
+        Center.objects.create(name='Acopio Norte', address='Calle')
+        # Same name, the id breaks the tie
+        Center.objects.create(name='Centro 05', address='Calle')
+
+    def test_keyset_pages_cover_every_center(self):
+        names, cursor = [], None
+        while True:
+            page = list_centers(cursor=cursor, limit=10)
+            names.extend(center['name'] for center in page['results'])
+            cursor = page['next']
+            if cursor is None:
+                break
+
+        self.assertEqual(names, sorted(Center.objects.values_list('name', flat=True)))
+
+    def test_prefix_search(self):
+        page = list_centers(search='acopio')
+        self.assertEqual([center['name'] for center in page['results']], ['Acopio Norte'])
+
+    def test_pages_are_cached_until_a_center_changes(self):
+        list_centers(search='centro')
+        with self.assertNumQueries(0):
+            list_centers(search='centro')
+
+        Center.objects.create(name='Centro 99', address='Calle')
+        page = list_centers(search='centro', limit=100)
+        self.assertEqual(len(page['results']), 27)
+
+    def test_endpoint_rejects_bad_cursor(self):
+        client = APIClient()
+        client.force_authenticate(UserFactory())
+
+        response = client.get('/api/all-centers/', {'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        response = client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['name'], 'Centro 04')
+        self.assertEqual(client.get('/api/centers/', {'cursor': 'nope'}).status_code, 404)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'GIN indexes are Postgres only')
+class CenterIndexTests(TestCase):
+    def test_name_search_index_sql(self):
+        index = next(index for index in Center._meta.indexes if index.name == 'center_name_upper_trgm_idx')
+        with connection.schema_editor() as editor:
+            sql = str(index.create_sql(Center, editor))
+        self.assertIn('USING gin ((UPPER("name")) gin_trgm_ops)', sql)
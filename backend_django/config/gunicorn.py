@@ -0,0 +1,10 @@
+# Gunicorn settings, used by compose/production/django/start
+import os
+
+
+def child_exit(server, worker):
+    # Drops the live gauges of a dead worker from /metrics
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -87,6 +87,8 @@ DJANGO_APPS = [
     "django.contrib.sites",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    # OpClass index expressions, trigram lookups
+    "django.contrib.postgres",
     # "django.contrib.humanize", # Handy template tags
     "jazzmin",
     "django.contrib.admin",
@@ -114,6 +116,7 @@ LOCAL_APPS = [
     "center",
     "uploads",
     "inventory",
+    "core",
     # Your stuff: custom apps go here
 ]
 
@@ -122,6 +125,49 @@ MODEL_SETTINGS = {
     'YOLO_MODEL_PATH': os.path.join(BASE_DIR, 'weights', 'model.pt'),
 }
 
+# Dataset Parquet de cajas detectadas (manage.py export_detection_boxes)
+DETECTION_BOXES_EXPORT_ROOT = env(
+    "DETECTION_BOXES_EXPORT_ROOT", default=str(BASE_DIR / "exports" / "detection_boxes")
+)
+
+# /metrics (Prometheus). Con token, el scraper envía "Authorization: Bearer <token>";
+# en producción es obligatorio (config/settings/production.py)
+METRICS_TOKEN = env("DJANGO_METRICS_TOKEN", default="")
+
+# Perfil de queries por request (core.middleware.QueryBudgetMiddleware).
+# Los presupuestos van por nombre de URL, "default" para el resto; en los
+# tests, core.pytest_plugin falla cuando un endpoint los supera.
+QUERY_PROFILING = env.bool("DJANGO_QUERY_PROFILING", default=False)
+QUERY_SLOW_SECONDS = env.float("DJANGO_QUERY_SLOW_SECONDS", default=0.25)
+QUERY_DUPLICATE_THRESHOLD = 5
+QUERY_BUDGETS = {
+    "default": 20,
+    "category-categories-stats": 5,
+    "snapshot-by-center": 6,
+    "report-by-center": 6,
+    "report-generate": 15,
+    "analytics-by-center": 6,
+    "image-by-center": 6,
+    "deteccion-detecciones-by-center": 5,
+    "deteccion-analizar-imagen": 15,
+    "deteccion-confirmar-analisis": 20,
+}
+
+# Profiler por muestreo (core.profiling). PROFILING_SAMPLE_RATE es la
+# fracción de requests perfilados (0.01 = 1%); se puede pedir el perfil de
+# un request con la cabecera X-Profile: <PROFILING_SECRET>, sin secreto la
+# cabecera se ignora. Los perfiles se ven en el admin (Request profiles).
+PROFILING_SAMPLE_RATE = env.float("DJANGO_PROFILING_SAMPLE_RATE", default=0.0)
+PROFILING_HEADER = "X-Profile"
+PROFILING_SECRET = env("DJANGO_PROFILING_SECRET", default="")
+PROFILING_INTERVAL = 0.001
+PROFILING_MIN_DURATION = env.float("DJANGO_PROFILING_MIN_DURATION", default=0.5)
+
+# Detector falso para las pruebas de carga (manage.py run_load_scenario),
+# nunca en producción. La latencia emula la inferencia, en segundos.
+DETECTION_STUB_MODEL = env.bool("DJANGO_DETECTION_STUB_MODEL", default=False)
+DETECTION_STUB_LATENCY = env.float("DJANGO_DETECTION_STUB_LATENCY", default=0.05)
+
 # Configuraciones para la API de Claude (reemplaza con tus credenciales)
 CE_API_KEY = os.environ.get("API_CL")
 CE_API_URL = 'https://api.anthropic.com/v1/messages'
@@ -132,23 +178,14 @@ ROBOFLOW_API_KEY = os.environ.get('rf_pWyR7PvkW0YL2djEdCerpYyeSdS2', '')
 ROBOFLOW_MODEL_ID = os.environ.get('ROBOFLOW_MODEL_ID', '')
 ROBOFLOW_MODEL_VERSION = os.environ.get('ROBOFLOW_MODEL_VERSION', '')
 
+# Cache de respuestas de inventario (segundos, 0 la desactiva). Las claves
+# incluyen la versión del centro, así que nunca se sirven datos viejos
+INVENTORY_RESPONSE_CACHE_TIMEOUT = env.int("INVENTORY_RESPONSE_CACHE_TIMEOUT", default=0)
+
 # Configuraciones de medios para guardar las imágenes
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-# Configuraciones de REST Framework
-REST_FRAMEWORK = {
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10,
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
-    ],
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',
-    ],
-}
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
@@ -195,6 +232,9 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.QueryBudgetMiddleware",
+    "core.middleware.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -396,12 +436,27 @@ SOCIALACCOUNT_FORMS = {"signup": "backend_django.users.forms.UserSocialSignupFor
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.TokenAuthentication",
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
+    # Keyset pagination on (created_at, id), see core/pagination.py
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
+# JSON con orjson, ver core/renderers.py. Sin orjson instalado se comporta como el de DRF
+if env.bool("DJANGO_API_ORJSON", default=False):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    )
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = (
+        "core.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    )
 
 # django-cors-headers - https://github.com/adamchainz/django-cors-headers#setup
 CORS_URLS_REGEX = r"^/api/.*$"
@@ -585,6 +640,13 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-none-match',
+    'if-modified-since',
+]
+
+CORS_EXPOSE_HEADERS = [
+    'etag',
+    'last-modified',
 ]
 
 # Para desarrollo, puedes usar esto (NO en producción)
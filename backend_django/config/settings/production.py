@@ -131,6 +131,11 @@ ACCOUNT_EMAIL_SUBJECT_PREFIX = EMAIL_SUBJECT_PREFIX
 # Django Admin URL regex.
 ADMIN_URL = env("DJANGO_ADMIN_URL")
 
+# Metrics
+# ------------------------------------------------------------------------------
+# /metrics is only open without a token in development, see core.views.metrics
+METRICS_TOKEN = env("DJANGO_METRICS_TOKEN")
+
 # Anymail
 # ------------------------------------------------------------------------------
 # https://anymail.readthedocs.io/en/stable/installation/#installing-anymail
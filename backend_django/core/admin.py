@@ -1,3 +1,25 @@
 from django.contrib import admin
+from django.utils.html import format_html
 
-# Register your models here.
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'view_name', 'method', 'path', 'status_code', 'duration_ms', 'trigger', 'files')
+    list_filter = ('view_name', 'trigger', 'method', 'status_code')
+    search_fields = ('path', 'view_name')
+    ordering = ('-duration_ms',)
+    date_hierarchy = 'created_at'
+    list_select_related = ('user',)
+    readonly_fields = [field.name for field in RequestProfile._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Perfil')
+    def files(self, obj):
+        return format_html(
+            '<a href="{}" target="_blank">HTML</a> · <a href="{}" download>speedscope</a>',
+            obj.html.url, obj.speedscope.url
+        )
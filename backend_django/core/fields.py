@@ -0,0 +1,35 @@
+import json
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+
+from .renderers import RawJSON
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class RawJSONField(serializers.Field):
+    """
+    Read only field for JSON stored as text, e.g. Deteccion.resultados_json.
+
+    When the response is rendered by ORJSONRenderer the stored text is
+    spliced into the output as is, without decoding it here and encoding it
+    again in the renderer. It has to be valid JSON, which is checked when it
+    is written (Deteccion.set_resultados), not on every read. Otherwise it
+    is decoded and empty or invalid text becomes {}.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return {}
+        request = self.context.get('request')
+        if getattr(getattr(request, 'accepted_renderer', None), 'supports_raw_json', False):
+            return RawJSON(value)
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return {}
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.load_scenario import FLOW_STEPS, PERCENTILES, run_scenario
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the analizar -> confirmar -> snapshot -> report -> dashboard flow with concurrent "
+        "virtual users and report throughput and latency percentiles. Needs seed_load_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=10, help="Virtual users running in parallel")
+        parser.add_argument('--iterations', type=int, default=10, help="Flows per virtual user")
+        parser.add_argument(
+            '--base-url',
+            help="Server to load, e.g. http://localhost:8000, started with DJANGO_DETECTION_STUB_MODEL=True. "
+                 "Without it requests run in this process",
+        )
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            report = run_scenario(
+                concurrency=options['concurrency'],
+                iterations=options['iterations'],
+                base_url=options['base_url'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        header = f"{'step':<26}{'reqs':>7}{'errors':>8}{'mean':>9}" + ''.join(f"{f'p{p}':>9}" for p in PERCENTILES) + f"{'max':>9}"
+        self.stdout.write(header)
+        for step in FLOW_STEPS:
+            stats = report['steps'].get(step)
+            if not stats:
+                continue
+            row = f"{step:<26}{stats['requests']:>7}{stats['errors']:>8}{stats['mean_ms']:>9.1f}"
+            row += ''.join(f"{stats[f'p{p}_ms']:>9.1f}" for p in PERCENTILES)
+            self.stdout.write(row + f"{stats['max_ms']:>9.1f}")
+        self.stdout.write("(latencies in ms)")
+
+        style = self.style.SUCCESS if report['completed_flows'] == report['flows'] else self.style.WARNING
+        self.stdout.write(style(
+            f"{report['completed_flows']}/{report['flows']} flows in {report['elapsed_s']:.1f}s: "
+            f"{report['flows_per_s']:.2f} flows/s, {report['requests_per_s']:.1f} requests/s"
+        ))
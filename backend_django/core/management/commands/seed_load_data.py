@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.load_seed import LOAD_PASSWORD, LoadDataExists, flush_load_data, seed_load_data
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic centers, users, snapshots and detections for load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--centers', type=int, default=10)
+        parser.add_argument('--days', type=int, default=30, help="Days of daily snapshots per center")
+        parser.add_argument('--users-per-center', type=int, default=2)
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--detections-per-day', type=int, default=2, help="Detections (and images) per center and day")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None, help="Random seed, for repeatable data sets")
+        parser.add_argument('--flush', action='store_true', help="Delete the previous load test data first")
+        parser.add_argument('--flush-only', action='store_true', help="Only delete the load test data")
+
+    def handle(self, *args, **options):
+        if options['flush'] or options['flush_only']:
+            count = flush_load_data()
+            self.stdout.write(f"Deleted {count} load test centers")
+            if options['flush_only']:
+                return
+
+        def progress(done, total):
+            if options['verbosity'] > 1 or done == total or done % max(1, total // 10) == 0:
+                self.stdout.write(f"  {done}/{total} centers")
+
+        try:
+            stats = seed_load_data(
+                centers=options['centers'],
+                days=options['days'],
+                users_per_center=options['users_per_center'],
+                categories=options['categories'],
+                detections_per_day=options['detections_per_day'],
+                batch_size=options['batch_size'],
+                random_seed=options['seed'],
+                progress=progress,
+            )
+        except LoadDataExists as e:
+            raise CommandError(f"{e}, use --flush to replace it")
+
+        summary = ', '.join(f"{value} {name}" for name, value in stats.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}"))
+        self.stdout.write(f"Load users log in as load-<center>-<n>@example.com / {LOAD_PASSWORD}")
@@ -0,0 +1,112 @@
+"""
+Prometheus metrics.
+
+Metrics are declared with the factories below, which return no-op metrics
+when prometheus_client isn't installed, so instrumented code never has to
+check for it.
+
+Under gunicorn every worker keeps its own values. Set
+PROMETHEUS_MULTIPROC_DIR (see compose/production/django/start) and
+/metrics aggregates all of them; gauges declare how they are combined.
+"""
+import time
+from contextlib import contextmanager
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+# Seconds, from a cache hit to a slow remote model call
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, amount):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    @contextmanager
+    def time(self):
+        yield
+
+    @contextmanager
+    def track_inprogress(self):
+        yield
+
+
+_noop = _NoopMetric()
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    if prometheus_client is None:
+        return _noop
+    return prometheus_client.Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def counter(name, documentation, labelnames=()):
+    if prometheus_client is None:
+        return _noop
+    return prometheus_client.Counter(name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=(), multiprocess_mode='livesum'):
+    if prometheus_client is None:
+        return _noop
+    return prometheus_client.Gauge(name, documentation, labelnames, multiprocess_mode=multiprocess_mode)
+
+
+# Requests, labeled by URL name (not path) so the number of series stays bounded
+REQUEST_SECONDS = histogram(
+    'django_request_seconds', 'Request latency by view', ['view', 'method', 'status'],
+)
+REQUEST_DB_QUERIES = histogram(
+    'django_request_db_queries', 'Database queries per request', ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+REQUEST_DB_SECONDS = histogram(
+    'django_request_db_seconds', 'Time spent in database queries per request', ['view'],
+)
+
+CACHE_REQUESTS = counter(
+    'cache_requests', 'Application cache lookups by result (hit/miss)', ['cache', 'result'],
+)
+
+REMOTE_BACKEND_SECONDS = histogram(
+    'remote_backend_seconds', 'Latency of calls to remote model backends', ['backend'],
+)
+REMOTE_BACKEND_ERRORS = counter(
+    'remote_backend_errors', 'Failed calls to remote model backends', ['backend'],
+)
+
+CELERY_TASK_SECONDS = histogram(
+    'celery_task_seconds', 'Celery task duration', ['task', 'state'],
+)
+
+
+def cache_lookup(cache_name, hit):
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+
+@contextmanager
+def remote_call(backend):
+    """Times a call to a remote backend, exceptions count as errors"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        REMOTE_BACKEND_ERRORS.labels(backend).inc()
+        raise
+    finally:
+        REMOTE_BACKEND_SECONDS.labels(backend).observe(time.perf_counter() - start)
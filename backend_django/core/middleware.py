@@ -0,0 +1,124 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.crypto import constant_time_compare
+
+from .metrics import REQUEST_DB_QUERIES, REQUEST_DB_SECONDS, REQUEST_SECONDS
+from .profiling import Profiler, save_profile, start_profiler
+from .queries import QueryProfile, budget_exceeded, query_budget
+
+logger = logging.getLogger('core.queries')
+
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    """
+    Latency and database usage per view, see core.metrics.
+
+    Views are labeled by URL name (e.g. snapshot-by-center), never by path,
+    so ids in the URL don't create new series. Streamed responses are
+    measured until the view returns, not until the body is sent.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryProfile()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = _view_label(request)
+        if view == 'metrics':
+            return response
+        REQUEST_SECONDS.labels(view, request.method, f'{response.status_code // 100}xx').observe(elapsed)
+        REQUEST_DB_QUERIES.labels(view).observe(queries.count)
+        REQUEST_DB_SECONDS.labels(view).observe(queries.seconds)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Logs requests that go over the query budget of their endpoint
+    (QUERY_BUDGETS), repeat the same query QUERY_DUPLICATE_THRESHOLD times or
+    more, or run queries slower than QUERY_SLOW_SECONDS.
+
+    Fingerprinting every query isn't free, so it only runs with
+    QUERY_PROFILING enabled (local and test settings).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = QueryProfile(fingerprints=True, slow_seconds=getattr(settings, 'QUERY_SLOW_SECONDS', None))
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+
+        view = _view_label(request)
+        where = f'{request.method} {request.path} ({view})'
+        budget = query_budget(view)
+        if budget is not None and profile.count > budget:
+            logger.warning(f'{where}: {profile.count} queries, budget {budget}, {profile.seconds * 1000:.1f} ms')
+            budget_exceeded.send(sender=self.__class__, view=view, profile=profile, budget=budget)
+
+        for sql, count in profile.duplicates(getattr(settings, 'QUERY_DUPLICATE_THRESHOLD', 5)):
+            logger.warning(f'{where}: query repeated {count} times: {sql[:300]}')
+        for seconds, sql in profile.slow:
+            logger.warning(f'{where}: slow query {seconds * 1000:.1f} ms: {sql[:300]}')
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a sample of the requests, or the ones with the profiling
+    header, see core.profiling. The header must carry PROFILING_SECRET:
+    it is checked before the profiler starts, so nobody else can make
+    requests pay for profiling. Without a secret the header is ignored.
+    """
+
+    def __init__(self, get_response):
+        if Profiler is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self.header = 'HTTP_' + getattr(settings, 'PROFILING_HEADER', 'X-Profile').upper().replace('-', '_')
+        self.secret = getattr(settings, 'PROFILING_SECRET', '')
+        self.interval = getattr(settings, 'PROFILING_INTERVAL', 0.001)
+        self.min_duration = getattr(settings, 'PROFILING_MIN_DURATION', 0.5)
+
+    def __call__(self, request):
+        if self._header_authorized(request):
+            trigger = 'header'
+        elif self.sample_rate and random.random() < self.sample_rate:
+            trigger = 'sample'
+        else:
+            return self.get_response(request)
+
+        profiler = start_profiler(self.interval)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+
+        if trigger == 'header' or profiler.last_session.duration >= self.min_duration:
+            save_profile(profiler, request, response, _view_label(request), trigger)
+        return response
+
+    def _header_authorized(self, request):
+        value = request.META.get(self.header)
+        return bool(value and self.secret) and constant_time_compare(value, self.secret)
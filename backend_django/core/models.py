@@ -51,3 +51,38 @@ class TimeStampedModelMixin(models.Model):
             self.created_by = user
         self.updated_by = user
         super().save(*args, **kwargs)
+
+
+class RequestProfile(models.Model):
+    """A sampled request profile, see core.profiling"""
+    TRIGGER_CHOICES = [
+        ('sample', 'Muestreo'),
+        ('header', 'Cabecera'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    view_name = models.CharField(max_length=200, db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    # Interactive flame view and speedscope JSON (https://www.speedscope.app)
+    html = models.FileField(upload_to='profiles/%Y/%m/%d/')
+    speedscope = models.FileField(upload_to='profiles/%Y/%m/%d/')
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['view_name', '-duration_ms'], name='core_profile_view_dur_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration_ms:.0f} ms)'
@@ -0,0 +1,147 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on an ordering that ends in a unique key.
+
+    Views declare it with `cursor_ordering`, e.g. ('name', 'id'), '-' for
+    descending keys. Without it the ordering is (timestamp, id), newest
+    first, with the timestamp field from the view's `cursor_ordering_field`
+    (default 'created_at'); models without it are paginated by id alone,
+    and `?ordering=<field>` flips the direction. Every page is a single
+    indexed range query, so deep pages of a long history cost the same as
+    the first one.
+
+    The cursor is the base64 JSON list of the last row's key values.
+    Responses look like {'next': url or null, 'results': [...]}.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset, request, view)
+        cursor = request.query_params.get(self.cursor_query_param)
+        page, self.next_position = self.paginate_ordered(queryset, ordering, cursor, self.page_size)
+        return page
+
+    def paginate_ordered(self, queryset, ordering, cursor, page_size):
+        """
+        One page of `queryset` in the keyset `ordering`, starting after
+        `cursor`. Returns (rows, next_position), next_position is None on
+        the last page. Raises NotFound on a malformed cursor.
+        """
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self.after_cursor(ordering, self.decode_cursor(cursor, queryset.model, ordering)))
+
+        # One extra row tells whether there is a next page
+        page = list(queryset[:page_size + 1])
+        if len(page) <= page_size:
+            return page, None
+        page = page[:page_size]
+        return page, self.position(page[-1], ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset, request, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return tuple(ordering)
+        field = self.get_ordering_field(queryset, view)
+        prefix = '' if field and request.query_params.get(self.ordering_query_param) == field else '-'
+        keys = (field, 'pk') if field else ('pk',)
+        return tuple(prefix + key for key in keys)
+
+    def get_ordering_field(self, queryset, view):
+        field = getattr(view, 'cursor_ordering_field', 'created_at')
+        try:
+            queryset.model._meta.get_field(field)
+        except FieldDoesNotExist:
+            return None
+        return field
+
+    def position(self, row, ordering):
+        """JSON friendly values of the ordering keys of a row"""
+        values = []
+        for key in ordering:
+            value = getattr(row, key.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif not isinstance(value, (str, int, float)) and value is not None:
+                value = str(value)
+            values.append(value)
+        return values
+
+    def after_cursor(self, ordering, values):
+        """Rows after `values` in the ordering, (a, b) > (x, y) spelled out with AND/OR"""
+        condition = Q()
+        equal = {}
+        for key, value in zip(ordering, values):
+            name = key.lstrip('-')
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def decode_cursor(self, cursor, model, ordering):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        decoded = []
+        for key, value in zip(ordering, values):
+            name = key.lstrip('-')
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            try:
+                value = field.to_python(value)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            decoded.append(value)
+        return decoded
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
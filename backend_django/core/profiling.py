@@ -0,0 +1,59 @@
+"""
+Sampling profiler for production requests.
+
+ProfilingMiddleware runs pyinstrument on a fraction of the requests
+(PROFILING_SAMPLE_RATE) or on any request whose PROFILING_HEADER header
+carries PROFILING_SECRET. Each profile is written to the media storage as HTML and
+speedscope JSON and indexed as a RequestProfile, browsable in the admin by
+endpoint and duration. Sampled requests faster than PROFILING_MIN_DURATION
+are dropped, only the slow ones are worth keeping.
+
+When off, a request costs one random() call and a header lookup.
+"""
+import logging
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from django.utils.text import slugify
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # pragma: no cover
+    Profiler = SpeedscopeRenderer = None
+
+logger = logging.getLogger(__name__)
+
+
+def start_profiler(interval):
+    profiler = Profiler(interval=interval, async_mode='disabled')
+    profiler.start()
+    return profiler
+
+
+def save_profile(profiler, request, response, view_name, trigger):
+    """Writes the profile of a finished request, errors are logged, never raised"""
+    from .models import RequestProfile
+
+    try:
+        session = profiler.last_session
+        user = getattr(request, 'user', None)
+        profile = RequestProfile(
+            view_name=view_name,
+            method=request.method,
+            path=request.path[:500],
+            status_code=response.status_code,
+            duration_ms=session.duration * 1000,
+            trigger=trigger,
+            user=user if getattr(user, 'pk', None) else None,
+        )
+        name = f"{slugify(view_name)}-{timezone.now():%H%M%S%f}"
+        profile.html.save(f'{name}.html', ContentFile(profiler.output_html().encode()), save=False)
+        profile.speedscope.save(
+            f'{name}.speedscope.json', ContentFile(profiler.output(SpeedscopeRenderer()).encode()), save=False
+        )
+        profile.save()
+        return profile
+    except Exception:
+        logger.exception(f'Could not save the profile of {request.method} {request.path}')
+        return None
@@ -0,0 +1,36 @@
+"""
+Fails tests whose requests go over the query budget of their endpoint.
+
+Loaded from pyproject.toml (-p core.pytest_plugin). Budgets come from
+QUERY_BUDGETS and are checked by QueryBudgetMiddleware, so only requests
+made through the test client count. Mark a test with
+@pytest.mark.no_query_budget to skip the check.
+"""
+import pytest
+
+from core.queries import budget_exceeded
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'no_query_budget: do not fail on requests over their query budget')
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    if item.get_closest_marker('no_query_budget'):
+        return (yield)
+
+    overruns = []
+
+    def record(sender, view, profile, budget, **kwargs):
+        repeated = ''.join(f'\n    {count}x {sql[:200]}' for sql, count in profile.duplicates()[:3])
+        overruns.append(f'{view}: {profile.count} queries, budget {budget}{repeated}')
+
+    budget_exceeded.connect(record)
+    try:
+        result = yield
+    finally:
+        budget_exceeded.disconnect(record)
+    if overruns:
+        pytest.fail('Query budget exceeded:\n  ' + '\n  '.join(overruns), pytrace=False)
+    return result
@@ -0,0 +1,71 @@
+"""
+Query profiling: count, time and fingerprint the queries of a request.
+
+A fingerprint is the SQL with its literals replaced by '?', so the same
+query run for every row of a list (an N+1) shows up as one fingerprint
+repeated N times. QueryBudgetMiddleware checks each request against the
+budget of its endpoint, see QUERY_BUDGETS in the settings.
+"""
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.dispatch import Signal
+
+# Sent by QueryBudgetMiddleware when a request runs more queries than its
+# budget, with view, profile and budget. Used by core.pytest_plugin.
+budget_exceeded = Signal()
+
+_strings = re.compile(r"'(?:[^']|'')*'")
+_numbers = re.compile(r'\b\d+(?:\.\d+)?\b')
+_in_lists = re.compile(r'\bIN \((?:\?|%s)(?:, (?:\?|%s))*\)', re.IGNORECASE)
+_spaces = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL without literals, parameter lists of any length look the same"""
+    sql = _strings.sub('?', sql)
+    sql = _numbers.sub('?', sql)
+    sql = _in_lists.sub('IN (...)', sql)
+    return _spaces.sub(' ', sql).strip()
+
+
+class QueryProfile:
+    """
+    connection.execute_wrapper that counts and times queries. With
+    fingerprints=True it also groups them by fingerprint and keeps the
+    ones slower than slow_seconds.
+    """
+
+    def __init__(self, fingerprints=False, slow_seconds=None):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter() if fingerprints else None
+        self.slow_seconds = slow_seconds
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if self.fingerprints is not None:
+                self.fingerprints[fingerprint(sql)] += 1
+            if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+                self.slow.append((elapsed, sql))
+
+    def duplicates(self, min_count=2):
+        """[(fingerprint, count)] run at least min_count times, most repeated first"""
+        if not self.fingerprints:
+            return []
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= min_count]
+
+
+def query_budget(view_name):
+    """Max queries for a URL name, QUERY_BUDGETS['default'] when not listed, None for no limit"""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, budgets.get('default'))
@@ -0,0 +1,102 @@
+"""
+orjson based renderer and parser for the API.
+
+Opt-in through DJANGO_API_ORJSON (see config/settings/base.py). orjson
+encodes UUIDs and datetimes natively, anything else goes through DRF's own
+encoder so the output matches JSONRenderer. When orjson isn't installed
+both classes behave exactly like the DRF ones.
+"""
+import json
+
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class RawJSON:
+    """
+    JSON that is already encoded, e.g. a stored `resultados_json`.
+
+    ORJSONRenderer writes it into the response bytes as is, so it must be
+    valid JSON, nothing checks it here. Other renderers get it decoded, see
+    `RawJSON.decode`.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data.encode() if isinstance(data, str) else data
+
+    def __getstate__(self):
+        return self.data
+
+    def __setstate__(self, state):
+        self.data = state
+
+    def __eq__(self, other):
+        return isinstance(other, RawJSON) and other.data == self.data
+
+    def __hash__(self):
+        return hash(self.data)
+
+    def decode(self):
+        return json.loads(self.data)
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """DRF's encoder, decoding RawJSON values"""
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            return obj.decode()
+        return super().default(obj)
+
+
+_drf_encoder = JSONEncoder()
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    _fragment = getattr(orjson, 'Fragment', None)
+
+
+def _orjson_default(obj):
+    if isinstance(obj, RawJSON):
+        # orjson < 3.9.14 can't embed fragments, decode them instead
+        return _fragment(obj.data) if _fragment is not None else obj.decode()
+    return _drf_encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer on top of orjson, with RawJSON passthrough"""
+    encoder_class = JSONEncoder
+    supports_raw_json = orjson is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        option = ORJSON_OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=_orjson_default, option=option)
+        # Same as JSONRenderer: these are valid JSON but not valid javascript
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
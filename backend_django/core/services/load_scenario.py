@@ -0,0 +1,231 @@
+"""
+Scripted load scenario for the main mobile flow (manage.py run_load_scenario):
+
+    analizar -> confirmar -> snapshot -> report generate -> dashboard reads
+
+Each virtual user logs in as one of the seeded load users (see load_seed)
+and runs the flow against its center. Requests go over HTTP to a running
+server, which must have DETECTION_STUB_MODEL enabled, or in process through
+the Django test client, where the stub is enabled for the run. Every
+request is timed; summarize() turns the samples into throughput and
+latency percentiles per step.
+"""
+import io
+import math
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.test import Client, override_settings
+from PIL import Image as PILImage
+from rest_framework.authtoken.models import Token
+
+from .load_seed import load_centers
+
+FLOW_STEPS = (
+    'analizar', 'confirmar', 'snapshot', 'report_generate',
+    'dashboard_stats', 'dashboard_snapshots', 'dashboard_latest_report', 'dashboard_detections',
+)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def sample_image(width=1280, height=960):
+    """A JPEG about the size of a phone picture after the app compresses it"""
+    image = PILImage.effect_noise((width, height), 64).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=80)
+    return buffer.getvalue()
+
+
+class HttpTransport:
+    def __init__(self, base_url, token, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Token {token}'
+        self.timeout = timeout
+
+    def get(self, path, params=None):
+        response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+        return response.status_code, _json(response.json, response.status_code)
+
+    def post_json(self, path, payload):
+        response = self.session.post(self.base_url + path, json=payload, timeout=self.timeout)
+        return response.status_code, _json(response.json, response.status_code)
+
+    def post_image(self, path, fields, image):
+        files = {'imagen': ('load.jpg', image, 'image/jpeg')}
+        response = self.session.post(self.base_url + path, data=fields, files=files, timeout=self.timeout)
+        return response.status_code, _json(response.json, response.status_code)
+
+    def close(self):
+        self.session.close()
+
+
+class InProcessTransport:
+    def __init__(self, token):
+        self.client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=f'Token {token}')
+
+    def get(self, path, params=None):
+        response = self.client.get(path, params)
+        return response.status_code, _json(response.json, response.status_code)
+
+    def post_json(self, path, payload):
+        response = self.client.post(path, payload, content_type='application/json')
+        return response.status_code, _json(response.json, response.status_code)
+
+    def post_image(self, path, fields, image):
+        upload = io.BytesIO(image)
+        upload.name = 'load.jpg'
+        response = self.client.post(path, {**fields, 'imagen': upload})
+        return response.status_code, _json(response.json, response.status_code)
+
+    def close(self):
+        # Each virtual user runs in its own thread, with its own connection
+        connections.close_all()
+
+
+def _json(decode, status_code):
+    if status_code == 304:
+        return None
+    try:
+        return decode()
+    except ValueError:
+        return None
+
+
+class Recorder:
+    """Collects (step, seconds, ok) samples from every virtual user"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def call(self, step, request, *args):
+        start = time.perf_counter()
+        try:
+            status_code, data = request(*args)
+        except requests.RequestException:
+            status_code, data = 0, None
+        elapsed = time.perf_counter() - start
+        ok = 0 < status_code < 400
+        with self._lock:
+            self.samples[step].append(elapsed)
+            if not ok:
+                self.errors[step] += 1
+        return data if ok else None
+
+
+def run_flow(transport, center_id, image, recorder):
+    """One pass of the mobile flow, stops at the first step that fails"""
+    fields = {'tipo_modelo': 'yolo', 'center_id': center_id, 'guardar_imagen': 'false'}
+    analysis = recorder.call('analizar', transport.post_image, '/api/detecciones/analizar/', fields, image)
+    if not analysis:
+        return False
+    deteccion_id = str(analysis['deteccion_id'])
+
+    fields = {'analysis_id': deteccion_id, 'center_id': center_id, 'guardar_imagen': 'false'}
+    if recorder.call('confirmar', transport.post_image, '/api/detecciones/confirmar/', fields, image) is None:
+        return False
+
+    snapshot = recorder.call('snapshot', transport.post_json, '/inventory/api/snapshots/', {
+        'name': f'Load {deteccion_id[:8]}', 'center': center_id, 'source_detections': [deteccion_id],
+    })
+    if not snapshot:
+        return False
+
+    report = recorder.call('report_generate', transport.post_json, '/inventory/api/reports/generate/', {
+        'snapshot_id': snapshot['id'],
+    })
+    if report is None:
+        return False
+
+    params = {'center_id': center_id}
+    recorder.call('dashboard_stats', transport.get, '/inventory/api/categories/categories_stats/', params)
+    recorder.call('dashboard_snapshots', transport.get, '/inventory/api/snapshots/by_center/', params)
+    recorder.call('dashboard_latest_report', transport.get, '/inventory/api/reports/latest/', params)
+    recorder.call('dashboard_detections', transport.get, '/api/detecciones/by-center/', params)
+    return True
+
+
+def load_users(limit):
+    """[(center_id, token)] of up to limit seeded users, one per center first"""
+    users = []
+    for center in load_centers().order_by('id').prefetch_related('users')[:limit]:
+        user = center.users.all()[0]
+        token, _ = Token.objects.get_or_create(user=user)
+        users.append((center.pk, token.key))
+    return users
+
+
+def run_scenario(concurrency=10, iterations=10, base_url=None, image=None):
+    """
+    Runs `iterations` flows in each of `concurrency` virtual users and
+    returns summarize()'s report. In process when base_url is None.
+    """
+    users = load_users(concurrency)
+    if not users:
+        raise ValueError('No load test data, run manage.py seed_load_data first')
+    image = image or sample_image()
+    recorder = Recorder()
+    completed = []
+
+    def virtual_user(number):
+        center_id, token = users[number % len(users)]
+        transport = HttpTransport(base_url, token) if base_url else InProcessTransport(token)
+        try:
+            for _ in range(iterations):
+                if base_url is None:
+                    close_old_connections()
+                completed.append(run_flow(transport, center_id, image, recorder))
+        finally:
+            transport.close()
+
+    overrides = {}
+    if base_url is None:
+        overrides = {'DETECTION_STUB_MODEL': True, 'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+
+    with override_settings(**overrides):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(virtual_user, range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(recorder, elapsed, flows=len(completed), completed=sum(completed))
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(recorder, elapsed, flows, completed):
+    steps = {}
+    total = 0
+    for step in FLOW_STEPS:
+        samples = sorted(recorder.samples.get(step, []))
+        if not samples:
+            continue
+        total += len(samples)
+        steps[step] = {
+            'requests': len(samples),
+            'errors': recorder.errors.get(step, 0),
+            'mean_ms': sum(samples) / len(samples) * 1000,
+            **{f'p{p}_ms': percentile(samples, p) * 1000 for p in PERCENTILES},
+            'max_ms': samples[-1] * 1000,
+        }
+    return {
+        'elapsed_s': elapsed,
+        'flows': flows,
+        'completed_flows': completed,
+        'requests': total,
+        'flows_per_s': completed / elapsed if elapsed else 0,
+        'requests_per_s': total / elapsed if elapsed else 0,
+        'steps': steps,
+    }
@@ -0,0 +1,187 @@
+"""
+Synthetic data for load tests (manage.py seed_load_data).
+
+Every center gets its users, one inventory snapshot per day over the last
+`days` days with an item per category, and `detections_per_day` detections
+with their Image and DeteccionClassCount rows, all inserted with
+bulk_create in batches of `batch_size`, one center at a time, so memory
+doesn't grow with the volume. Seeded rows are recognizable by LOAD_PREFIX
+and removed by flush_load_data.
+"""
+import datetime
+import json
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from backend_django.users.models import User
+from center.models import Center
+from deteccion_app.models import Deteccion, DeteccionClassCount, count_classes
+from deteccion_app.services.stub_service import STUB_CLASSES
+from inventory.models import InventoryItem, InventorySnapshot, ProductCategory
+from inventory.services.category_stats import invalidate_all_category_stats
+from inventory.services.rollup import rebuild_states
+from inventory.services.versions import bump_global_version
+from uploads.models import Image
+
+LOAD_PREFIX = 'load-'
+LOAD_PASSWORD = 'load-test'
+# Seeded images point to a file that doesn't exist, nothing reads them
+LOAD_IMAGE_FILE = 'inventory_images/load-test.jpg'
+
+
+class LoadDataExists(Exception):
+    pass
+
+
+def _bulk_create_dated(model, objects, field, moments, batch_size):
+    """
+    bulk_create, then set the auto_now_add `field` to `moments` with a
+    bulk_update: bulk_create always writes now() there.
+    """
+    model.objects.bulk_create(objects, batch_size=batch_size)
+    for obj, moment in zip(objects, moments):
+        setattr(obj, field, moment)
+    model.objects.bulk_update(objects, [field], batch_size=batch_size)
+
+
+def load_centers():
+    return Center.objects.filter(name__startswith=LOAD_PREFIX)
+
+
+def flush_load_data():
+    """
+    Deletes the seeded centers (and, by cascade, their data) and users.
+    Inventory states aren't refreshed item by item while their center is
+    being deleted, see inventory.signals.
+    """
+    centers = load_centers()
+    count = centers.count()
+    with transaction.atomic():
+        centers.delete()
+        User.objects.filter(email__startswith=LOAD_PREFIX).delete()
+    bump_global_version('centers')
+    return count
+
+
+def _categories(count):
+    names = list(STUB_CLASSES) + [f'{LOAD_PREFIX}category-{i}' for i in range(len(STUB_CLASSES), count)]
+    categories = []
+    for name in names[:count]:
+        category, _ = ProductCategory.objects.get_or_create(
+            name=name, defaults={'ideal_count': random.randint(50, 500), 'emergency_priority': random.randint(1, 5)}
+        )
+        categories.append(category)
+    return categories
+
+
+def _resultados(categories, width=870, height=870):
+    detections = []
+    for _ in range(random.randint(1, 20)):
+        x1, y1 = random.uniform(0, width * 0.8), random.uniform(0, height * 0.8)
+        detections.append({
+            'class': random.choice(categories).name,
+            'confidence': round(random.uniform(0.3, 0.99), 3),
+            'bbox': {'x1': x1, 'y1': y1, 'x2': x1 + random.uniform(10, 150), 'y2': y1 + random.uniform(10, 150)},
+        })
+    return {'detections': detections, 'count': len(detections), 'model_type': 'yolo'}
+
+
+def _seed_center(center, users, categories, days, detections_per_day, batch_size):
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    snapshots, items, detecciones, images, class_counts, links = [], [], [], [], [], []
+    snapshot_times, detection_times = [], []
+    SourceDetection = InventorySnapshot.source_detections.through
+    counts = {category.pk: random.randint(0, category.ideal_count) for category in categories}
+
+    for day in range(days, 0, -1):
+        moment = today - datetime.timedelta(days=day, hours=-random.randint(8, 18), minutes=-random.randint(0, 59))
+        user = random.choice(users)
+
+        day_detections = []
+        for i in range(detections_per_day):
+            taken_at = moment - datetime.timedelta(minutes=10 * (detections_per_day - i))
+            image = Image(
+                file=LOAD_IMAGE_FILE, taken_at=taken_at, taken_by=user, center=center, processed=True,
+            )
+            resultados = _resultados(categories)
+            deteccion = Deteccion(
+                center=center, image=image, tipo_modelo='yolo',
+                resultados_json=json.dumps(resultados), numero_objetos=resultados['count'],
+                tiempo_procesamiento=round(random.uniform(0.05, 0.8), 3), confirmed=True,
+            )
+            images.append(image)
+            day_detections.append(deteccion)
+            detection_times.append(taken_at)
+            class_counts.extend(
+                DeteccionClassCount(deteccion=deteccion, class_name=class_name, count=count)
+                for class_name, count in count_classes(resultados).items()
+            )
+        detecciones.extend(day_detections)
+
+        snapshot = InventorySnapshot(name=f'Inventario {moment:%d/%m/%Y}', center=center, created_by=user)
+        snapshots.append(snapshot)
+        snapshot_times.append(moment)
+        for category in categories:
+            # A random walk, so consumption and trends look like real data
+            counts[category.pk] = max(0, counts[category.pk] + random.randint(-15, 12))
+            items.append(InventoryItem(snapshot=snapshot, category=category, count=counts[category.pk]))
+        links.extend((snapshot, deteccion) for deteccion in day_detections)
+
+    # Backdated after the insert, bulk_create stamps auto_now_add fields with now()
+    _bulk_create_dated(Image, images, 'created_at', detection_times, batch_size)
+    _bulk_create_dated(Deteccion, detecciones, 'fecha_creacion', detection_times, batch_size)
+    DeteccionClassCount.objects.bulk_create(class_counts, batch_size=batch_size)
+    _bulk_create_dated(InventorySnapshot, snapshots, 'created_at', snapshot_times, batch_size)
+    InventoryItem.objects.bulk_create(items, batch_size=batch_size)
+    SourceDetection.objects.bulk_create(
+        [SourceDetection(inventorysnapshot_id=snapshot.pk, deteccion_id=deteccion.pk) for snapshot, deteccion in links],
+        batch_size=batch_size,
+    )
+    return {'snapshots': len(snapshots), 'items': len(items), 'detections': len(detecciones), 'images': len(images)}
+
+
+def seed_load_data(centers=10, days=30, users_per_center=2, categories=12, detections_per_day=2,
+                   batch_size=5000, random_seed=None, progress=None):
+    """
+    Seeds the load test data set and returns the number of rows per model.
+    Raises LoadDataExists when there is seeded data already, see flush_load_data.
+    progress(done, total) is called after each center.
+    """
+    if load_centers().exists():
+        raise LoadDataExists('Load test data already exists')
+    if random_seed is not None:
+        random.seed(random_seed)
+
+    stats = {'centers': centers, 'users': 0, 'categories': categories,
+             'snapshots': 0, 'items': 0, 'detections': 0, 'images': 0}
+    category_list = _categories(categories)
+    # Hashing once, every load user shares the password
+    password = make_password(LOAD_PASSWORD)
+
+    for number in range(1, centers + 1):
+        with transaction.atomic():
+            center = Center.objects.create(name=f'{LOAD_PREFIX}center-{number:05d}', address='Load test')
+            users = User.objects.bulk_create([
+                User(email=f'{LOAD_PREFIX}{number:05d}-{i}@example.com', name=f'Load user {number}-{i}',
+                     password=password)
+                for i in range(1, users_per_center + 1)
+            ])
+            Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+            center.users.add(*users)
+
+            center_stats = _seed_center(center, users, category_list, days, detections_per_day, batch_size)
+        stats['users'] += len(users)
+        for key, value in center_stats.items():
+            stats[key] += value
+        if progress:
+            progress(number, centers)
+
+    rebuild_states()
+    invalidate_all_category_stats()
+    bump_global_version('centers')
+    return stats
+
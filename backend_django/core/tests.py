@@ -1,3 +1,213 @@
-from django.test import TestCase
+import datetime
+import decimal
+import io
+import json
+import shutil
+import tempfile
+import uuid
+from unittest import mock
 
-# Create your tests here.
+import pytest
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from backend_django.users.tests.factories import UserFactory
+
+from .metrics import REMOTE_BACKEND_ERRORS, prometheus_client, remote_call
+from .models import RequestProfile
+from .profiling import start_profiler
+from .queries import budget_exceeded, fingerprint
+from .renderers import JSONEncoder, ORJSONParser, ORJSONRenderer, RawJSON
+from .services.load_scenario import FLOW_STEPS, run_scenario
+from .services.load_seed import LoadDataExists, flush_load_data, load_centers, seed_load_data
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def setUp(self):
+        self.data = {
+            'id': uuid.uuid4(),
+            'fecha': datetime.datetime(2025, 3, 1, 12, 30, tzinfo=datetime.timezone.utc),
+            'dia': datetime.date(2025, 3, 1),
+            'total': decimal.Decimal('12.50'),
+            'nombre': gettext_lazy('Agua'),
+            'conteos': {1: 3, 2: 4},
+            'items': [{'nombre': 'ñame  '}],
+        }
+
+    def test_same_output_as_drf(self):
+        ours = json.loads(ORJSONRenderer().render(self.data))
+        theirs = json.loads(JSONRenderer().render(self.data))
+        self.assertEqual(ours, theirs)
+        self.assertNotIn(' '.encode(), ORJSONRenderer().render(self.data))
+
+    def test_raw_json_is_embedded(self):
+        raw = '{"detections": [{"class": "agua", "confidence": 0.9}]}'
+        rendered = ORJSONRenderer().render({'resultados': RawJSON(raw), 'fecha': timezone.now()})
+        self.assertIn(b'"resultados":{"detections": [{"class": "agua", "confidence": 0.9}]}', rendered)
+
+        # Any other renderer gets it decoded
+        fallback = JSONRenderer()
+        fallback.encoder_class = JSONEncoder
+        self.assertEqual(json.loads(fallback.render({'resultados': RawJSON(raw)}))['resultados'], json.loads(raw))
+
+        # Equal values hash alike, str or bytes
+        self.assertEqual(len({RawJSON(raw), RawJSON(raw.encode())}), 1)
+
+    def test_parser(self):
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"center_id": 1}')), {'center_id': 1})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"center_id": NaN}'))
+
+
+class MetricsTests(TestCase):
+    def _sample(self, name, labels):
+        return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_measured_by_view(self):
+        # Anonymous, so a 403
+        labels = {'view': 'all-centers', 'method': 'GET', 'status': '4xx'}
+        before = self._sample('django_request_seconds_count', labels)
+        self.client.get('/api/all-centers/')
+        self.assertEqual(self._sample('django_request_seconds_count', labels), before + 1)
+        self.assertGreater(self._sample('django_request_db_seconds_count', {'view': 'all-centers'}), 0)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'django_request_seconds_bucket{', response.content)
+        self.assertIn(b'view="all-centers"', response.content)
+        # The scrape itself isn't measured
+        self.assertNotIn(b'view="metrics"', response.content)
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+    def test_remote_call_errors(self):
+        errors = self._sample('remote_backend_errors_total', {'backend': 'test'})
+        calls = self._sample('remote_backend_seconds_count', {'backend': 'test'})
+        with remote_call('test'):
+            pass
+        with self.assertRaises(ValueError), remote_call('test'):
+            raise ValueError
+        self.assertEqual(self._sample('remote_backend_errors_total', {'backend': 'test'}), errors + 1)
+        self.assertEqual(self._sample('remote_backend_seconds_count', {'backend': 'test'}), calls + 2)
+
+
+class QueryBudgetTests(TestCase):
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'o''brien'  AND x IN (%s, %s, %s)"),
+            "SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)",
+        )
+        self.assertEqual(fingerprint('SELECT 1 FROM t WHERE id IN (%s)'), fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s)'))
+
+    # The overrun is on purpose, core.pytest_plugin would fail the test
+    @pytest.mark.no_query_budget
+    def test_over_budget_is_logged_and_signaled(self):
+        overruns = []
+
+        def record(sender, view, profile, budget, **kwargs):
+            overruns.append((view, profile.count, budget))
+
+        budget_exceeded.connect(record)
+        self.addCleanup(budget_exceeded.disconnect, record)
+
+        with override_settings(QUERY_BUDGETS={'default': 0}), self.assertLogs('core.queries', 'WARNING') as logs:
+            self.client.get('/api/all-centers/')
+        self.assertEqual(len(overruns), 1)
+        self.assertEqual(overruns[0][0], 'all-centers')
+        self.assertIn('budget 0', logs.output[0])
+
+        overruns.clear()
+        with override_settings(QUERY_BUDGETS={'default': None}):
+            self.client.get('/api/all-centers/')
+        self.assertEqual(overruns, [])
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media, PROFILING_MIN_DURATION=0, PROFILING_SECRET='s3cret')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def _get(self, user, **headers):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get('/api/all-centers/', **headers)
+
+    def test_header_needs_the_secret(self):
+        with mock.patch('core.middleware.start_profiler', wraps=start_profiler) as start:
+            self._get(UserFactory(is_staff=True), HTTP_X_PROFILE='1')
+            with override_settings(PROFILING_SECRET=''):
+                self._get(UserFactory(is_staff=True), HTTP_X_PROFILE='')
+        # Checked before the profiler starts
+        start.assert_not_called()
+        self.assertFalse(RequestProfile.objects.exists())
+
+        staff = UserFactory(is_staff=True)
+        self.assertEqual(self._get(staff, HTTP_X_PROFILE='s3cret').status_code, 200)
+        profile = RequestProfile.objects.get()
+        self.assertEqual((profile.view_name, profile.trigger, profile.user), ('all-centers', 'header', staff))
+        self.assertIn(b'<html', profile.html.read())
+        self.assertEqual(json.loads(profile.speedscope.read())['$schema'], 'https://www.speedscope.app/file-format-schema.json')
+
+        # Files go with the profile
+        path = profile.html.path
+        profile.delete()
+        self.assertFalse(default_storage.exists(path))
+
+    def test_sampling(self):
+        self._get(UserFactory())
+        self.assertFalse(RequestProfile.objects.exists())
+
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            self._get(UserFactory())
+        self.assertEqual(RequestProfile.objects.get().trigger, 'sample')
+
+        # Fast sampled requests aren't kept
+        with override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_MIN_DURATION=60):
+            self._get(UserFactory())
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+
+# The scenario's virtual users run in threads, with their own connections
+class LoadTestTests(TransactionTestCase):
+    def test_seed_and_scenario(self):
+        from deteccion_app.models import Deteccion, count_classes
+        from inventory.models import InventorySnapshot
+
+        stats = seed_load_data(centers=2, days=3, users_per_center=2, categories=4, detections_per_day=2, random_seed=1)
+        self.assertEqual(
+            {key: stats[key] for key in ('users', 'snapshots', 'items', 'detections', 'images')},
+            {'users': 4, 'snapshots': 6, 'items': 24, 'detections': 12, 'images': 12},
+        )
+        # Spread over past days, not all stamped now
+        oldest = InventorySnapshot.objects.order_by('created_at').first()
+        self.assertGreaterEqual((timezone.now() - oldest.created_at).days, 2)
+        self.assertFalse(Deteccion.objects.filter(image__isnull=True).exists())
+        self.assertGreaterEqual((timezone.now() - Deteccion.objects.order_by('fecha_creacion').first().fecha_creacion).days, 2)
+        for deteccion in Deteccion.objects.prefetch_related('class_counts'):
+            self.assertEqual(
+                {row.class_name: row.count for row in deteccion.class_counts.all()},
+                count_classes(deteccion.get_resultados()),
+            )
+        with self.assertRaises(LoadDataExists):
+            seed_load_data(centers=1)
+
+        report = run_scenario(concurrency=1, iterations=1)
+        self.assertEqual(report['completed_flows'], 1)
+        self.assertEqual(list(report['steps']), list(FLOW_STEPS))
+        self.assertFalse(any(step['errors'] for step in report['steps'].values()))
+        self.assertLessEqual(report['steps']['analizar']['p50_ms'], report['steps']['analizar']['max_ms'])
+
+        self.assertEqual(flush_load_data(), 2)
+        self.assertFalse(load_centers().exists())
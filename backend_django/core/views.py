@@ -1,3 +1,37 @@
-from django.shortcuts import render
+import os
 
-# Create your views here.
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from .metrics import prometheus_client
+
+
+@transaction.non_atomic_requests
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape endpoint. With PROMETHEUS_MULTIPROC_DIR set the
+    values of every gunicorn worker are aggregated, otherwise only the ones
+    of the process that answers. Protected by METRICS_TOKEN when it is set,
+    which production settings require.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        auth = request.META.get('HTTP_AUTHORIZATION', '')
+        if not constant_time_compare(auth, f'Bearer {token}'):
+            return HttpResponse(status=401)
+
+    if prometheus_client is None:
+        return HttpResponse('prometheus_client is not installed\n', status=501, content_type='text/plain')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -0,0 +1,45 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.exports import StreamingExportView
+from core.renderers import RawJSON
+from ..models import Deteccion
+from ..services.box_export import export_root, read_state
+from ..tasks import export_detection_boxes
+
+
+class DeteccionExportView(StreamingExportView):
+    """Detecciones con sus resultados tal como están guardados"""
+    columns = (
+        'id', 'fecha_creacion', 'center_id', 'image_id', 'tipo_modelo',
+        'numero_objetos', 'tiempo_procesamiento', 'confirmed', 'resultados',
+    )
+    time_field = 'fecha_creacion'
+    filename = 'detecciones'
+    queryset = Deteccion.objects.values(*columns[:-1], 'resultados_json')
+
+    def get_rows(self, rows):
+        for row in rows:
+            # Sin decodificar, el JSON guardado se copia tal cual
+            row['resultados'] = RawJSON(row.pop('resultados_json') or '{}')
+            yield row
+
+
+class BoxExportView(APIView):
+    """
+    Export de cajas a Parquet (ver services/box_export.py).
+    GET devuelve hasta dónde llegó el último export, POST lanza uno nuevo.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        state = read_state(export_root())
+        return Response({
+            'last_exported': {'fecha_creacion': state[0], 'id': state[1]} if state else None,
+        })
+
+    def post(self, request):
+        task = export_detection_boxes.delay()
+        return Response({'task_id': task.id}, status=status.HTTP_202_ACCEPTED)
@@ -1,13 +1,14 @@
 from rest_framework import serializers
+from core.fields import RawJSONField
 from ..models import Deteccion
 
 
 class DeteccionSerializer(serializers.ModelSerializer):
     """Serializador para el modelo de Detección"""
 
-    resultados = serializers.SerializerMethodField()
-    center_id = serializers.IntegerField(source='center.id', read_only=True, allow_null=True)
-    image_id = serializers.IntegerField(source='image.id', read_only=True, allow_null=True)
+    resultados = RawJSONField(source='resultados_json')
+    center_id = serializers.IntegerField(read_only=True, allow_null=True)
+    image_id = serializers.IntegerField(read_only=True, allow_null=True)
 
     class Meta:
         model = Deteccion
@@ -16,10 +17,6 @@ class DeteccionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_creacion', 'numero_objetos',
                             'tiempo_procesamiento', 'resultados', 'center_id', 'image_id', 'confirmed']
 
-    def get_resultados(self, obj):
-        """Obtiene los resultados como diccionario"""
-        return obj.get_resultados()
-
 
 class ImagenUploadSerializer(serializers.Serializer):
     """Serializador para la subida de imágenes"""
@@ -5,3 +5,9 @@ class DeteccionAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'deteccion_app'
     verbose_name = 'Detección de Objetos'
+
+    def ready(self):
+        from inventory.services.versions import track_center_versions
+        from .models import Deteccion
+
+        track_center_versions(Deteccion, 'detections')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from deteccion_app.services.box_export import ExportInProgress, export_boxes, export_root
+
+
+class Command(BaseCommand):
+    help = "Export detection boxes to a date partitioned Parquet dataset, incrementally"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', help="Dataset directory (default: DETECTION_BOXES_EXPORT_ROOT)")
+        parser.add_argument('--full', action='store_true', help="Ignore the saved state and export everything")
+        parser.add_argument('--rows-per-file', type=int, default=None, help="Boxes per Parquet write")
+
+    def handle(self, *args, **options):
+        kwargs = {'root': options['root'] or export_root(), 'full': options['full']}
+        if options['rows_per_file']:
+            kwargs['rows_per_file'] = options['rows_per_file']
+        try:
+            stats = export_boxes(**kwargs)
+        except ExportInProgress as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {stats['boxes']} boxes from {stats['detections']} detections to {kwargs['root']}"
+        ))
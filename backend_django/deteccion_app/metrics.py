@@ -0,0 +1,21 @@
+from core.metrics import counter, gauge, histogram
+
+ANALYZE_STAGE_SECONDS = histogram(
+    'deteccion_analyze_stage_seconds',
+    'Tiempo de cada etapa de /detecciones/analizar',
+    ['tipo_modelo', 'stage'],
+)
+
+# Sin cola ni lotes: cada request infiere una imagen, así que la profundidad
+# de la "cola" son las inferencias en curso entre todos los workers
+INFERENCES_IN_PROGRESS = gauge(
+    'deteccion_inferences_in_progress',
+    'Inferencias en curso',
+    ['tipo_modelo'],
+)
+
+MODEL_LOADS = counter(
+    'deteccion_model_loads',
+    'Cargas de los pesos del modelo',
+    ['tipo_modelo'],
+)
@@ -0,0 +1,91 @@
+# Generated by Django 5.0.11 on 2026-10-19 05:19
+
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of deteccion_app.models.count_classes as of this migration,
+# so later changes to the model code don't change the backfill.
+MIN_CLASS_CONFIDENCE = 0.5
+
+
+def _as_count(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if isinstance(value, float) and not value.is_integer():
+        return None
+    return int(value) if value >= 0 else None
+
+
+def count_classes(resultados):
+    counts = {}
+    if not isinstance(resultados, dict):
+        return counts
+
+    def add(class_name, count):
+        if isinstance(class_name, str) and class_name and count:
+            counts[class_name] = counts.get(class_name, 0) + count
+
+    if 'detections' in resultados:
+        detections = resultados.get('detections')
+        for det in detections if isinstance(detections, list) else []:
+            if not isinstance(det, dict):
+                continue
+            confidence = det.get('confidence')
+            if isinstance(confidence, (int, float)) and not isinstance(confidence, bool) \
+                    and confidence >= MIN_CLASS_CONFIDENCE:
+                add(det.get('class'), 1)
+    elif 'categories' in resultados:
+        categories = resultados.get('categories')
+        for category, count in (categories.items() if isinstance(categories, dict) else []):
+            add(category, _as_count(count))
+    else:
+        for category, data in resultados.items():
+            if isinstance(data, dict):
+                data = data.get('count')
+            add(category, _as_count(data))
+    return counts
+
+
+def build_class_counts(apps, schema_editor):
+    Deteccion = apps.get_model('deteccion_app', 'Deteccion')
+    DeteccionClassCount = apps.get_model('deteccion_app', 'DeteccionClassCount')
+
+    batch = []
+    for deteccion_id, resultados_json in Deteccion.objects.values_list('id', 'resultados_json').iterator(chunk_size=500):
+        try:
+            resultados = json.loads(resultados_json)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        batch.extend(
+            DeteccionClassCount(deteccion_id=deteccion_id, class_name=class_name, count=count)
+            for class_name, count in count_classes(resultados).items()
+        )
+        if len(batch) >= 1000:
+            DeteccionClassCount.objects.bulk_create(batch)
+            batch = []
+    DeteccionClassCount.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deteccion_app', '0006_alter_deteccion_tipo_modelo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeteccionClassCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_name', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('deteccion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_counts', to='deteccion_app.deteccion')),
+            ],
+            options={
+                'unique_together': {('deteccion', 'class_name')},
+            },
+        ),
+        migrations.RunPython(build_class_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.11 on 2026-10-19 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deteccion_app', '0007_deteccionclasscount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deteccion',
+            index=models.Index(fields=['center', '-fecha_creacion', '-id'], name='deteccion_a_center__d5d9ab_idx'),
+        ),
+    ]
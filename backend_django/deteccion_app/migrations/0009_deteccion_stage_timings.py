@@ -0,0 +1,53 @@
+# Generated by Django 5.0.11 on 2026-10-19 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deteccion_app', '0008_deteccion_center_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deteccion',
+            name='tiempo_db_write',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deteccion',
+            name='tiempo_decode',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deteccion',
+            name='tiempo_exif',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deteccion',
+            name='tiempo_inference',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deteccion',
+            name='tiempo_model_acquire',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deteccion',
+            name='tiempo_postprocess',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deteccion',
+            name='tiempo_resize',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deteccion',
+            name='tiempo_storage_upload',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.11 on 2026-10-19 09:12
+
+import json
+
+from django.db import migrations
+
+
+def replace_invalid_resultados(apps, schema_editor):
+    """
+    Las APIs copian resultados_json tal cual (ver core/fields.py), así que
+    tiene que ser JSON válido. set_resultados ya lo garantiza, las filas
+    anteriores que no lo sean pasan a {}.
+    """
+    Deteccion = apps.get_model('deteccion_app', 'Deteccion')
+
+    invalid = []
+    for deteccion_id, resultados_json in Deteccion.objects.values_list('id', 'resultados_json').iterator(chunk_size=500):
+        try:
+            json.loads(resultados_json)
+        except (json.JSONDecodeError, TypeError):
+            invalid.append(deteccion_id)
+    for start in range(0, len(invalid), 1000):
+        Deteccion.objects.filter(id__in=invalid[start:start + 1000]).update(resultados_json='{}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deteccion_app', '0009_deteccion_stage_timings'),
+    ]
+
+    operations = [
+        migrations.RunPython(replace_invalid_resultados, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,61 @@
-from django.db import models
+from django.db import models, transaction
 import uuid
 import json
 from center.models import Center
 from uploads.models import Image
+from .services.timing import ANALYZE_STAGES
+
+# Confianza mínima para que una detección cuente en el inventario
+MIN_CLASS_CONFIDENCE = 0.5
+
+
+def _as_count(value):
+    """Entero no negativo, o None si el valor no es un conteo"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if isinstance(value, float) and not value.is_integer():
+        return None
+    return int(value) if value >= 0 else None
+
+
+def count_classes(resultados, min_confidence=MIN_CLASS_CONFIDENCE):
+    """
+    Conteo por clase de unos resultados de detección, en cualquiera de los
+    formatos que devuelven los servicios de modelos. Las entradas mal
+    formadas (sin clase, confianza o conteo numérico) se ignoran.
+    """
+    counts = {}
+    if not isinstance(resultados, dict):
+        return counts
+
+    def add(class_name, count):
+        if isinstance(class_name, str) and class_name and count:
+            counts[class_name] = counts.get(class_name, 0) + count
+
+    if 'detections' in resultados:
+        # Formato usado por las APIs de detección de objetos
+        detections = resultados.get('detections')
+        for det in detections if isinstance(detections, list) else []:
+            if not isinstance(det, dict):
+                continue
+            confidence = det.get('confidence')
+            if isinstance(confidence, (int, float)) and not isinstance(confidence, bool) \
+                    and confidence >= min_confidence:
+                add(det.get('class'), 1)
+
+    elif 'categories' in resultados:
+        categories = resultados.get('categories')
+        for category, count in (categories.items() if isinstance(categories, dict) else []):
+            add(category, _as_count(count))
+
+    else:
+        # Algunos sistemas usan un formato {categoria: count} o {categoria: {'count': n}}
+        for category, data in resultados.items():
+            if isinstance(data, dict):
+                data = data.get('count')
+            add(category, _as_count(data))
+
+    return counts
 
 
 class Deteccion(models.Model):
@@ -25,13 +78,24 @@ class Deteccion(models.Model):
     # Imagen original (opcional, si quieres guardarla)
     imagen = models.ImageField(upload_to='detecciones/', null=True, blank=True)
 
-    # Resultados de la detección (guardados como JSON)
+    # Resultados de la detección (guardados como JSON, siempre válido: las
+    # APIs lo copian tal cual, ver set_resultados)
     resultados_json = models.TextField()
 
     # Metadatos adicionales
     numero_objetos = models.IntegerField(default=0)
     tiempo_procesamiento = models.FloatField(help_text="Tiempo de procesamiento en segundos", null=True, blank=True)
 
+    # Desglose por etapa del análisis, en segundos (ver services/timing.py)
+    tiempo_decode = models.FloatField(null=True, blank=True)
+    tiempo_exif = models.FloatField(null=True, blank=True)
+    tiempo_resize = models.FloatField(null=True, blank=True)
+    tiempo_model_acquire = models.FloatField(null=True, blank=True)
+    tiempo_inference = models.FloatField(null=True, blank=True)
+    tiempo_postprocess = models.FloatField(null=True, blank=True)
+    tiempo_db_write = models.FloatField(null=True, blank=True)
+    tiempo_storage_upload = models.FloatField(null=True, blank=True)
+
     # Campo para indicar si la detección ha sido confirmada por el usuario
     confirmed = models.BooleanField(default=False, help_text="Indica si el usuario ha confirmado los resultados")
 
@@ -48,6 +112,18 @@ class Deteccion(models.Model):
         else:
             self.numero_objetos = 0
 
+        # Se guardan en DeteccionClassCount en el próximo save()
+        self._class_counts = count_classes(resultados_dict)
+
+    def set_timings(self, timings):
+        """Guarda los tiempos por etapa, devuelve los campos modificados"""
+        fields = []
+        for stage_name in ANALYZE_STAGES:
+            if stage_name in timings:
+                setattr(self, f'tiempo_{stage_name}', timings[stage_name])
+                fields.append(f'tiempo_{stage_name}')
+        return fields
+
     def get_resultados(self):
         """Obtiene los resultados como diccionario"""
         try:
@@ -55,11 +131,39 @@ class Deteccion(models.Model):
         except (json.JSONDecodeError, TypeError):
             return {}
 
+    def save(self, *args, **kwargs):
+        class_counts = self.__dict__.pop('_class_counts', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if class_counts is not None:
+                self.class_counts.all().delete()
+                DeteccionClassCount.objects.bulk_create([
+                    DeteccionClassCount(deteccion=self, class_name=class_name, count=count)
+                    for class_name, count in class_counts.items()
+                ])
+
     class Meta:
         verbose_name = "Detección"
         verbose_name_plural = "Detecciones"
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Páginas por centro de la API (keyset sobre fecha_creacion, id)
+            models.Index(fields=['center', '-fecha_creacion', '-id'])
+        ]
 
     def __str__(self):
         confirmation_status = "confirmada" if self.confirmed else "pendiente"
         return f"Detección {self.id} - {self.tipo_modelo} - {self.fecha_creacion} ({confirmation_status})"
+
+
+class DeteccionClassCount(models.Model):
+    """Conteo por clase de una detección, calculado al guardar sus resultados"""
+    deteccion = models.ForeignKey(Deteccion, on_delete=models.CASCADE, related_name='class_counts')
+    class_name = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('deteccion', 'class_name')
+
+    def __str__(self):
+        return f"{self.class_name}: {self.count}"
@@ -6,6 +6,8 @@ from typing import Dict, Any
 from PIL import Image
 from inference_sdk import InferenceHTTPClient
 from .model_service import ModelService
+from .timing import stage
+from core.metrics import remote_call
 import logging
 
 logger = logging.getLogger(__name__)
@@ -72,12 +74,13 @@ class RoboflowService(ModelService):
             # logger.info(f"RF-DETR: Imagen guardada para debug en {debug_path}")
 
             # Pasar directamente el objeto PIL Image
-            result = self.client.run_workflow(
-                workspace_name=self.workspace,
-                workflow_id=self.workflow,
-                images={"image": img},
-                use_cache=False
-            )
+            with remote_call('roboflow'):
+                result = self.client.run_workflow(
+                    workspace_name=self.workspace,
+                    workflow_id=self.workflow,
+                    images={"image": img},
+                    use_cache=False
+                )
 
             first = result[0]
 
@@ -87,21 +90,22 @@ class RoboflowService(ModelService):
 
             detections = []
 
-            if 'predictions' in predictions and len(predictions['predictions']) > 0:
-                for pred in predictions['predictions']:
-                    detection = {
-                        'class': pred.get('class', 'unknown'),
-                        'confidence': pred.get('confidence', 0.0),
-                        'bbox': [
-                            pred.get('x', 0) - pred.get('width', 0) / 2,  # x1
-                            pred.get('y', 0) - pred.get('height', 0) / 2,  # y1
-                            pred.get('x', 0) + pred.get('width', 0) / 2,  # x2
-                            pred.get('y', 0) + pred.get('height', 0) / 2  # y2
-                        ],
-                        'detection_id': pred.get('detection_id', ''),
-                        'class_id': pred.get('class_id', 0)
-                    }
-                    detections.append(detection)
+            with stage('postprocess'):
+                if 'predictions' in predictions and len(predictions['predictions']) > 0:
+                    for pred in predictions['predictions']:
+                        detection = {
+                            'class': pred.get('class', 'unknown'),
+                            'confidence': pred.get('confidence', 0.0),
+                            'bbox': [
+                                pred.get('x', 0) - pred.get('width', 0) / 2,  # x1
+                                pred.get('y', 0) - pred.get('height', 0) / 2,  # y1
+                                pred.get('x', 0) + pred.get('width', 0) / 2,  # x2
+                                pred.get('y', 0) + pred.get('height', 0) / 2  # y2
+                            ],
+                            'detection_id': pred.get('detection_id', ''),
+                            'class_id': pred.get('class_id', 0)
+                        }
+                        detections.append(detection)
 
             logger.info(f"RF-DETR: Detecciones convertidas: {len(detections)}")
 
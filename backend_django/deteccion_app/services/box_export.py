@@ -0,0 +1,180 @@
+"""
+Export de las cajas detectadas a Parquet, para reentrenar y auditar los
+modelos sin volver a leer cada resultados_json.
+
+Cada caja es una fila (detection_id, center_id, timestamp, model, class,
+confidence, x1, y1, x2, y2) en un dataset particionado por día
+(date=YYYY-MM-DD/part-*.parquet). Las detecciones se leen por lotes y se
+escriben cada ROWS_PER_FILE cajas, así que la memoria no depende del
+tamaño del histórico.
+
+El export es incremental: la última detección escrita (fecha_creacion, id)
+se guarda en STATE_FILE dentro del directorio y la siguiente ejecución
+sigue desde ahí. Si un proceso se corta, como mucho se repiten las cajas
+del último lote.
+"""
+import json
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from ..models import Deteccion
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '_export_state.json'
+EXPORT_CHUNK_SIZE = 2000
+ROWS_PER_FILE = 100_000
+LOCK_KEY = 'box_export:lock'
+LOCK_TIMEOUT = 2 * 60 * 60
+
+BOX_COLUMNS = ('detection_id', 'center_id', 'timestamp', 'model', 'class', 'confidence', 'x1', 'y1', 'x2', 'y2')
+
+
+class ExportInProgress(Exception):
+    pass
+
+
+def _schema():
+    return pa.schema([
+        ('detection_id', pa.string()),
+        ('center_id', pa.int64()),
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('model', pa.string()),
+        ('class', pa.string()),
+        ('confidence', pa.float64()),
+        ('x1', pa.float64()),
+        ('y1', pa.float64()),
+        ('x2', pa.float64()),
+        ('y2', pa.float64()),
+        ('date', pa.string()),
+    ])
+
+
+def export_root():
+    return getattr(settings, 'DETECTION_BOXES_EXPORT_ROOT', os.path.join(settings.BASE_DIR, 'exports', 'detection_boxes'))
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_boxes(resultados):
+    """
+    (class, confidence, x1, y1, x2, y2) de cada caja de unos resultados.
+    La bbox puede venir como dict {x1, y1, x2, y2} o lista [x1, y1, x2, y2];
+    los formatos sin cajas (solo conteos) no devuelven nada.
+    """
+    if not isinstance(resultados, dict):
+        return
+    for det in resultados.get('detections') or []:
+        if not isinstance(det, dict):
+            continue
+        bbox = det.get('bbox')
+        if isinstance(bbox, dict):
+            coords = [bbox.get(key) for key in ('x1', 'y1', 'x2', 'y2')]
+        elif isinstance(bbox, (list, tuple)) and len(bbox) >= 4:
+            coords = list(bbox[:4])
+        else:
+            coords = [None] * 4
+        yield (str(det.get('class') or ''), _float(det.get('confidence')), *map(_float, coords))
+
+
+def read_state(root):
+    """Returns (fecha_creacion, id) of the last exported detection, or None"""
+    try:
+        with open(os.path.join(root, STATE_FILE)) as f:
+            state = json.load(f)
+        return parse_datetime(state['fecha_creacion']), state['id']
+    except FileNotFoundError:
+        return None
+
+
+def _write_state(root, fecha_creacion, pk):
+    path = os.path.join(root, STATE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'fecha_creacion': fecha_creacion.isoformat(), 'id': str(pk)}, f)
+    os.replace(path + '.tmp', path)
+
+
+def _write_boxes(root, columns):
+    table = pa.Table.from_pydict(columns, schema=_schema())
+    pq.write_to_dataset(
+        table, root, partition_cols=['date'],
+        basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+    )
+
+
+def export_boxes(root=None, full=False, chunk_size=EXPORT_CHUNK_SIZE, rows_per_file=ROWS_PER_FILE):
+    """
+    Escribe en root las cajas de las detecciones nuevas desde el último
+    export. full=True ignora el estado y exporta todo, pensado para un
+    directorio vacío. Devuelve {'detections', 'boxes', 'files'}.
+    """
+    if pa is None:
+        raise ImproperlyConfigured('pyarrow is required to export detection boxes')
+    if not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        raise ExportInProgress('Another box export is running')
+
+    try:
+        root = root or export_root()
+        os.makedirs(root, exist_ok=True)
+        state = None if full else read_state(root)
+
+        detecciones = Deteccion.objects.order_by('fecha_creacion', 'id').values_list(
+            'id', 'center_id', 'fecha_creacion', 'tipo_modelo', 'resultados_json'
+        )
+        if state:
+            fecha, pk = state
+            detecciones = detecciones.filter(Q(fecha_creacion__gt=fecha) | Q(fecha_creacion=fecha, id__gt=pk))
+
+        stats = {'detections': 0, 'boxes': 0, 'files': 0}
+        columns = {name: [] for name in (*BOX_COLUMNS, 'date')}
+        last = None
+
+        def flush():
+            if last is not None:
+                if columns['detection_id']:
+                    _write_boxes(root, columns)
+                    stats['files'] += 1
+                _write_state(root, *last)
+            for values in columns.values():
+                values.clear()
+
+        for pk, center_id, fecha, modelo, resultados_json in detecciones.iterator(chunk_size=chunk_size):
+            try:
+                resultados = json.loads(resultados_json)
+            except (json.JSONDecodeError, TypeError):
+                resultados = None
+            day = fecha.date().isoformat()
+            for box in iter_boxes(resultados):
+                for name, value in zip(BOX_COLUMNS, (str(pk), center_id, fecha, modelo, *box)):
+                    columns[name].append(value)
+                columns['date'].append(day)
+                stats['boxes'] += 1
+
+            stats['detections'] += 1
+            last = (fecha, pk)
+            if len(columns['detection_id']) >= rows_per_file:
+                flush()
+        flush()
+    finally:
+        cache.delete(LOCK_KEY)
+
+    logger.info(f"Export de cajas: {stats['detections']} detecciones, {stats['boxes']} cajas, {stats['files']} escrituras")
+    return stats
@@ -10,7 +10,10 @@ from PIL import Image, ImageOps
 from typing import Dict, Any, Optional, List
 
 from django.conf import settings
+
 from .model_service import ModelService
+from .timing import timed
+from core.metrics import REMOTE_BACKEND_ERRORS, remote_call
 
 logger = logging.getLogger(__name__)
 
@@ -194,17 +197,19 @@ class ClaudeService(ModelService):
 
             # Enviar solicitud
             try:
-                response = requests.post(
-                    self.api_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
+                with remote_call('claude'):
+                    response = requests.post(
+                        self.api_url,
+                        headers=headers,
+                        json=payload,
+                        timeout=30
+                    )
 
                 logger.info(f"Respuesta de Claude API. Status: {response.status_code}")
 
                 # Si hay error, devolver un resultado de fallback
                 if response.status_code != 200:
+                    REMOTE_BACKEND_ERRORS.labels('claude').inc()
                     error_info = str(response.text)
                     logger.error(f"Error en API de Claude: {response.status_code}, Respuesta: {error_info}")
 
@@ -312,6 +317,7 @@ class ClaudeService(ModelService):
             'is_fallback': True
         }
 
+    @timed('postprocess')
     def _parse_food_classification(self, response_text: str, img_width: int, img_height: int) -> Dict[str, Any]:
         """
         Parsea la respuesta de Claude para extraer la información estructurada
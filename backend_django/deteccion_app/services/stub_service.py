@@ -0,0 +1,62 @@
+import random
+import time
+from typing import Dict, Any
+
+from PIL import Image
+
+from .model_service import ModelService
+from .timing import stage
+
+# Clases que devuelve el detector de prueba si no se le pasan otras
+STUB_CLASSES = ('Agua', 'Arroz', 'Frijoles', 'Aceite', 'Azucar', 'Pasta', 'Leche', 'Sardinas')
+
+
+class StubDetectorService(ModelService):
+    """
+    Detector falso para las pruebas de carga (DETECTION_STUB_MODEL). No carga
+    ningún modelo: espera `latency` segundos, como haría la inferencia, y
+    devuelve entre 1 y max_detections cajas al azar en el formato de YOLO.
+    """
+
+    def __init__(self, tipo_modelo='yolo', latency=0.0, classes=STUB_CLASSES, max_detections=20):
+        self.tipo_modelo = tipo_modelo
+        self.latency = latency
+        self.classes = list(classes)
+        self.max_detections = max_detections
+
+    def load_model(self) -> None:
+        pass
+
+    def process_image(self, image: Image.Image) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+
+        with stage('postprocess'):
+            width, height = image.size
+            detections = []
+            for _ in range(random.randint(1, self.max_detections)):
+                x1, y1 = random.uniform(0, width * 0.8), random.uniform(0, height * 0.8)
+                detections.append({
+                    'class': random.choice(self.classes),
+                    'confidence': round(random.uniform(0.3, 0.99), 3),
+                    'bbox': {
+                        'x1': x1,
+                        'y1': y1,
+                        'x2': min(width, x1 + random.uniform(10, width * 0.2)),
+                        'y2': min(height, y1 + random.uniform(10, height * 0.2)),
+                    }
+                })
+
+        return {
+            'detections': detections,
+            'count': len(detections),
+            'model_type': self.tipo_modelo,
+        }
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            'type': 'stub',
+            'emulates': self.tipo_modelo,
+            'latency': self.latency,
+            'classes': self.classes,
+        }
@@ -0,0 +1,72 @@
+"""
+Tiempos por etapa del análisis de imágenes.
+
+El view activa un StageTimer y cada etapa se mide con `stage(nombre)`, que
+no hace nada si no hay un timer activo. Las etapas anidadas se descuentan
+de la etapa que las contiene, así 'inference' no incluye el 'postprocess'
+que el servicio del modelo mide dentro de process_image.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+ANALYZE_STAGES = (
+    'decode', 'exif', 'resize', 'model_acquire', 'inference', 'postprocess', 'db_write', 'storage_upload',
+)
+
+_current_timer = ContextVar('stage_timer', default=None)
+
+
+class StageTimer:
+    """Acumula segundos por etapa, sin contar las etapas anidadas"""
+
+    def __init__(self):
+        self.timings = {}
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        frame = [0.0]  # tiempo de las etapas hijas
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - frame[0]
+            if self._stack:
+                self._stack[-1][0] += elapsed
+
+    @contextmanager
+    def activate(self):
+        token = _current_timer.set(self)
+        try:
+            yield self
+        finally:
+            _current_timer.reset(token)
+
+    def total(self, *names):
+        return sum(self.timings.get(name, 0.0) for name in names or self.timings)
+
+
+@contextmanager
+def stage(name):
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def timed(name):
+    """Decorador para medir una función como la etapa name"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -6,7 +6,9 @@ from typing import Dict, Any, List, Optional
 import logging
 from django.conf import settings
 
+from ..metrics import MODEL_LOADS
 from .model_service import ModelService
+from .timing import timed
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +53,10 @@ class YOLOService(ModelService):
         """
         Carga el modelo YOLO en memoria
         """
+        self._load_weights()
+        MODEL_LOADS.labels('yolo').inc()
+
+    def _load_weights(self) -> None:
         try:
             # Si ocurrió algún problema con CUDA anteriormente, asegurar uso de CPU
             if self.device.type == 'cuda':
@@ -216,6 +222,7 @@ class YOLOService(ModelService):
                     self.device = original_device  # Restaurar dispositivo original
 
             raise RuntimeError(f"Error al procesar la imagen: {str(e)}")
+    @timed('postprocess')
     def _process_results(self, results) -> Dict[str, Any]:
         """
         Procesa los resultados del modelo en un formato estandarizado
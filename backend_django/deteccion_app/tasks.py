@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .services.box_export import export_boxes
+
+
+@shared_task(soft_time_limit=55 * 60, time_limit=60 * 60)
+def export_detection_boxes():
+    """Export incremental de cajas a Parquet, ver services/box_export.py"""
+    return export_boxes()
@@ -1,3 +1,242 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from backend_django.users.tests.factories import UserFactory
+from center.models import Center
+
+from core.renderers import ORJSONRenderer, RawJSON
+from deteccion_app.api.serializers import DeteccionSerializer
+from deteccion_app.models import Deteccion, count_classes
+from deteccion_app.services.box_export import export_boxes, iter_boxes, pq
+from deteccion_app.services.timing import ANALYZE_STAGES, StageTimer, stage, timed
+
+
+class ClassCountTests(TestCase):
+    def test_count_classes_formats(self):
+        self.assertEqual(count_classes({'detections': [
+            {'class': 'agua', 'confidence': 0.9},
+            {'class': 'agua', 'confidence': 0.5},
+            {'class': 'arroz', 'confidence': 0.3},
+            {'class': '', 'confidence': 0.9},
+        ]}), {'agua': 2})
+        self.assertEqual(count_classes({'categories': {'agua': 3, '': 1}}), {'agua': 3})
+        self.assertEqual(count_classes({'agua': {'count': 2}, 'arroz': 4, 'modelo': 'yolo'}), {'agua': 2, 'arroz': 4})
+
+    def test_count_classes_skips_malformed_entries(self):
+        self.assertEqual(count_classes({'detections': [
+            {'class': 'agua', 'confidence': None},
+            {'class': 'agua', 'confidence': '0.9'},
+            {'class': None, 'confidence': 0.9},
+            'agua',
+            {'class': 'arroz', 'confidence': 0.9},
+        ]}), {'arroz': 1})
+        self.assertEqual(count_classes({'detections': None}), {})
+        self.assertEqual(count_classes({'categories': {'agua': '3', 'arroz': 2.0, 'pasta': -1, 'sal': 1.5, 'te': True}}),
+                         {'arroz': 2})
+        self.assertEqual(count_classes({'categories': ['agua']}), {})
+        self.assertEqual(count_classes({'agua': {'count': 'x'}, 'arroz': {'count': 2}}), {'arroz': 2})
+
+    def test_counts_follow_saved_resultados(self):
+        deteccion = Deteccion(tipo_modelo='yolo')
+        deteccion.set_resultados({'detections': [{'class': 'agua', 'confidence': 0.8}] * 3})
+        deteccion.save()
+        self.assertEqual(dict(deteccion.class_counts.values_list('class_name', 'count')), {'agua': 3})
+
+        # Confirmar con resultados modificados reemplaza los conteos
+        deteccion.set_resultados({'categories': {'arroz': 5}})
+        deteccion.save()
+        self.assertEqual(dict(deteccion.class_counts.values_list('class_name', 'count')), {'arroz': 5})
+
+        # Guardar otros campos no toca los conteos
+        deteccion.confirmed = True
+        deteccion.save(update_fields=['confirmed'])
+        self.assertEqual(deteccion.class_counts.count(), 1)
+
+
+class ResultadosFieldTests(TestCase):
+    def setUp(self):
+        self.deteccion = Deteccion(tipo_modelo='yolo')
+        self.deteccion.set_resultados({'detections': [{'class': 'agua', 'confidence': 0.8}]})
+        self.deteccion.save()
+
+    def _serialize(self, renderer):
+        request = SimpleNamespace(accepted_renderer=renderer)
+        return DeteccionSerializer([self.deteccion], many=True, context={'request': request}).data
+
+    def test_orjson_renderer_splices_stored_json(self):
+        renderer = ORJSONRenderer()
+        data = self._serialize(renderer)
+        self.assertIsInstance(data[0]['resultados'], RawJSON)
+
+        rendered = renderer.render(data)
+        self.assertIn(b'"resultados":' + self.deteccion.resultados_json.encode(), rendered)
+        self.assertEqual(json.loads(rendered)[0]['resultados'], self.deteccion.get_resultados())
+
+    def test_other_renderers_get_a_dict(self):
+        data = self._serialize(JSONRenderer())
+        self.assertEqual(data[0]['resultados'], self.deteccion.get_resultados())
+
+        self.deteccion.resultados_json = 'no es json'
+        self.assertEqual(DeteccionSerializer(self.deteccion).data['resultados'], {})
+
+    def test_migration_replaces_invalid_stored_json(self):
+        migration = import_module('deteccion_app.migrations.0010_deteccion_resultados_json_valid')
+        broken = Deteccion.objects.create(tipo_modelo='yolo', resultados_json='{"detections": [')
+        empty = Deteccion.objects.create(tipo_modelo='yolo', resultados_json='')
+
+        migration.replace_invalid_resultados(apps, None)
+
+        self.assertEqual(
+            dict(Deteccion.objects.values_list('id', 'resultados_json')),
+            {self.deteccion.id: self.deteccion.resultados_json, broken.id: '{}', empty.id: '{}'}
+        )
+        rendered = ORJSONRenderer().render(DeteccionSerializer(
+            Deteccion.objects.order_by('fecha_creacion'), many=True,
+            context={'request': SimpleNamespace(accepted_renderer=ORJSONRenderer())}
+        ).data)
+        self.assertEqual([row['resultados'] for row in json.loads(rendered)][1:], [{}, {}])
+
+
+class DeteccionExportTests(TestCase):
+    def test_ndjson_keeps_stored_resultados(self):
+        center = Center.objects.create(name='Centro', address='Calle 1')
+        deteccion = Deteccion(tipo_modelo='yolo', center=center)
+        deteccion.set_resultados({'detections': [{'class': 'agua', 'confidence': 0.8}]})
+        deteccion.save()
+        Deteccion.objects.create(tipo_modelo='yolo', resultados_json='{}')
+        empty = Deteccion.objects.create(tipo_modelo='yolo', center=center, resultados_json='')
+
+        client = APIClient()
+        client.force_authenticate(UserFactory(is_superuser=True))
+        response = client.get(f'/api/export/detecciones/?center_id={center.id}', HTTP_ACCEPT='application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+
+        self.assertEqual(len(lines), 2)
+        rows = {row['id']: row for row in map(json.loads, lines)}
+        self.assertEqual(rows[str(empty.id)]['resultados'], {})
+        line = next(line for line in lines if str(deteccion.id).encode() in line)
+        self.assertIn(b'"resultados":' + deteccion.resultados_json.encode(), line)
+
+
+@skipIf(pq is None, 'pyarrow not installed')
+class BoxExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def _deteccion(self, *boxes):
+        deteccion = Deteccion(tipo_modelo='yolo', center=self.center)
+        deteccion.set_resultados({'detections': list(boxes)})
+        deteccion.save()
+        return deteccion
+
+    def test_iter_boxes_formats(self):
+        self.assertEqual(list(iter_boxes({'detections': [
+            {'class': 'agua', 'confidence': 0.9, 'bbox': {'x1': 1, 'y1': 2, 'x2': 3, 'y2': 4}},
+            {'class': 'arroz', 'confidence': '0.5', 'bbox': [5, 6, 7, 8]},
+            {'class': 'leche'},
+        ]})), [
+            ('agua', 0.9, 1.0, 2.0, 3.0, 4.0),
+            ('arroz', 0.5, 5.0, 6.0, 7.0, 8.0),
+            ('leche', None, None, None, None, None),
+        ])
+        self.assertEqual(list(iter_boxes({'categories': {'agua': 3}})), [])
+
+    def test_incremental_export(self):
+        box = {'class': 'agua', 'confidence': 0.9, 'bbox': {'x1': 1, 'y1': 2, 'x2': 3, 'y2': 4}}
+        first = self._deteccion(box, box)
+        self._deteccion(box)
+        self._deteccion()
+
+        stats = export_boxes(self.root, rows_per_file=2)
+        self.assertEqual(stats, {'detections': 3, 'boxes': 3, 'files': 2})
+
+        # Nothing new, nothing written
+        self.assertEqual(export_boxes(self.root)['detections'], 0)
+
+        self._deteccion({'class': 'arroz', 'confidence': 0.7, 'bbox': [0, 0, 1, 1]})
+        self.assertEqual(export_boxes(self.root), {'detections': 1, 'boxes': 1, 'files': 1})
+
+        table = pq.read_table(self.root).to_pydict()
+        self.assertEqual(sorted(table['class']), ['agua', 'agua', 'agua', 'arroz'])
+        self.assertEqual(table['detection_id'].count(str(first.id)), 2)
+        self.assertEqual(set(table['center_id']), {self.center.id})
+        self.assertEqual(set(table['date']), {first.fecha_creacion.date().isoformat()})
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(UserFactory(is_staff=True))
+        with override_settings(DETECTION_BOXES_EXPORT_ROOT=self.root):
+            self.assertEqual(client.get('/api/export/detecciones/boxes/').data, {'last_exported': None})
+            with mock.patch('deteccion_app.api.exports.export_detection_boxes.delay') as delay:
+                delay.return_value.id = 'task-1'
+                response = client.post('/api/export/detecciones/boxes/')
+        self.assertEqual((response.status_code, response.data), (202, {'task_id': 'task-1'}))
+
+        client.force_authenticate(UserFactory())
+        self.assertEqual(client.post('/api/export/detecciones/boxes/').status_code, 403)
+
+
+class _FakeService:
+    def load_model(self):
+        pass
+
+    def process_image(self, image):
+        return self._postprocess(image)
+
+    @timed('postprocess')
+    def _postprocess(self, image):
+        return {'detections': [{'class': 'agua', 'confidence': 0.9, 'bbox': [0, 0, 1, 1]}]}
+
+
+class StageTimingTests(TestCase):
+    def test_nested_stages_are_exclusive(self):
+        timer = StageTimer()
+        clock = iter([0.0, 1.0, 3.0, 10.0])
+        with mock.patch('deteccion_app.services.timing.time.perf_counter', lambda: next(clock)):
+            with timer.activate():
+                with stage('inference'):
+                    with stage('postprocess'):
+                        pass
+        self.assertEqual(timer.timings, {'postprocess': 2.0, 'inference': 8.0})
+        # Sin timer activo no se mide nada
+        with stage('inference'):
+            pass
+
+    def test_analizar_returns_and_stores_timings(self):
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (40, 30)).save(buffer, format='PNG')
+        upload = SimpleUploadedFile('foto.png', buffer.getvalue(), content_type='image/png')
+        center = Center.objects.create(name='Centro', address='Calle 1')
+
+        client = APIClient()
+        client.force_authenticate(UserFactory())
+        with mock.patch('deteccion_app.views.YOLOService', _FakeService):
+            response = client.post('/api/detecciones/analizar/', {
+                'imagen': upload, 'tipo_modelo': 'yolo', 'guardar_imagen': False, 'center_id': center.id,
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        timings = response.data['timings']
+        self.assertEqual(set(timings), set(ANALYZE_STAGES))
+        self.assertGreater(timings['decode'], 0)
+        self.assertGreater(timings['db_write'], 0)
+
+        deteccion = Deteccion.objects.get(id=response.data['deteccion_id'])
+        self.assertIsNotNone(deteccion.tiempo_postprocess)
+        self.assertAlmostEqual(deteccion.tiempo_procesamiento, deteccion.tiempo_inference + deteccion.tiempo_postprocess)
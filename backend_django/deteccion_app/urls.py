@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .api.exports import BoxExportView, DeteccionExportView
 from .views import DeteccionViewSet
 
 router = DefaultRouter()
 router.register(r'detecciones', DeteccionViewSet, basename='deteccion')
 
 urlpatterns = [
+    path('api/export/detecciones/', DeteccionExportView.as_view(), name='export-detecciones'),
+    path('api/export/detecciones/boxes/', BoxExportView.as_view(), name='export-detection-boxes'),
     path('api/', include(router.urls)),
 ]
@@ -1,13 +1,18 @@
 import time
+from django.conf import settings
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from .metrics import ANALYZE_STAGE_SECONDS, INFERENCES_IN_PROGRESS
 from .models import Deteccion
 from .api.serializers import DeteccionSerializer, ImagenUploadSerializer, ConfirmAnalysisSerializer
 from .services.Robo_Services import RoboflowService
 from .services.yolo_service import YOLOService
 from .services.c_service import ClaudeService
+from .services.stub_service import StubDetectorService
+from .services.timing import ANALYZE_STAGES, StageTimer, stage
+from inventory.api.caching import conditional_center_response
 
 from PIL import Image, ImageOps, ExifTags
 import logging
@@ -15,6 +20,22 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def get_model_service(tipo_modelo):
+    """
+    Servicio del modelo pedido, None si no existe. Con DETECTION_STUB_MODEL
+    (pruebas de carga) siempre es el detector falso.
+    """
+    if getattr(settings, 'DETECTION_STUB_MODEL', False):
+        return StubDetectorService(tipo_modelo, latency=getattr(settings, 'DETECTION_STUB_LATENCY', 0))
+    if tipo_modelo == 'yolo':
+        return YOLOService()
+    if tipo_modelo == 'cl':
+        return ClaudeService()
+    if tipo_modelo == 'rf_detr':
+        return RoboflowService()
+    return None
+
+
 def fix_image_orientation(img):
     """
     Corrige la orientación de la imagen basándose en los datos EXIF
@@ -82,20 +103,25 @@ def fix_image_orientation(img):
 
 
 def prepare_image_for_model(img_file):
-    img = Image.open(img_file)
-
-    # Convertir a RGB si hace falta
-    if img.mode == 'RGBA':
-        bg = Image.new('RGB', img.size, (255,255,255))
-        bg.paste(img, mask=img.split()[3])
-        img = bg
-    elif img.mode != 'RGB':
-        img = img.convert('RGB')
-
-    img = fix_image_orientation(img)
+    with stage('decode'):
+        img = Image.open(img_file)
+        # Image.open solo lee la cabecera, decodificar aquí para medirlo
+        img.load()
+
+        # Convertir a RGB si hace falta
+        if img.mode == 'RGBA':
+            bg = Image.new('RGB', img.size, (255,255,255))
+            bg.paste(img, mask=img.split()[3])
+            img = bg
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+    with stage('exif'):
+        img = fix_image_orientation(img)
 
     # **Stretch** a 720×720 px (distorsión intencionada)
-    img = img.resize((870, 870), Image.LANCZOS)
+    with stage('resize'):
+        img = img.resize((870, 870), Image.LANCZOS)
 
     logger.info(f"Imagen preparada ESTIRADA: {img.size[0]}x{img.size[1]}, modo: {img.mode}")
     return img
@@ -106,12 +132,17 @@ class DeteccionViewSet(viewsets.ReadOnlyModelViewSet):
 
     queryset = Deteccion.objects.all()
     serializer_class = DeteccionSerializer
+    cursor_ordering_field = 'fecha_creacion'
 
     @action(detail=False, methods=['post'], url_path='analizar')
     def analizar_imagen(self, request):
         """
         Analiza una imagen usando el modelo seleccionado
         """
+        with StageTimer().activate() as timer:
+            return self._analizar_imagen(request, timer)
+
+    def _analizar_imagen(self, request, timer):
         print("Request recibido:", request.data)
         serializer = ImagenUploadSerializer(data=request.data)
 
@@ -137,28 +168,25 @@ class DeteccionViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if tipo_modelo == 'yolo':
-            modelo_service = YOLOService()
-        elif tipo_modelo == 'cl':
-            modelo_service = ClaudeService()
-        elif tipo_modelo == 'rf_detr':
-            modelo_service = RoboflowService()
-            resultados_rf = modelo_service.process_image(imagen_pil)
-            if resultados_rf.get('output_image'):
+        with stage('model_acquire'):
+            modelo_service = get_model_service(tipo_modelo)
 
-                imagen_file = resultados_rf['output_image']
-                # print("Imagen procesada:", imagen_file)
-        else:
+        if modelo_service is None:
             return Response(
                 {'error': f'Tipo de modelo no soportado: {tipo_modelo}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         try:
-            start_time = time.time()
-            modelo_service.load_model()
-            resultados = modelo_service.process_image(imagen_pil)
-            tiempo_procesamiento = time.time() - start_time
+            with stage('model_acquire'):
+                modelo_service.load_model()
+            with stage('inference'), INFERENCES_IN_PROGRESS.labels(tipo_modelo).track_inprogress():
+                resultados = modelo_service.process_image(imagen_pil)
+            # Solo el modelo, sin la carga ni la preparación de la imagen
+            tiempo_procesamiento = timer.total('inference', 'postprocess')
+
+            if tipo_modelo == 'rf_detr' and resultados.get('output_image'):
+                imagen_file = resultados['output_image']
 
             detections_count = len(resultados.get('detections', []))
             logger.info(f"Detecciones encontradas: {detections_count}")
@@ -171,38 +199,39 @@ class DeteccionViewSet(viewsets.ReadOnlyModelViewSet):
             from center.models import Center
             from django.utils import timezone
 
-            center_instance = None
-            center_count = Center.objects.count()
-            logger.info(f"Número de centros disponibles: {center_count}")
-
-            if center_id:
-                try:
-                    center_instance = Center.objects.get(id=center_id)
-                    logger.info(f"Centro encontrado con ID: {center_id}")
-                except Center.DoesNotExist:
-                    logger.warning(f"Centro con ID {center_id} no encontrado")
+            with stage('db_write'):
+                center_instance = None
+                center_count = Center.objects.count()
+                logger.info(f"Número de centros disponibles: {center_count}")
 
-            if not center_instance:
-                center_instance = Center.objects.first()
+                if center_id:
+                    try:
+                        center_instance = Center.objects.get(id=center_id)
+                        logger.info(f"Centro encontrado con ID: {center_id}")
+                    except Center.DoesNotExist:
+                        logger.warning(f"Centro con ID {center_id} no encontrado")
 
-                # Si no hay centros, crear uno por defecto
                 if not center_instance:
-                    logger.info("Creando nuevo centro por defecto")
-                    center_instance = Center.objects.create(
-                        name="Centro de Acopio Automático",
-                        address="Dirección por defecto"
-                    )
-                    logger.info(f"Centro creado automáticamente con ID: {center_instance.id}")
-
-            deteccion = Deteccion(
-                tipo_modelo=tipo_modelo,
-                tiempo_procesamiento=tiempo_procesamiento,
-                center=center_instance,
-                confirmed=False  # Inicialmente no está confirmado
-            )
+                    center_instance = Center.objects.first()
+
+                    # Si no hay centros, crear uno por defecto
+                    if not center_instance:
+                        logger.info("Creando nuevo centro por defecto")
+                        center_instance = Center.objects.create(
+                            name="Centro de Acopio Automático",
+                            address="Dirección por defecto"
+                        )
+                        logger.info(f"Centro creado automáticamente con ID: {center_instance.id}")
+
+                deteccion = Deteccion(
+                    tipo_modelo=tipo_modelo,
+                    tiempo_procesamiento=tiempo_procesamiento,
+                    center=center_instance,
+                    confirmed=False  # Inicialmente no está confirmado
+                )
 
-            deteccion.set_resultados(resultados)
-            deteccion.save()
+                deteccion.set_resultados(resultados)
+                deteccion.save()
 
             imagen_guardada = None
 
@@ -222,19 +251,35 @@ class DeteccionViewSet(viewsets.ReadOnlyModelViewSet):
                         metadata=metadata
                     )
 
-                    imagen_guardada.save()
+                    # Subir el archivo antes del save() para medirlo aparte del INSERT
+                    with stage('storage_upload'):
+                        if hasattr(imagen_file, 'chunks'):
+                            imagen_guardada.file.save(imagen_file.name, imagen_file, save=False)
+                    with stage('db_write'):
+                        imagen_guardada.save()
                     logger.info(f"Imagen guardada exitosamente en modelo Image con ID: {imagen_guardada.id}")
 
                     # Actualizar la referencia a la imagen en la detección
                     deteccion.image = imagen_guardada
-                    deteccion.save(update_fields=['image'])
 
                 except Exception as img_error:
+                    imagen_guardada = None
                     logger.error(f"Error al guardar en el modelo Image: {str(img_error)}", exc_info=True)
 
+            # Un solo UPDATE con la imagen y los tiempos, su propio tiempo no se cuenta
+            update_fields = deteccion.set_timings(timer.timings)
+            if imagen_guardada:
+                update_fields.append('image')
+            deteccion.save(update_fields=update_fields)
+
+            timings = {name: round(timer.timings.get(name, 0.0), 4) for name in ANALYZE_STAGES}
+            for name, seconds in timings.items():
+                ANALYZE_STAGE_SECONDS.labels(tipo_modelo, name).observe(seconds)
+
             response_data = {
                 'deteccion_id': deteccion.id,
                 'tiempo_procesamiento': tiempo_procesamiento,
+                'timings': timings,
                 'resultados': resultados,
                 'confirmed': deteccion.confirmed,
             }
@@ -284,7 +329,7 @@ class DeteccionViewSet(viewsets.ReadOnlyModelViewSet):
             imagen_file = serializer.validated_data.get('imagen', None)
             imagen_pil = prepare_image_for_model(imagen_file)
 
-            modelo_service = RoboflowService()
+            modelo_service = get_model_service('rf_detr')
             resultados_rf = modelo_service.process_image(imagen_pil)
 
             center_id = serializer.validated_data.get('center_id', None)
@@ -386,6 +431,7 @@ class DeteccionViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
     @action(detail=False, methods=['get'], url_path='by-center')
+    @conditional_center_response('detections')
     def detecciones_by_center(self, request):
         """
         Obtiene las detecciones de un centro específico
@@ -398,10 +444,11 @@ class DeteccionViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Fuera del try: un cursor inválido tiene que llegar como 404, no como 500
+        detecciones = self.paginate_queryset(Deteccion.objects.filter(center_id=center_id))
         try:
-            detecciones = Deteccion.objects.filter(center_id=center_id)
             serializer = self.get_serializer(detecciones, many=True)
-            return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             logger.error(f"Error al obtener detecciones por centro: {str(e)}", exc_info=True)
             return Response(
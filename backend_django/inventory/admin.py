@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     InventorySnapshot, ProductCategory, InventoryItem, InventoryReport,
     ProductRecommendation, AnalyticsReport, CategoryConsumptionTotal,
-    ConsumptionDataPoint
+    ConsumptionDataPoint, CenterCategoryState
 )
 
 class InventoryItemInline(admin.TabularInline):
@@ -23,6 +23,13 @@ class ProductCategoryAdmin(admin.ModelAdmin):
     list_filter = ('emergency_priority', 'created_at')
     search_fields = ('name', 'description')
 
+@admin.register(CenterCategoryState)
+class CenterCategoryStateAdmin(admin.ModelAdmin):
+    list_display = ('category', 'center', 'current_count', 'ideal_count', 'status', 'last_updated')
+    list_filter = ('center', 'status')
+    search_fields = ('category__name', 'center__name')
+    readonly_fields = ('last_snapshot', 'updated_at')
+
 class ProductRecommendationInline(admin.TabularInline):
     model = ProductRecommendation
     extra = 1
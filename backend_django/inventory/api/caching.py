@@ -0,0 +1,69 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from core.metrics import cache_lookup
+
+from ..services.versions import center_versions
+
+
+def center_response_etag(request, versions):
+    """ETag of a center scoped GET, changes whenever the center or the categories do"""
+    center_version, categories_version, _ = versions
+    query = sorted(request.query_params.lists())
+    raw = f'{request.path}|{query}|{request.user.pk}|{center_version}|{categories_version}'
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def conditional_center_response(scope='inventory'):
+    """
+    Conditional GET for actions scoped by ?center_id=, keyed on the center's
+    version counter for the given scope.
+
+    Answers 304 from the version counters alone, without touching the
+    database, and adds ETag/Last-Modified to fresh responses. When
+    INVENTORY_RESPONSE_CACHE_TIMEOUT is set, the response data is also kept
+    in the cache under its ETag, so it never needs explicit invalidation.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            center_id = request.query_params.get('center_id')
+            if request.method not in ('GET', 'HEAD') or not center_id:
+                return view_method(self, request, *args, **kwargs)
+
+            versions = center_versions(center_id, scope)
+            etag = quote_etag(center_response_etag(request, versions))
+            last_modified = int(versions[2]) if versions[2] is not None else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            cache_lookup(f'etag:{scope}', response is not None)
+            if response is None:
+                timeout = getattr(settings, 'INVENTORY_RESPONSE_CACHE_TIMEOUT', 0)
+                cache_key = f'response:{scope}:{etag}'
+                data = cache.get(cache_key) if timeout else None
+                if timeout:
+                    cache_lookup(f'response:{scope}', data is not None)
+                if data is not None:
+                    response = Response(data)
+                else:
+                    response = view_method(self, request, *args, **kwargs)
+                    if timeout and response.status_code == 200:
+                        cache.set(cache_key, response.data, timeout)
+
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+                # Clients may keep the response but have to revalidate it every time
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
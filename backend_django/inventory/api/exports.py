@@ -0,0 +1,43 @@
+from django.db.models import F
+
+from core.exports import StreamingExportView
+from ..models import InventoryItem, ProductRecommendation
+
+
+class SnapshotItemExportView(StreamingExportView):
+    """Items de las instantáneas, una fila por item"""
+    columns = ('snapshot_id', 'snapshot_name', 'center_id', 'created_at', 'category_name', 'count')
+    time_field = 'snapshot__created_at'
+    center_field = 'snapshot__center'
+    filename = 'snapshots'
+    queryset = InventoryItem.objects.values(
+        'snapshot_id', 'count',
+        snapshot_name=F('snapshot__name'),
+        center_id=F('snapshot__center_id'),
+        created_at=F('snapshot__created_at'),
+        category_name=F('category__name'),
+    )
+
+
+class RecommendationExportView(StreamingExportView):
+    """Recomendaciones de los informes de inventario, una fila por categoría"""
+    columns = (
+        'report_id', 'report_name', 'center_id', 'created_at', 'is_emergency', 'category_name',
+        'current_count', 'ideal_count', 'replenish_amount', 'priority', 'note',
+    )
+    time_field = 'report__created_at'
+    center_field = 'report__center'
+    filename = 'recommendations'
+    queryset = ProductRecommendation.objects.values(
+        'report_id', 'current_count', 'ideal_count', 'priority', 'note',
+        report_name=F('report__name'),
+        center_id=F('report__center_id'),
+        created_at=F('report__created_at'),
+        is_emergency=F('report__is_emergency'),
+        category_name=F('category__name'),
+    )
+
+    def get_rows(self, rows):
+        for row in rows:
+            row['replenish_amount'] = max(0, row['ideal_count'] - row['current_count'])
+            yield row
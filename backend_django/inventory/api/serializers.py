@@ -1,15 +1,42 @@
 import logging
+from django.db import transaction
+from django.db.models import Sum
 from rest_framework import serializers
 from ..models import (
     InventorySnapshot, ProductCategory, InventoryItem, InventoryReport,
     ProductRecommendation, AnalyticsReport, CategoryConsumptionTotal,
     ConsumptionDataPoint
 )
+from ..services.categories import get_or_create_categories
+from ..services.category_stats import invalidate_category_stats
+from ..services.rollup import apply_snapshot
+from ..services.versions import bump_for_instances
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
 
+def requested_fields(request):
+    """Set of field names asked for with ?fields=a,b, or None for all of them"""
+    if request is None:
+        return None
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Only serializes the fields listed in ?fields=, when given"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = requested_fields(self.context.get('request'))
+        if requested:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        return fields
+
+
 class ProductCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductCategory
@@ -51,107 +78,102 @@ class InventorySnapshotSerializer(serializers.ModelSerializer):
         return counts
 
     def create(self, validated_data):
-        # Registro para debug
-        logger.info(f"Creating snapshot with data: {validated_data}")
-
         items_data = validated_data.pop('items', [])
 
         # Extraer product_counts si existe
         product_counts = validated_data.pop('product_counts', {})
-        logger.info(f"Product counts: {product_counts}")
 
         # Extraer source_detections para manejarlos después
         source_detections_ids = validated_data.pop('source_detections', [])
-        logger.info(f"Source detections IDs: {source_detections_ids}")
-
-        # Crear el snapshot sin source_detections primero
-        snapshot = InventorySnapshot.objects.create(**validated_data)
-        logger.info(f"Created snapshot with ID: {snapshot.id}")
-
-        # Ahora manejamos la relación many-to-many correctamente
-        if source_detections_ids:
-            # Importar aquí para evitar importaciones circulares
-            from deteccion_app.models import Deteccion
-
-            # Obtener las detecciones por sus IDs
-            detections = Deteccion.objects.filter(id__in=source_detections_ids)
-            logger.info(f"Found {detections.count()} detections")
-
-            # Usar set() para asignar las detecciones al snapshot
-            snapshot.source_detections.set(detections)
-
-            # Si tenemos detecciones pero no conteos de productos explícitos,
-            # intentamos obtener los conteos desde las detecciones
-            if not product_counts:
-                logger.info("No product counts provided, trying to get from detections")
-                product_counts = self._get_product_counts_from_detections(detections)
-                logger.info(f"Extracted product counts from detections: {product_counts}")
-
-        # Procesar los conteos de productos
-        if product_counts:
-            for category_name, count in product_counts.items():
-                logger.info(f"Creating item for category {category_name} with count {count}")
-                try:
-                    category = ProductCategory.objects.get(name=category_name)
-                    logger.info(f"Found existing category: {category.name}")
-                except ProductCategory.DoesNotExist:
-                    # Crear categoría si no existe
-                    logger.info(f"Creating new category: {category_name}")
-                    category = ProductCategory.objects.create(name=category_name)
-
-                InventoryItem.objects.create(
-                    snapshot=snapshot,
-                    category=category,
-                    count=count
-                )
 
-        # Procesar cualquier dato explícito de items
-        for item_data in items_data:
-            logger.info(f"Creating item from explicit data: {item_data}")
-            InventoryItem.objects.create(snapshot=snapshot, **item_data)
+        with transaction.atomic():
+            # Crear el snapshot sin source_detections primero
+            snapshot = InventorySnapshot.objects.create(**validated_data)
 
+            # Ahora manejamos la relación many-to-many con un solo insert
+            detection_ids = []
+            if source_detections_ids:
+                # Importar aquí para evitar importaciones circulares
+                from deteccion_app.models import Deteccion
+
+                detection_ids = list(
+                    Deteccion.objects.filter(id__in=source_detections_ids).values_list('id', flat=True)
+                )
+                through = InventorySnapshot.source_detections.through
+                through.objects.bulk_create([
+                    through(inventorysnapshot_id=snapshot.id, deteccion_id=detection_id)
+                    for detection_id in detection_ids
+                ])
+
+                # Si tenemos detecciones pero no conteos de productos explícitos,
+                # los sumamos desde los conteos por clase de las detecciones
+                if not product_counts:
+                    product_counts = self._get_product_counts_from_detections(detection_ids)
+
+            # Resolver todas las categorías de una vez, creando las que falten
+            categories = get_or_create_categories(product_counts.keys())
+            items = [
+                InventoryItem(snapshot=snapshot, category=categories[category_name], count=count)
+                for category_name, count in product_counts.items()
+                if category_name in categories
+            ]
+
+            # Procesar cualquier dato explícito de items
+            items.extend(InventoryItem(snapshot=snapshot, **item_data) for item_data in items_data)
+
+            InventoryItem.objects.bulk_create(items)
+
+            # bulk_create no dispara señales, actualizar el estado del centro aquí
+            apply_snapshot(snapshot, items)
+
+        invalidate_category_stats(snapshot.center_id)
+        bump_for_instances(InventoryItem, items)
+        logger.info(
+            f"Created snapshot {snapshot.id} with {len(items)} items "
+            f"from {len(detection_ids)} detections"
+        )
         return snapshot
 
-    def _get_product_counts_from_detections(self, detections):
+    def _get_product_counts_from_detections(self, detection_ids):
         """
-        Extrae conteos de productos desde las detecciones
+        Suma los conteos por clase de las detecciones en una sola consulta
         """
-        product_counts = {}
+        from deteccion_app.models import DeteccionClassCount
 
-        for detection in detections:
-            # Intentar obtener los resultados de la detección
-            try:
-                results = detection.get_resultados()
+        return dict(
+            DeteccionClassCount.objects.filter(deteccion_id__in=detection_ids)
+            .values('class_name')
+            .annotate(total=Sum('count'))
+            .values_list('class_name', 'total')
+        )
 
-                # Diferentes formatos posibles de resultados
-                if 'detections' in results:
-                    # Formato usado por las APIs de detección de objetos
-                    for det in results.get('detections', []):
-                        class_name = det.get('class', '')
-                        confidence = det.get('confidence', 0)
 
-                        # Solo considerar detecciones con confianza suficiente
-                        if confidence >= 0.5 and class_name:
-                            product_counts[class_name] = product_counts.get(class_name, 0) + 1
+class SnapshotItemReadSerializer(serializers.ModelSerializer):
+    category_name = serializers.ReadOnlyField(source='category.name')
+
+    class Meta:
+        model = InventoryItem
+        fields = ['id', 'snapshot', 'category', 'category_name', 'count']
+        read_only_fields = fields
 
-                # Otro formato posible
-                elif 'categories' in results:
-                    for category, count in results.get('categories', {}).items():
-                        if category:
-                            product_counts[category] = product_counts.get(category, 0) + count
 
-                # Algunos sistemas usan un formato diferente
-                elif isinstance(results, dict):
-                    for category, data in results.items():
-                        if isinstance(data, dict) and 'count' in data:
-                            product_counts[category] = product_counts.get(category, 0) + data['count']
-                        elif isinstance(data, int):
-                            product_counts[category] = product_counts.get(category, 0) + data
+class InventorySnapshotReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Read-only snapshot representation for list and by_center. Expects items
+    prefetched with their category, see InventorySnapshotViewSet.get_queryset
+    """
+    items = SnapshotItemReadSerializer(many=True, read_only=True)
+    product_counts = serializers.SerializerMethodField()
 
-            except Exception as e:
-                logger.error(f"Error extracting product counts from detection {detection.id}: {str(e)}")
+    class Meta:
+        model = InventorySnapshot
+        fields = ['id', 'name', 'description', 'center', 'created_at', 'created_by',
+                  'items', 'product_counts']
+        read_only_fields = fields
 
-        return product_counts
+    def get_product_counts(self, obj):
+        """Returns a dictionary of category_name: count"""
+        return {item.category.name: item.count for item in obj.items.all()}
 
 
 class ProductRecommendationSerializer(serializers.ModelSerializer):
@@ -186,8 +208,9 @@ class InventoryReportSerializer(serializers.ModelSerializer):
 
     def get_priority_products(self, obj):
         """Returns recommendations with priority > 3"""
+        # Filtered in memory so prefetched recommendations are reused
         serializer = ProductRecommendationSerializer(
-            obj.recommendations.filter(priority__gt=3),
+            [rec for rec in obj.recommendations.all() if rec.priority > 3],
             many=True
         )
         return serializer.data
@@ -225,7 +248,7 @@ class CategoryConsumptionTotalSerializer(serializers.ModelSerializer):
         return obj.category.name
 
 
-class AnalyticsReportSerializer(serializers.ModelSerializer):
+class AnalyticsReportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     consumption_totals = CategoryConsumptionTotalSerializer(many=True, read_only=True)
     data_points = ConsumptionDataPointSerializer(many=True, read_only=True)
     categories = serializers.SerializerMethodField()
@@ -262,10 +285,12 @@ class AnalyticsReportSerializer(serializers.ModelSerializer):
         """Returns category with the highest movement (can be consumption or increase)"""
         most_movement = obj.get_most_consumed_category()
         if most_movement:
+            # Lists annotate the net movement instead of loading the data points
+            net_movement = getattr(most_movement, 'net_movement', None)
             return {
                 'category': most_movement.category.name,
                 'count': most_movement.count,
-                'is_increase': obj.is_increase(most_movement.category)
+                'is_increase': net_movement > 0 if net_movement is not None else obj.is_increase(most_movement.category)
             }
         return {'category': 'N/A', 'count': 0, 'is_increase': False}
 
@@ -300,6 +325,28 @@ class AnalyticsReportSerializer(serializers.ModelSerializer):
 
 # Serializers for special operations
 
+class CategoryBulkUpdateSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+    ideal_count = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    emergency_priority = serializers.ChoiceField(
+        choices=ProductCategory._meta.get_field('emergency_priority').choices,
+        required=False,
+        allow_null=True
+    )
+
+
+class RecommendationUpdateSerializer(serializers.Serializer):
+    category = serializers.IntegerField()
+    ideal_count = serializers.IntegerField(min_value=0)
+    current_count = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    priority = serializers.ChoiceField(
+        choices=ProductRecommendation._meta.get_field('priority').choices,
+        required=False,
+        allow_null=True
+    )
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+
 class GenerateInventoryReportSerializer(serializers.Serializer):
     snapshot_id = serializers.UUIDField(required=True)
     is_emergency = serializers.BooleanField(required=False, default=False)
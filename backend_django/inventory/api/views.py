@@ -3,7 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-import datetime
+from django.db.models import Case, F, IntegerField, OuterRef, Prefetch, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+import logging
 
 from ..models import (
     InventorySnapshot, ProductCategory, InventoryItem, InventoryReport,
@@ -13,8 +15,17 @@ from ..models import (
 from .serializers import (
     InventorySnapshotSerializer, ProductCategorySerializer, InventoryItemSerializer,
     InventoryReportSerializer, ProductRecommendationSerializer, AnalyticsReportSerializer,
-    GenerateInventoryReportSerializer, GenerateAnalyticsReportSerializer, ConsumptionDataPointSerializer
+    GenerateInventoryReportSerializer, GenerateAnalyticsReportSerializer,
+    ConsumptionDataPointSerializer, CategoryBulkUpdateSerializer, InventorySnapshotReadSerializer,
+    RecommendationUpdateSerializer, requested_fields
 )
+from .caching import conditional_center_response
+from ..services.analytics import generate_analytics_report, snapshots_in_window
+from ..services.categories import bulk_update_categories
+from ..services.category_stats import get_cached_category_stats
+from ..services.reports import apply_recommendation_updates, generate_inventory_report
+
+logger = logging.getLogger(__name__)
 
 class ProductCategoryViewSet(viewsets.ModelViewSet):
     queryset = ProductCategory.objects.all()
@@ -49,6 +60,7 @@ class ProductCategoryViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=False, methods=['GET'])
+    @conditional_center_response()
     def categories_stats(self, request):
         """Get statistics for categories in a center"""
         center_id = request.query_params.get('center_id')
@@ -58,46 +70,7 @@ class ProductCategoryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        categories = self.get_queryset()
-        stats = []
-
-        for category in categories:
-            # Obtener el último snapshot del centro
-            latest_item = InventoryItem.objects.filter(
-                snapshot__center_id=center_id,
-                category=category
-            ).order_by('-snapshot__created_at').first()
-
-            current_count = latest_item.count if latest_item else 0
-            ideal_count = category.ideal_count
-
-            stats.append({
-                'id': category.id,
-                'name': category.name,
-                'current_count': current_count,
-                'ideal_count': ideal_count,
-                'emergency_priority': category.emergency_priority,
-                'status': self._calculate_status(current_count, ideal_count),
-                'last_updated': latest_item.snapshot.created_at if latest_item else None
-            })
-
-        return Response(stats)
-
-    def _calculate_status(self, current_count, ideal_count):
-        """Calculate status based on current and ideal counts"""
-        if ideal_count == 0:
-            return 'unknown'
-
-        percentage = (current_count / ideal_count) * 100
-
-        if percentage <= 25:
-            return 'critical'
-        elif percentage <= 50:
-            return 'low'
-        elif percentage <= 75:
-            return 'moderate'
-        else:
-            return 'good'
+        return Response(get_cached_category_stats(center_id))
 
     def create(self, request, *args, **kwargs):
         """Override create method to handle category creation/reactivation"""
@@ -159,57 +132,38 @@ class ProductCategoryViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['POST'])
     def bulk_update(self, request):
-        """Update multiple category configurations at once"""
-        try:
-            categories_data = request.data
-            print(f"Received categories data: {categories_data}")
-
-            updates = []
-            errors = []
-
-            for category_data in categories_data:
-                try:
-                    name = category_data.get('name')
-                    ideal_count = category_data.get('ideal_count')
-                    emergency_priority = category_data.get('emergency_priority')
-
-                    if not name:
-                        errors.append({'error': 'Missing category name'})
-                        continue
-
-                    # Solo actualizar categorías existentes
-                    try:
-                        category = ProductCategory.objects.get(name=name)
-                        if ideal_count is not None:
-                            category.ideal_count = ideal_count
-                        if emergency_priority is not None:
-                            category.emergency_priority = emergency_priority
-                        category.save()
-                        updates.append(self.get_serializer(category).data)
-                        print(f"Updated category: {name}")
-                    except ProductCategory.DoesNotExist:
-                        print(f"Category not found, skipping: {name}")
-                        continue
-
-                except Exception as e:
-                    print(f"Error updating category {name}: {str(e)}")
-                    errors.append({
-                        'category': name,
-                        'error': str(e)
-                    })
-
-            return Response({
-                'updated': updates,
-                'errors': errors
-            })
-
-        except Exception as e:
-            print(f"Error in bulk_update: {str(e)}")
+        """
+        Update multiple category configurations at once.
+        Pass ?upsert=true to create the categories that don't exist yet.
+        """
+        if not isinstance(request.data, list):
             return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'Expected a list of categories'},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
+        upsert = request.query_params.get('upsert', '').lower() == 'true'
+
+        rows = []
+        errors = []
+        for category_data in request.data:
+            serializer = CategoryBulkUpdateSerializer(data=category_data)
+            if serializer.is_valid():
+                rows.append(serializer.validated_data)
+            else:
+                name = category_data.get('name') if isinstance(category_data, dict) else None
+                errors.append({'category': name, 'error': serializer.errors})
+
+        changed, unchanged, created, missing = bulk_update_categories(rows, upsert=upsert)
+        errors.extend({'category': name, 'error': 'Category not found'} for name in missing)
+
+        return Response({
+            'changed': changed,
+            'unchanged': unchanged,
+            'created': created,
+            'errors': errors
+        })
+
 
 class InventorySnapshotViewSet(viewsets.ModelViewSet):
     """
@@ -222,20 +176,37 @@ class InventorySnapshotViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'name']
     ordering = ['-created_at']
 
+    read_actions = ('list', 'retrieve', 'by_center')
+
     def get_queryset(self):
         """Filter snapshots by center if user is not superuser"""
         user = self.request.user
         if not user.is_superuser:
             # Get centers the user belongs to
             centers = user.centers.all()
-            return InventorySnapshot.objects.filter(center__in=centers)
-        return InventorySnapshot.objects.all()
+            queryset = InventorySnapshot.objects.filter(center__in=centers)
+        else:
+            queryset = InventorySnapshot.objects.all()
+
+        # Items (and their category) in one extra query, skipped when ?fields= leaves them out
+        fields = requested_fields(self.request)
+        if fields is None or fields & {'items', 'product_counts'}:
+            queryset = queryset.prefetch_related(
+                Prefetch('items', queryset=InventoryItem.objects.select_related('category'))
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in self.read_actions:
+            return InventorySnapshotReadSerializer
+        return InventorySnapshotSerializer
 
     def perform_create(self, serializer):
         """Set created_by to current user"""
         serializer.save(created_by=self.request.user)
 
     @action(detail=False, methods=['GET'])
+    @conditional_center_response()
     def by_center(self, request):
         """
         Get snapshots for a specific center
@@ -247,9 +218,9 @@ class InventorySnapshotViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        snapshots = self.get_queryset().filter(center_id=center_id)
+        snapshots = self.paginate_queryset(self.get_queryset().filter(center_id=center_id))
         serializer = self.get_serializer(snapshots, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['GET'])
     def product_counts(self, request, pk=None):
@@ -285,8 +256,14 @@ class InventoryReportViewSet(viewsets.ModelViewSet):
         if not user.is_superuser:
             # Get centers the user belongs to
             centers = user.centers.all()
-            return InventoryReport.objects.filter(center__in=centers)
-        return InventoryReport.objects.all()
+            queryset = InventoryReport.objects.filter(center__in=centers)
+        else:
+            queryset = InventoryReport.objects.all()
+
+        # Every report action reads the recommendations, serialize them from one prefetch
+        return queryset.prefetch_related(
+            Prefetch('recommendations', queryset=ProductRecommendation.objects.select_related('category'))
+        )
 
     def perform_create(self, serializer):
         """Set created_by to current user"""
@@ -304,11 +281,12 @@ class InventoryReportViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        reports = self.get_queryset().filter(center_id=center_id)
+        reports = self.paginate_queryset(self.get_queryset().filter(center_id=center_id))
         serializer = self.get_serializer(reports, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['GET'])
+    @conditional_center_response()
     def latest(self, request):
         """
         Get the latest report for a center
@@ -331,6 +309,7 @@ class InventoryReportViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['GET'])
+    @conditional_center_response()
     def priority_products(self, request):
         """
         Get priority products from the latest report
@@ -349,13 +328,11 @@ class InventoryReportViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get high priority products (priority > 3)
-        high_priority = report.recommendations.filter(priority__gt=3)
-
-        # Format as a dictionary (category_name: recommendation)
+        # Format high priority products (priority > 3) as a dictionary (category_name: recommendation)
         priority_products = {}
-        for rec in high_priority:
-            priority_products[rec.category.name] = ProductRecommendationSerializer(rec).data
+        for rec in report.recommendations.all():
+            if rec.priority > 3:
+                priority_products[rec.category.name] = ProductRecommendationSerializer(rec).data
 
         return Response(priority_products)
 
@@ -381,14 +358,12 @@ class InventoryReportViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Find recommendation for the category
-        try:
-            category_obj = ProductCategory.objects.get(name=category)
-            recommendation = report.recommendations.get(category=category_obj)
-            serializer = ProductRecommendationSerializer(recommendation)
-            return Response([serializer.data])  # Return as a list for compatibility
-        except (ProductCategory.DoesNotExist, ProductRecommendation.DoesNotExist):
-            return Response([])  # Empty list for compatibility
+        # Find recommendation for the category among the prefetched ones
+        for recommendation in report.recommendations.all():
+            if recommendation.category.name == category:
+                serializer = ProductRecommendationSerializer(recommendation)
+                return Response([serializer.data])  # Return as a list for compatibility
+        return Response([])  # Empty list for compatibility
 
     @action(detail=False, methods=['POST'])
     def generate(self, request):
@@ -405,84 +380,14 @@ class InventoryReportViewSet(viewsets.ModelViewSet):
         custom_ideal_counts = serializer.validated_data.get('custom_ideal_counts', {})
 
         try:
-            # Get the snapshot
             snapshot = InventorySnapshot.objects.get(id=snapshot_id)
-
-            # Create a name for the report
-            now = datetime.datetime.now()
-            report_name = f"{'Informe de Emergencia' if is_emergency else 'Informe de Reposicion'} {now.day}/{now.month}/{now.year}"
-
-            # Create the report
-            report = InventoryReport.objects.create(
-                name=report_name,
-                center=snapshot.center,
-                created_by=request.user,
+            report = generate_inventory_report(
+                snapshot,
+                request.user,
                 is_emergency=is_emergency,
-                source_snapshot=snapshot
+                custom_ideal_counts=custom_ideal_counts
             )
 
-            # Get all product categories
-            categories = ProductCategory.objects.filter(is_active=True)
-
-            # Create recommendations for each category
-            for category in categories:
-                # Get current count from snapshot
-                try:
-                    inventory_item = InventoryItem.objects.get(
-                        snapshot=snapshot,
-                        category=category
-                    )
-                    current_count = inventory_item.count
-                except InventoryItem.DoesNotExist:
-                    current_count = 0
-
-                # Get ideal count (custom or default)
-                ideal_count = custom_ideal_counts.get(
-                    category.name,
-                    category.ideal_count
-                )
-
-                # Calculate priority based on percentage missing
-                if is_emergency:
-                    # In emergency, use predefined emergency_priority
-                    priority = category.emergency_priority
-                else:
-                    # Calculate based on percentage missing
-                    if ideal_count <= 0:
-                        percentage_missing = 0
-                    else:
-                        percentage_missing = ((ideal_count - current_count) / ideal_count) * 100
-
-                    if percentage_missing <= 10:
-                        priority = 1  # Very Low
-                    elif percentage_missing <= 30:
-                        priority = 2  # Low
-                    elif percentage_missing <= 50:
-                        priority = 3  # Medium
-                    elif percentage_missing <= 75:
-                        priority = 4  # High
-                    else:
-                        priority = 5  # Very High
-
-                # Create note based on stock level
-                note = ''
-                if current_count <= 0:
-                    note = 'URGENTE: No hay existencias'
-                elif current_count < ideal_count * 0.25:
-                    note = 'Nivel critico de existencias'
-                elif current_count < ideal_count * 0.5:
-                    note = 'Nivel bajo de existencias'
-
-                # Create recommendation
-                ProductRecommendation.objects.create(
-                    report=report,
-                    category=category,
-                    current_count=current_count,
-                    ideal_count=ideal_count,
-                    priority=priority,
-                    note=note
-                )
-
             serializer = InventoryReportSerializer(report)
             return Response(serializer.data)
 
@@ -498,112 +403,25 @@ class InventoryReportViewSet(viewsets.ModelViewSet):
         Actualiza las recomendaciones de un informe existente
         """
         report = self.get_object()
-        recommendations_data = request.data.get('recommendations', [])
+        recommendations_data = request.data.get('recommendations', []) if isinstance(request.data, dict) else None
 
-        if not recommendations_data:
+        if not recommendations_data or not isinstance(recommendations_data, list):
             return Response(
                 {'error': 'No recommendations provided'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        updated_count = 0
+        rows = []
         errors = []
-
         for rec_data in recommendations_data:
-            category_id = rec_data.get('category')
-            if not category_id:
-                errors.append({'error': 'Missing category ID', 'data': rec_data})
-                continue
-
-            ideal_count = rec_data.get('ideal_count')
-            if ideal_count is None:
-                errors.append({'error': 'Missing ideal_count', 'data': rec_data})
-                continue
-
-            # Si se proporciona prioridad, usarla; de lo contrario, calcularla
-            priority = rec_data.get('priority')
-            current_count = rec_data.get('current_count')
-
-            try:
-                # Obtener la categoría
-                category = ProductCategory.objects.get(id=category_id)
-
-                # Buscar la recomendación existente
-                try:
-                    recommendation = ProductRecommendation.objects.get(
-                        report=report,
-                        category=category
-                    )
-
-                    # Actualizar la recomendación
-                    recommendation.ideal_count = ideal_count
-
-                    if priority is not None:
-                        recommendation.priority = priority
-                    elif current_count is not None:
-                        # Calcular la prioridad basada en porcentaje faltante
-                        if ideal_count <= 0:
-                            percentage_missing = 0
-                        else:
-                            percentage_missing = ((ideal_count - current_count) / ideal_count) * 100
-
-                        if percentage_missing <= 10:
-                            recommendation.priority = 1  # Very Low
-                        elif percentage_missing <= 30:
-                            recommendation.priority = 2  # Low
-                        elif percentage_missing <= 50:
-                            recommendation.priority = 3  # Medium
-                        elif percentage_missing <= 75:
-                            recommendation.priority = 4  # High
-                        else:
-                            recommendation.priority = 5  # Very High
-
-                    # Actualizar nota si se proporciona
-                    if 'note' in rec_data:
-                        recommendation.note = rec_data['note']
-
-                    recommendation.save()
-                    updated_count += 1
-
-                except ProductRecommendation.DoesNotExist:
-                    # La recomendación no existe, crear una nueva
-                    if current_count is None:
-                        current_count = 0
-
-                    if priority is None:
-                        # Calcular prioridad por defecto
-                        if ideal_count <= 0:
-                            priority = 1
-                        else:
-                            percentage_missing = ((ideal_count - current_count) / ideal_count) * 100
-
-                            if percentage_missing <= 10:
-                                priority = 1  # Very Low
-                            elif percentage_missing <= 30:
-                                priority = 2  # Low
-                            elif percentage_missing <= 50:
-                                priority = 3  # Medium
-                            elif percentage_missing <= 75:
-                                priority = 4  # High
-                            else:
-                                priority = 5  # Very High
-
-                    note = rec_data.get('note', '')
-
-                    ProductRecommendation.objects.create(
-                        report=report,
-                        category=category,
-                        current_count=current_count,
-                        ideal_count=ideal_count,
-                        priority=priority,
-                        note=note
-                    )
-                    updated_count += 1
+            serializer = RecommendationUpdateSerializer(data=rec_data)
+            if serializer.is_valid():
+                rows.append(serializer.validated_data)
+            else:
+                errors.append({'error': serializer.errors, 'data': rec_data})
 
-            except ProductCategory.DoesNotExist:
-                errors.append({'error': f'Category not found: {category_id}', 'data': rec_data})
-            except Exception as e:
-                errors.append({'error': str(e), 'data': rec_data})
+        updated_count, not_found = apply_recommendation_updates(report, rows)
+        errors.extend(not_found)
 
         return Response({
             'report_id': str(report.id),
@@ -612,6 +430,20 @@ class InventoryReportViewSet(viewsets.ModelViewSet):
         })
 
 
+def _net_movement():
+    """Net movement of a total's category over its report, as AnalyticsReport.is_increase sums it"""
+    points = ConsumptionDataPoint.objects.filter(
+        report=OuterRef('report'), category=OuterRef('category'), note__isnull=False
+    ).exclude(note='').order_by().values('report').annotate(
+        net=Sum(Case(
+            When(note__icontains='aumento', then=F('count')),
+            default=Value(0) - F('count'),
+            output_field=IntegerField(),
+        ))
+    ).values('net')
+    return Coalesce(Subquery(points, output_field=IntegerField()), 0)
+
+
 class AnalyticsReportViewSet(viewsets.ModelViewSet):
     """
     API endpoint for Analytics Reports
@@ -622,6 +454,8 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
     filterset_fields = ['center', 'period_type']
     ordering_fields = ['created_at', 'name']
     ordering = ['-created_at']
+    list_actions = ('list', 'by_center')
+    read_actions = (*list_actions, 'retrieve')
 
     def get_queryset(self):
         """Filter reports by center if user is not superuser"""
@@ -629,8 +463,22 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
         if not user.is_superuser:
             # Get centers the user belongs to
             centers = user.centers.all()
-            return AnalyticsReport.objects.filter(center__in=centers)
-        return AnalyticsReport.objects.all()
+            queryset = AnalyticsReport.objects.filter(center__in=centers)
+        else:
+            queryset = AnalyticsReport.objects.all()
+
+        totals = CategoryConsumptionTotal.objects.select_related('category')
+        fields = requested_fields(self.request)
+        if self.action in self.list_actions and fields is not None and 'data_points' not in fields:
+            # Data points grow with the period, lists that leave them out with
+            # ?fields= only get each total's net movement
+            queryset = queryset.prefetch_related(
+                Prefetch('consumption_totals', queryset=totals.annotate(net_movement=_net_movement()))
+            )
+        elif self.action in self.read_actions:
+            # Totals, categories, most/least and is_increase all come from these two prefetches
+            queryset = queryset.prefetch_related(Prefetch('consumption_totals', queryset=totals), 'data_points')
+        return queryset
 
     def perform_create(self, serializer):
         """Set created_by to current user"""
@@ -648,9 +496,9 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        reports = self.get_queryset().filter(center_id=center_id)
+        reports = self.paginate_queryset(self.get_queryset().filter(center_id=center_id))
         serializer = self.get_serializer(reports, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['GET'])
     def consumption_data(self, request, pk=None):
@@ -658,31 +506,23 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
         Get detailed consumption data for a specific report
         """
         report = self.get_object()
+        data_points = report.data_points.select_related('category').order_by('category__name', 'date')
 
         # Group data by category
         data = {}
-        for category in report.get_analyzed_categories():
-            # Get consumption data points
-            data_points = ConsumptionDataPoint.objects.filter(
-                report=report,
-                category=category
-            ).order_by('date')
-
-            # Serialize data points
-            data[category.name] = ConsumptionDataPointSerializer(data_points, many=True).data
+        for data_point in data_points:
+            data.setdefault(data_point.category.name, []).append(data_point)
 
-        return Response(data)
+        return Response({
+            name: ConsumptionDataPointSerializer(points, many=True).data
+            for name, points in data.items()
+        })
 
     @action(detail=False, methods=['POST'])
     def generate(self, request):
         """
         Generate a new analytics report
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info("Generating analytics report with data: %s", request.data)
-
-
         serializer = GenerateAnalyticsReportSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -695,130 +535,38 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
         selected_categories = serializer.validated_data.get('selected_categories', [])
 
         try:
-            # Get snapshots
-            start_snapshot = InventorySnapshot.objects.get(id=start_snapshot_id)
-            end_snapshot = InventorySnapshot.objects.get(id=end_snapshot_id)
+            # Get both snapshots in one query
+            snapshots = InventorySnapshot.objects.in_bulk([start_snapshot_id, end_snapshot_id])
+            if start_snapshot_id not in snapshots or end_snapshot_id not in snapshots:
+                raise InventorySnapshot.DoesNotExist
 
-            # Check dates
-            start_date = start_snapshot.created_at
-            end_date = end_snapshot.created_at
+            start_snapshot = snapshots[start_snapshot_id]
+            end_snapshot = snapshots[end_snapshot_id]
 
-            if start_date > end_date:
+            if start_snapshot.created_at > end_snapshot.created_at:
                 return Response(
                     {'error': 'Start date must be earlier than end date'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Get or create report name
-            if not report_name:
-                now = datetime.datetime.now()
-                report_name = f"{'Analisis Semanal' if period_type == 'weekly' else 'Analisis Mensual'} {now.day}/{now.month}/{now.year}"
+            # Every snapshot of the center in the period feeds the daily series
+            snapshots = snapshots_in_window(
+                start_snapshot.center_id,
+                start_snapshot.created_at,
+                end_snapshot.created_at
+            )
+            if end_snapshot not in snapshots:
+                snapshots.append(end_snapshot)
 
-            # Create report
-            report = AnalyticsReport.objects.create(
-                name=report_name,
-                center=start_snapshot.center,
-                created_by=request.user,
+            report = generate_analytics_report(
+                snapshots,
+                request.user,
                 period_type=period_type,
-                start_date=start_date,
-                end_date=end_date,
-                start_snapshot=start_snapshot,
-                end_snapshot=end_snapshot,
-                categories_list=",".join(selected_categories) if selected_categories else ""
+                report_name=report_name,
+                selected_categories=selected_categories
             )
 
-            # Get categories to analyze
-            categories_to_analyze = []
-            if selected_categories:
-                # Use selected categories
-                logger.info(f"Using {len(selected_categories)} selected categories")
-                for cat_name in selected_categories:
-                    try:
-                        category = ProductCategory.objects.get(name=cat_name)
-                        categories_to_analyze.append(category)
-                    except ProductCategory.DoesNotExist:
-                        # Create category if it doesn't exist
-                        category = ProductCategory.objects.create(name=cat_name)
-                        categories_to_analyze.append(category)
-            else:
-                # Use all categories from both snapshots
-                start_categories = set(item.category for item in start_snapshot.items.all())
-                end_categories = set(item.category for item in end_snapshot.items.all())
-                categories_to_analyze = list(start_categories.union(end_categories))
-
-            logger.info(f"Categories for analysis: {[c.name for c in categories_to_analyze]}")
-
-            # Calculate movement for each category
-            days = (end_date - start_date).days + 1
-            logger.info(f"Analysis period: {days} days")
-            import random  # For distributing consumption data
-
-            for category in categories_to_analyze:
-                # Get counts from both snapshots
-                try:
-                    start_count = InventoryItem.objects.get(
-                        snapshot=start_snapshot,
-                        category=category
-                    ).count
-                except InventoryItem.DoesNotExist:
-                    start_count = 0
-
-                logger.info(f"Start count for {category.name}: {start_count}")
-
-                try:
-                    end_count = InventoryItem.objects.get(
-                        snapshot=end_snapshot,
-                        category=category
-                    ).count
-                except InventoryItem.DoesNotExist:
-                    end_count = 0
-
-                logger.info(f"End count for {category.name}: {end_count}")
-
-                # Calculate movement (positive means increase, negative means consumption)
-                movement = end_count - start_count
-                is_increase = movement > 0
-
-                # Store absolute value for stats
-                movement_value = abs(movement)
-
-                # Log the type of movement
-                if is_increase:
-                    logger.info(f"Movement for {category.name}: {movement_value} (increase)")
-                else:
-                    logger.info(f"Movement for {category.name}: {movement_value} (consumption)")
-
-                # Skip if there's no movement
-                if movement_value == 0:
-                    continue
-
-                # Create total consumption/increase record
-                CategoryConsumptionTotal.objects.create(
-                    report=report,
-                    category=category,
-                    count=movement_value
-                )
-
-                logger.info(f"Created consumption total for {category.name}: {movement_value}")
-
-                # Generate data points based on period type
-                logger.info(f"Generating daily data points for {category.name}")
-
-                # Create a single data point with the appropriate note
-                note = "Aumento" if is_increase else "Consumo"
-
-                ConsumptionDataPoint.objects.create(
-                    report=report,
-                    category=category,
-                    date=start_date,
-                    count=movement_value,
-                    note=note  # Set the appropriate note based on movement direction
-                )
-
-                logger.info(f"Created data point: {category.name}, date: {start_date}, count: {movement_value}")
-
             serializer = AnalyticsReportSerializer(report)
-            logger.info(f"Report created successfully. Response data: {serializer.data}")
             return Response(serializer.data)
 
         except InventorySnapshot.DoesNotExist:
@@ -827,7 +575,7 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
-            logger.error(f"Error generating report: {str(e)}")
+            logger.error(f"Error generating analytics report: {str(e)}", exc_info=True)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
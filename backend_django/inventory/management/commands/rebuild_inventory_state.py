@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from inventory.services.category_stats import invalidate_all_category_stats
+from inventory.services.rollup import rebuild_states
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-center category state rollup from inventory snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--center', type=int, help="Only rebuild this center")
+
+    def handle(self, *args, **options):
+        count = rebuild_states(center_id=options['center'])
+        invalidate_all_category_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} category states"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.11 on 2026-10-19 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0006_productcategory_is_active"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventorysnapshot",
+            index=models.Index(
+                fields=["center", "-created_at"], name="inventory_i_center__291d45_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 5.0.11 on 2026-10-19 05:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def _status(current_count, ideal_count):
+    if ideal_count == 0:
+        return "unknown"
+    percentage = (current_count / ideal_count) * 100
+    if percentage <= 25:
+        return "critical"
+    elif percentage <= 50:
+        return "low"
+    elif percentage <= 75:
+        return "moderate"
+    return "good"
+
+
+def build_states(apps, schema_editor):
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    CenterCategoryState = apps.get_model("inventory", "CenterCategoryState")
+
+    items = (
+        InventoryItem.objects.select_related("snapshot", "category")
+        .annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=[F("snapshot__center_id"), F("category_id")],
+                order_by=F("snapshot__created_at").desc(),
+            )
+        )
+        .filter(row_number=1)
+    )
+    CenterCategoryState.objects.bulk_create(
+        [
+            CenterCategoryState(
+                center_id=item.snapshot.center_id,
+                category_id=item.category_id,
+                current_count=item.count,
+                ideal_count=item.category.ideal_count,
+                status=_status(item.count, item.category.ideal_count),
+                last_snapshot_id=item.snapshot_id,
+                last_updated=item.snapshot.created_at,
+            )
+            for item in items
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("center", "0002_alter_center_options"),
+        ("inventory", "0007_inventorysnapshot_center_created_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CenterCategoryState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("current_count", models.PositiveIntegerField(default=0)),
+                ("ideal_count", models.PositiveIntegerField(default=0)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("critical", "Critical"),
+                            ("low", "Low"),
+                            ("moderate", "Moderate"),
+                            ("good", "Good"),
+                            ("unknown", "Unknown"),
+                        ],
+                        default="unknown",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "last_updated",
+                    models.DateTimeField(
+                        help_text="Creation date of last_snapshot", null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="center_states",
+                        to="inventory.productcategory",
+                    ),
+                ),
+                (
+                    "center",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="category_states",
+                        to="center.center",
+                    ),
+                ),
+                (
+                    "last_snapshot",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="inventory.inventorysnapshot",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Estado de Categoría por Centro",
+                "verbose_name_plural": "Estados de Categorías por Centro",
+                "unique_together": {("center", "category")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="inventoryreport",
+            index=models.Index(
+                fields=["center", "-created_at"], name="inventory_i_center__2903db_idx"
+            ),
+        ),
+        migrations.RunPython(build_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.11 on 2026-10-19 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0008_centercategorystate"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="analyticsreport",
+            index=models.Index(
+                fields=["center", "-created_at", "-id"], name="inventory_a_center__c70bcc_idx"
+            ),
+        ),
+    ]
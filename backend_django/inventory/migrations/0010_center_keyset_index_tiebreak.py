@@ -0,0 +1,33 @@
+# Generated by Django 5.0.11 on 2026-10-19 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0009_analyticsreport_center_keyset_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="inventoryreport",
+            name="inventory_i_center__2903db_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="inventorysnapshot",
+            name="inventory_i_center__291d45_idx",
+        ),
+        migrations.AddIndex(
+            model_name="inventoryreport",
+            index=models.Index(
+                fields=["center", "-created_at", "-id"], name="inventory_i_center__1b2345_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventorysnapshot",
+            index=models.Index(
+                fields=["center", "-created_at", "-id"], name="inventory_i_center__eb56a2_idx"
+            ),
+        ),
+    ]
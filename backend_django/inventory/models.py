@@ -23,6 +23,9 @@ class InventorySnapshot(models.Model):
         ordering = ['-created_at']
         verbose_name = "Instantánea de Inventario"
         verbose_name_plural = "Instantáneas de Inventario"
+        indexes = [
+            models.Index(fields=['center', '-created_at', '-id'])
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
@@ -62,6 +65,39 @@ class InventoryItem(models.Model):
         return f"{self.category.name}: {self.count} (in {self.snapshot.name})"
 
 
+class CenterCategoryState(models.Model):
+    """Latest inventory state of a category in a center, maintained from snapshots"""
+    STATUS_CHOICES = [
+        ('critical', 'Critical'),
+        ('low', 'Low'),
+        ('moderate', 'Moderate'),
+        ('good', 'Good'),
+        ('unknown', 'Unknown'),
+    ]
+
+    center = models.ForeignKey(Center, on_delete=models.CASCADE, related_name='category_states')
+    category = models.ForeignKey(ProductCategory, on_delete=models.CASCADE, related_name='center_states')
+    current_count = models.PositiveIntegerField(default=0)
+    ideal_count = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='unknown')
+    last_snapshot = models.ForeignKey(
+        InventorySnapshot,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    last_updated = models.DateTimeField(null=True, help_text="Creation date of last_snapshot")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('center', 'category')
+        verbose_name = "Estado de Categoría por Centro"
+        verbose_name_plural = "Estados de Categorías por Centro"
+
+    def __str__(self):
+        return f"{self.category.name} @ {self.center.name}: {self.current_count} ({self.status})"
+
+
 class InventoryReport(models.Model):
     """Model for inventory replenishment reports"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -82,6 +118,9 @@ class InventoryReport(models.Model):
         ordering = ['-created_at']
         verbose_name = "Informe de Inventario"
         verbose_name_plural = "Informes de Inventario"
+        indexes = [
+            models.Index(fields=['center', '-created_at', '-id'])
+        ]
 
     def __str__(self):
         emergency_tag = "[EMERGENCIA] " if self.is_emergency else ""
@@ -154,35 +193,39 @@ class AnalyticsReport(models.Model):
         ordering = ['-created_at']
         verbose_name = "Reporte Analítico"
         verbose_name_plural = "Reportes Analíticos"
+        indexes = [
+            models.Index(fields=['center', '-created_at', '-id'])
+        ]
 
     def is_increase(self, category):
-        """Check if a category's movement represents an increase rather than consumption"""
-        try:
-            data_point = ConsumptionDataPoint.objects.filter(
-                report=self,
-                category=category
-            ).first()
-
-            if data_point and data_point.note:
-                return 'aumento' in data_point.note.lower()
-            return False
-        except:
-            return False
+        """Check if a category's net movement over the period is an increase rather than consumption"""
+        net_movement = 0
+        # Iterates data_points.all() so prefetched data points are reused
+        for data_point in self.data_points.all():
+            if data_point.category_id != category.id or not data_point.note:
+                continue
+            if 'aumento' in data_point.note.lower():
+                net_movement += data_point.count
+            else:
+                net_movement -= data_point.count
+        return net_movement > 0
 
     def __str__(self):
         return f"{self.name} ({self.get_period_type_display()}) - {self.created_at.strftime('%d/%m/%Y')}"
 
     def get_analyzed_categories(self):
         """Get all categories included in this report"""
-        return ProductCategory.objects.filter(consumption_totals__report=self).distinct()
+        # Built from consumption_totals.all() so prefetched totals are reused
+        categories = {total.category_id: total.category for total in self.consumption_totals.all()}
+        return list(categories.values())
 
     def get_most_consumed_category(self):
         """Get the category with highest consumption"""
-        return self.consumption_totals.order_by('-count').first()
+        return max(self.consumption_totals.all(), key=lambda total: total.count, default=None)
 
     def get_least_consumed_category(self):
         """Get the category with lowest consumption"""
-        return self.consumption_totals.order_by('count').first()
+        return min(self.consumption_totals.all(), key=lambda total: total.count, default=None)
 
     def get_days_count(self):
         """Calculate number of days in the analysis period"""
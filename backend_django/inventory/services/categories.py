@@ -0,0 +1,119 @@
+from django.db import transaction
+
+from ..models import ProductCategory
+from .category_stats import invalidate_all_category_stats
+from .rollup import sync_categories
+
+
+def get_or_create_categories(names):
+    """
+    Resolve category names to ProductCategory objects, creating the missing
+    ones with a single bulk insert. Returns a {name: category} dict.
+    """
+    names = {name for name in names if name}
+    categories = {category.name: category for category in ProductCategory.objects.filter(name__in=names)}
+
+    missing = names - categories.keys()
+    if missing:
+        # ignore_conflicts covers a concurrent request creating the same name,
+        # the rows are read back because conflicting inserts return no pk
+        ProductCategory.objects.bulk_create(
+            [ProductCategory(name=name) for name in sorted(missing)],
+            ignore_conflicts=True
+        )
+        categories.update(
+            (category.name, category) for category in ProductCategory.objects.filter(name__in=missing)
+        )
+        # New categories show up in every center's stats, and bulk_create skips signals
+        invalidate_all_category_stats()
+
+    return categories
+
+
+BULK_UPDATE_FIELDS = ('ideal_count', 'emergency_priority')
+
+
+def _changed_fields(category, row):
+    return [
+        field for field in BULK_UPDATE_FIELDS
+        if row.get(field) is not None and getattr(category, field) != row[field]
+    ]
+
+
+def bulk_update_categories(rows, upsert=False):
+    """
+    Apply many category configurations in one transaction.
+
+    Rows are validated dicts with a `name` and any of BULK_UPDATE_FIELDS.
+    Existing categories are fetched with one query and only the fields that
+    actually change are written with one bulk_update; unknown names are
+    created with one bulk_create when `upsert` is set, or reported as
+    missing otherwise.
+
+    Returns (changed, unchanged, created, missing) lists of names.
+    """
+    # Later rows win when a name is repeated
+    rows_by_name = {row['name']: row for row in rows}
+
+    with transaction.atomic():
+        categories = ProductCategory.objects.select_for_update().in_bulk(
+            list(rows_by_name), field_name='name'
+        )
+
+        changed, unchanged, missing = [], [], []
+        changed_fields = set()
+        to_update = []
+        for name, row in rows_by_name.items():
+            category = categories.get(name)
+            if category is None:
+                missing.append(name)
+                continue
+
+            fields = _changed_fields(category, row)
+            if not fields:
+                unchanged.append(name)
+                continue
+
+            for field in fields:
+                setattr(category, field, row[field])
+            changed_fields.update(fields)
+            to_update.append(category)
+            changed.append(name)
+
+        if to_update:
+            ProductCategory.objects.bulk_update(to_update, sorted(changed_fields))
+
+        created = []
+        if upsert and missing:
+            ProductCategory.objects.bulk_create([
+                ProductCategory(
+                    name=name,
+                    **{field: rows_by_name[name][field] for field in BULK_UPDATE_FIELDS
+                       if rows_by_name[name].get(field) is not None}
+                )
+                for name in missing
+            ], ignore_conflicts=True)
+            # As in get_or_create_categories, ignore_conflicts covers a concurrent
+            # request creating one of these names. The rows are read back and the
+            # ones it created get this request's values.
+            raced, raced_fields = [], set()
+            for category in ProductCategory.objects.select_for_update().filter(name__in=missing):
+                fields = _changed_fields(category, rows_by_name[category.name])
+                for field in fields:
+                    setattr(category, field, rows_by_name[category.name][field])
+                if fields:
+                    raced_fields.update(fields)
+                    raced.append(category)
+            if raced:
+                ProductCategory.objects.bulk_update(raced, sorted(raced_fields))
+                changed_fields.update(raced_fields)
+                to_update.extend(raced)
+            created, missing = missing, []
+
+        # bulk_update/bulk_create skip signals, so refresh dependents here
+        if 'ideal_count' in changed_fields:
+            sync_categories([category.id for category in to_update])
+        if to_update or created:
+            invalidate_all_category_stats()
+
+    return changed, unchanged, created, missing
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.db.models import Case, CharField, F, FilteredRelation, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import LessThanOrEqual
+
+from core.metrics import cache_lookup
+
+from ..models import ProductCategory
+from .versions import bump_categories_version, categories_version
+
+CATEGORY_STATS_CACHE_TIMEOUT = 60 * 15
+
+
+def calculate_status(current_count, ideal_count):
+    """Calculate status based on current and ideal counts"""
+    if ideal_count == 0:
+        return 'unknown'
+
+    percentage = (current_count / ideal_count) * 100
+
+    if percentage <= 25:
+        return 'critical'
+    elif percentage <= 50:
+        return 'low'
+    elif percentage <= 75:
+        return 'moderate'
+    else:
+        return 'good'
+
+
+def status_expression(current_count, ideal_count):
+    """
+    SQL equivalent of calculate_status, compares in integers so the
+    percentage thresholds don't need a division per row
+    """
+    return Case(
+        When(LessThanOrEqual(ideal_count, 0), then=Value('unknown')),
+        When(LessThanOrEqual(current_count * 4, ideal_count), then=Value('critical')),
+        When(LessThanOrEqual(current_count * 2, ideal_count), then=Value('low')),
+        When(LessThanOrEqual(current_count * 4, ideal_count * 3), then=Value('moderate')),
+        default=Value('good'),
+        output_field=CharField(),
+    )
+
+
+def get_category_stats(center_id):
+    """
+    Latest count, timestamp and status of every active category in a center.
+
+    Reads the CenterCategoryState rollup with one query, categories never
+    counted in the center still show up with 0.
+    """
+    categories = ProductCategory.objects.filter(is_active=True).annotate(
+        state=FilteredRelation('center_states', condition=Q(center_states__center_id=center_id))
+    ).annotate(
+        current_count=Coalesce(F('state__current_count'), 0),
+        last_updated=F('state__last_updated'),
+        status=Coalesce(F('state__status'), status_expression(Value(0), F('ideal_count'))),
+    )
+
+    return list(categories.values(
+        'id', 'name', 'current_count', 'ideal_count', 'emergency_priority',
+        'status', 'last_updated'
+    ))
+
+
+def _stats_cache_key(center_id):
+    return f'inventory:categories_stats:{center_id}:{categories_version()}'
+
+
+def get_cached_category_stats(center_id):
+    """Cached variant of get_category_stats, see the invalidate_* helpers"""
+    key = _stats_cache_key(center_id)
+    stats = cache.get(key)
+    cache_lookup('category_stats', stats is not None)
+    if stats is None:
+        stats = get_category_stats(center_id)
+        cache.set(key, stats, CATEGORY_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_category_stats(center_id):
+    """Drop the cached stats of a center, called when its snapshots change"""
+    cache.delete(_stats_cache_key(center_id))
+
+
+def invalidate_all_category_stats():
+    """Category settings are shared by every center, so bump the version instead"""
+    bump_categories_version()
@@ -0,0 +1,12 @@
+def attach_prefetched(instance, relation, objects):
+    """
+    Store objects built in memory as the prefetched result of
+    `instance.<relation>.all()`, so serializers don't query them again
+    """
+    queryset = getattr(instance, relation).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[relation] = queryset
+    return instance
@@ -0,0 +1,157 @@
+import datetime
+
+from django.db import transaction
+
+from ..models import InventoryReport, ProductCategory, ProductRecommendation
+from .prefetch import attach_prefetched
+from .versions import bump_for_instances
+
+
+def calculate_priority(current_count, ideal_count):
+    """Priority from 1 (Very Low) to 5 (Very High) based on percentage missing"""
+    if ideal_count <= 0:
+        percentage_missing = 0
+    else:
+        percentage_missing = ((ideal_count - current_count) / ideal_count) * 100
+
+    if percentage_missing <= 10:
+        return 1  # Very Low
+    elif percentage_missing <= 30:
+        return 2  # Low
+    elif percentage_missing <= 50:
+        return 3  # Medium
+    elif percentage_missing <= 75:
+        return 4  # High
+    return 5  # Very High
+
+
+def stock_note(current_count, ideal_count):
+    """Note shown next to a recommendation based on stock level"""
+    if current_count <= 0:
+        return 'URGENTE: No hay existencias'
+    elif current_count < ideal_count * 0.25:
+        return 'Nivel critico de existencias'
+    elif current_count < ideal_count * 0.5:
+        return 'Nivel bajo de existencias'
+    return ''
+
+
+def generate_inventory_report(snapshot, user, is_emergency=False, custom_ideal_counts=None):
+    """
+    Create an InventoryReport with one recommendation per active category.
+
+    Snapshot counts are read with a single query and every recommendation is
+    inserted with one bulk_create, so the cost does not grow with the number
+    of categories.
+    """
+    custom_ideal_counts = custom_ideal_counts or {}
+
+    now = datetime.datetime.now()
+    report_name = f"{'Informe de Emergencia' if is_emergency else 'Informe de Reposicion'} {now.day}/{now.month}/{now.year}"
+
+    current_counts = dict(snapshot.items.values_list('category_id', 'count'))
+    categories = ProductCategory.objects.filter(is_active=True)
+
+    with transaction.atomic():
+        report = InventoryReport.objects.create(
+            name=report_name,
+            center_id=snapshot.center_id,
+            created_by=user,
+            is_emergency=is_emergency,
+            source_snapshot=snapshot
+        )
+
+        recommendations = []
+        for category in categories:
+            current_count = current_counts.get(category.id, 0)
+            ideal_count = custom_ideal_counts.get(category.name, category.ideal_count)
+
+            if is_emergency:
+                # In emergency, use predefined emergency_priority
+                priority = category.emergency_priority
+            else:
+                priority = calculate_priority(current_count, ideal_count)
+
+            recommendations.append(ProductRecommendation(
+                report=report,
+                category=category,
+                current_count=current_count,
+                ideal_count=ideal_count,
+                priority=priority,
+                note=stock_note(current_count, ideal_count)
+            ))
+
+        ProductRecommendation.objects.bulk_create(recommendations)
+
+    return attach_prefetched(report, 'recommendations', recommendations)
+
+
+def apply_recommendation_updates(report, rows):
+    """
+    Apply a batch of recommendation changes to a report.
+
+    Rows are validated dicts (see RecommendationUpdateSerializer) with
+    `category` (id) and `ideal_count`, and may carry `priority`,
+    `current_count` and `note`. Rows are applied in order against the
+    report's recommendations loaded once in memory, then written with one
+    bulk_update and one bulk_create.
+
+    Returns (updated_count, errors), errors lists the unknown categories.
+    """
+    errors = []
+    valid_rows = [(rec_data['category'], rec_data) for rec_data in rows]
+
+    category_ids = set(
+        ProductCategory.objects.filter(
+            id__in={category_id for category_id, _ in valid_rows}
+        ).values_list('id', flat=True)
+    )
+    recommendations = {rec.category_id: rec for rec in report.recommendations.all()}
+
+    updated_count = 0
+    to_update = {}
+    to_create = {}
+    for category_id, rec_data in valid_rows:
+        if category_id not in category_ids:
+            errors.append({'error': f'Category not found: {category_id}', 'data': rec_data})
+            continue
+
+        ideal_count = rec_data['ideal_count']
+        priority = rec_data.get('priority')
+        current_count = rec_data.get('current_count')
+
+        recommendation = recommendations.get(category_id)
+        if recommendation is None:
+            # La recomendación no existe, crear una nueva
+            current_count = current_count if current_count is not None else 0
+            recommendation = ProductRecommendation(
+                report=report,
+                category_id=category_id,
+                current_count=current_count,
+                ideal_count=ideal_count,
+                priority=priority if priority is not None else calculate_priority(current_count, ideal_count),
+                note=rec_data.get('note', '')
+            )
+            recommendations[category_id] = to_create[category_id] = recommendation
+        else:
+            recommendation.ideal_count = ideal_count
+            if priority is not None:
+                recommendation.priority = priority
+            elif current_count is not None:
+                recommendation.priority = calculate_priority(current_count, ideal_count)
+            if 'note' in rec_data:
+                recommendation.note = rec_data['note']
+            if category_id not in to_create:
+                to_update[category_id] = recommendation
+
+        updated_count += 1
+
+    with transaction.atomic():
+        ProductRecommendation.objects.bulk_update(
+            to_update.values(), ['ideal_count', 'priority', 'note'], batch_size=500
+        )
+        ProductRecommendation.objects.bulk_create(to_create.values())
+
+    # bulk writes skip the recommendation signals
+    bump_for_instances(ProductRecommendation, [*to_update.values(), *to_create.values()])
+    return updated_count, errors
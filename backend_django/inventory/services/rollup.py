@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import F, OuterRef, Q, Subquery, Value, Window
+from django.db.models.functions import RowNumber
+
+from ..models import CenterCategoryState, InventoryItem, ProductCategory
+from .category_stats import calculate_status, status_expression
+
+
+def _state_defaults(item, snapshot, category):
+    return {
+        'current_count': item.count,
+        'ideal_count': category.ideal_count,
+        'status': calculate_status(item.count, category.ideal_count),
+        'last_snapshot': snapshot,
+        'last_updated': snapshot.created_at,
+    }
+
+
+def apply_item(item):
+    """
+    Fold a saved InventoryItem into its center/category state, unless the
+    state already comes from a newer snapshot. Returns the center id.
+
+    The state is written with a conditional UPDATE, plus an INSERT the
+    first time.
+    """
+    snapshot = item.snapshot
+    defaults = _state_defaults(item, snapshot, item.category)
+
+    updated = CenterCategoryState.objects.filter(
+        Q(last_updated__isnull=True) | Q(last_updated__lte=snapshot.created_at),
+        center_id=snapshot.center_id,
+        category_id=item.category_id,
+    ).update(updated_at=timezone.now(), **defaults)
+    if not updated:
+        # Either there is no state yet or it comes from a newer snapshot
+        CenterCategoryState.objects.bulk_create([
+            CenterCategoryState(center_id=snapshot.center_id, category_id=item.category_id, **defaults)
+        ], ignore_conflicts=True)
+    return snapshot.center_id
+
+
+def apply_snapshot(snapshot, items):
+    """
+    Bulk variant of apply_item for items inserted with bulk_create, which
+    skips signals. Items need their category loaded.
+    """
+    states = {
+        state.category_id: state
+        for state in CenterCategoryState.objects.filter(
+            center_id=snapshot.center_id,
+            category_id__in=[item.category_id for item in items]
+        )
+    }
+    now = timezone.now()
+
+    to_update, to_create = [], []
+    for item in items:
+        defaults = _state_defaults(item, snapshot, item.category)
+        state = states.get(item.category_id)
+        if state is None:
+            to_create.append(CenterCategoryState(
+                center_id=snapshot.center_id,
+                category_id=item.category_id,
+                **defaults
+            ))
+        elif not state.last_updated or state.last_updated <= snapshot.created_at:
+            for field, value in defaults.items():
+                setattr(state, field, value)
+            # bulk_update doesn't fill auto_now fields
+            state.updated_at = now
+            to_update.append(state)
+
+    CenterCategoryState.objects.bulk_update(
+        to_update, ['current_count', 'ideal_count', 'status', 'last_snapshot', 'last_updated', 'updated_at']
+    )
+    CenterCategoryState.objects.bulk_create(to_create, ignore_conflicts=True)
+
+
+def refresh_category_states(center_id, category_ids, batch_size=1000):
+    """
+    Recompute some states of a center from their latest remaining items,
+    used after deletes. States left without items are removed.
+    """
+    items = _latest_items().filter(snapshot__center_id=center_id, category_id__in=category_ids)
+    states = CenterCategoryState.objects.filter(center_id=center_id, category_id__in=category_ids)
+    return _replace_states(states, items, batch_size)
+
+
+def sync_category(category):
+    """Propagate a category's ideal_count to its states in every center"""
+    return CenterCategoryState.objects.filter(category=category).update(
+        ideal_count=category.ideal_count,
+        status=status_expression(F('current_count'), Value(category.ideal_count))
+    )
+
+
+def sync_categories(category_ids):
+    """
+    Bulk variant of sync_category for writes that skip signals, reads the
+    new ideal counts straight from the category table
+    """
+    states = CenterCategoryState.objects.filter(category_id__in=category_ids)
+    states.update(ideal_count=Subquery(
+        ProductCategory.objects.filter(pk=OuterRef('category_id')).values('ideal_count')[:1]
+    ))
+    return states.update(status=status_expression(F('current_count'), F('ideal_count')))
+
+
+def rebuild_states(center_id=None, batch_size=1000):
+    """
+    Rebuild states from scratch, for every center or just one.
+
+    The latest item of each center/category pair is picked with a single
+    ROW_NUMBER() window query.
+    """
+    items = _latest_items()
+    states = CenterCategoryState.objects.all()
+    if center_id is not None:
+        items = items.filter(snapshot__center_id=center_id)
+        states = states.filter(center_id=center_id)
+    return _replace_states(states, items, batch_size)
+
+
+def _latest_items():
+    """Items annotated with row_number, 1 for the latest of each center/category pair"""
+    return InventoryItem.objects.select_related('snapshot', 'category').annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=[F('snapshot__center_id'), F('category_id')],
+            order_by=F('snapshot__created_at').desc()
+        )
+    )
+
+
+def _replace_states(states, items, batch_size):
+    new_states = [
+        CenterCategoryState(
+            center_id=item.snapshot.center_id,
+            category_id=item.category_id,
+            **_state_defaults(item, item.snapshot, item.category)
+        )
+        for item in items.filter(row_number=1)
+    ]
+
+    with transaction.atomic():
+        states.delete()
+        CenterCategoryState.objects.bulk_create(new_states, batch_size=batch_size)
+
+    return len(new_states)
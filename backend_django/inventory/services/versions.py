@@ -0,0 +1,165 @@
+"""
+Version counters for cached data.
+
+Each center has one counter per scope ('inventory', 'detections', 'images')
+that is bumped on every write that changes what the scope's endpoints
+return. Data shared by every center, like category settings or the center
+directory itself, has global counters. Cache keys and ETags built from them
+change exactly when the data does, so nothing relies on a TTL to get fresh.
+
+Models are tied to a scope with track_center_versions, which bumps the
+counter from post_save/post_delete. Writes that skip signals (bulk_create,
+bulk_update, QuerySet.update) call bump_for_instances or bump_center_version
+themselves.
+"""
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+
+# model -> (scope, function returning the center id of an instance, models it cascades from)
+_tracked_models = {}
+
+
+def _global_version_key(name):
+    return f'version:{name}'
+
+
+def _global_modified_key(name):
+    return f'modified:{name}'
+
+
+CATEGORIES_VERSION_KEY = _global_version_key('categories')
+CATEGORIES_MODIFIED_KEY = _global_modified_key('categories')
+
+
+def _center_version_key(center_id, scope):
+    return f'center_version:{scope}:{center_id}'
+
+
+def _center_modified_key(center_id, scope):
+    return f'center_modified:{scope}:{center_id}'
+
+
+def _initial_version():
+    # Counters start from the clock, so a counter lost from the cache never
+    # goes back to a value an old ETag was built from
+    return time.time_ns() // 1000
+
+
+def _bump(version_key, modified_key):
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, _initial_version(), timeout=None)
+    cache.set(modified_key, time.time(), timeout=None)
+
+
+def _bump_now_and_on_commit(version_key, modified_key):
+    _bump(version_key, modified_key)
+    # Readers outside the transaction may have cached the old rows under the
+    # new version before the commit, bump once more when the data is visible
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(version_key, modified_key))
+
+
+def bump_center_version(center_id, scope='inventory'):
+    """Mark every cached response of a center in the given scope as stale"""
+    if center_id is not None:
+        _bump_now_and_on_commit(
+            _center_version_key(center_id, scope), _center_modified_key(center_id, scope)
+        )
+
+
+def bump_global_version(name):
+    """Bump a counter that isn't tied to a center, e.g. 'categories' or 'centers'"""
+    _bump_now_and_on_commit(_global_version_key(name), _global_modified_key(name))
+
+
+def global_version(name):
+    key = _global_version_key(name)
+    cache.add(key, _initial_version(), timeout=None)
+    return cache.get(key)
+
+
+def bump_categories_version():
+    """Mark every center as stale, used when category settings change"""
+    bump_global_version('categories')
+
+
+def categories_version():
+    return global_version('categories')
+
+
+def center_versions(center_id, scope='inventory'):
+    """
+    Returns (center version, categories version, last modified timestamp)
+    with a single cache round-trip. Last modified is None when unknown.
+    """
+    version_key = _center_version_key(center_id, scope)
+    modified_key = _center_modified_key(center_id, scope)
+    values = cache.get_many([version_key, CATEGORIES_VERSION_KEY, modified_key, CATEGORIES_MODIFIED_KEY])
+
+    if version_key not in values:
+        cache.add(version_key, _initial_version(), timeout=None)
+        values[version_key] = cache.get(version_key)
+    if CATEGORIES_VERSION_KEY not in values:
+        values[CATEGORIES_VERSION_KEY] = categories_version()
+
+    last_modified = None
+    if modified_key in values and CATEGORIES_MODIFIED_KEY in values:
+        last_modified = max(values[modified_key], values[CATEGORIES_MODIFIED_KEY])
+    return values[version_key], values[CATEGORIES_VERSION_KEY], last_modified
+
+
+def _center_id(instance):
+    return instance.center_id
+
+
+def deleted_with(origin, models):
+    """
+    Whether a delete started from an instance or a queryset of one of
+    `models`, given the `origin` of a pre_delete/post_delete signal
+    """
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, tuple(models))
+
+
+def bump_for_instances(model, instances):
+    """Bump the scope versions of the centers the given instances belong to"""
+    scope, center_of, _ = _tracked_models[model]
+    center_ids = set()
+    for instance in instances:
+        try:
+            center_ids.add(center_of(instance))
+        except ObjectDoesNotExist:
+            # Parent deleted in the same cascade, its own signal bumps the center
+            continue
+    # Rows without a center, e.g. detections with a null center
+    center_ids.discard(None)
+    for center_id in center_ids:
+        bump_center_version(center_id, scope)
+
+
+def _instance_changed(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, _tracked_models[sender][2]):
+        # Cascade from a tracked parent, whose own signal bumps the center
+        return
+    bump_for_instances(sender, [instance])
+
+
+def track_center_versions(model, scope, center_of=_center_id, cascades_from=()):
+    """
+    Bump the center's scope version whenever an instance of model is saved
+    or deleted. Deletes cascading from one of `cascades_from` are left to
+    the parent's signal, so they don't cost a lookup per row.
+    """
+    _tracked_models[model] = (scope, center_of, tuple(cascades_from))
+    uid = f'center_versions:{model._meta.label}'
+    post_save.connect(_instance_changed, sender=model, dispatch_uid=uid)
+    post_delete.connect(_instance_changed, sender=model, dispatch_uid=uid)
@@ -0,0 +1,79 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from center.models import Center
+from .models import (
+    CenterCategoryState, InventoryItem, InventoryReport, InventorySnapshot, ProductCategory, ProductRecommendation
+)
+from .services.category_stats import invalidate_all_category_stats, invalidate_category_stats
+from .services.rollup import apply_item, refresh_category_states, sync_category
+from .services.versions import deleted_with, track_center_versions
+
+
+@receiver(post_delete, sender=Center)
+def center_deleted(sender, instance, **kwargs):
+    invalidate_category_stats(instance.pk)
+
+
+@receiver(post_save, sender=InventorySnapshot)
+def snapshot_saved(sender, instance, **kwargs):
+    invalidate_category_stats(instance.center_id)
+
+
+@receiver(pre_delete, sender=InventorySnapshot)
+def snapshot_deleting(sender, instance, origin=None, **kwargs):
+    # Read before the delete sets last_snapshot to NULL. Nothing to refresh
+    # when the whole center goes, its states go with it.
+    if not deleted_with(origin, [Center]):
+        instance._rollup_categories = list(
+            CenterCategoryState.objects.filter(last_snapshot=instance).values_list('category_id', flat=True)
+        )
+
+
+@receiver(post_delete, sender=InventorySnapshot)
+def snapshot_deleted(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, [Center]):
+        return
+    # The same instance pre_delete got, the collector sends both signals for it
+    categories = instance.__dict__.pop('_rollup_categories', None)
+    if categories:
+        refresh_category_states(instance.center_id, categories)
+    invalidate_category_stats(instance.center_id)
+
+
+@receiver(post_save, sender=InventoryItem)
+def inventory_item_saved(sender, instance, **kwargs):
+    # Items are added after the snapshot row itself is saved
+    invalidate_category_stats(apply_item(instance))
+
+
+@receiver(post_delete, sender=InventoryItem)
+def inventory_item_deleted(sender, instance, origin=None, **kwargs):
+    # Deleted with their snapshot, center or category: the snapshot
+    # refreshes its categories once, the others drop the states themselves
+    if deleted_with(origin, [InventorySnapshot, Center, ProductCategory]):
+        return
+    center_id = instance.snapshot.center_id
+    refresh_category_states(center_id, [instance.category_id])
+    invalidate_category_stats(center_id)
+
+
+@receiver(post_save, sender=ProductCategory)
+def category_saved(sender, instance, **kwargs):
+    sync_category(instance)
+    invalidate_all_category_stats()
+
+
+@receiver(post_delete, sender=ProductCategory)
+def category_deleted(sender, instance, **kwargs):
+    invalidate_all_category_stats()
+
+
+# Every write to these models changes what the center's inventory endpoints return
+track_center_versions(InventorySnapshot, 'inventory')
+track_center_versions(
+    InventoryItem, 'inventory', center_of=lambda item: item.snapshot.center_id,
+    cascades_from=[InventorySnapshot, Center]
+)
+track_center_versions(InventoryReport, 'inventory')
+track_center_versions(ProductRecommendation, 'inventory', center_of=lambda rec: rec.report.center_id)
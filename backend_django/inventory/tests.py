@@ -1,3 +1,764 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from backend_django.users.tests.factories import UserFactory
+from rest_framework.test import APIClient
+
+from center.models import Center
+from core.exports import StreamingExportView
+from deteccion_app.models import Deteccion
+from .api.serializers import AnalyticsReportSerializer, InventoryReportSerializer, InventorySnapshotSerializer
+from .models import AnalyticsReport, CenterCategoryState, InventoryItem, InventorySnapshot, ProductCategory
+from .services.analytics import build_daily_series, generate_analytics_report
+from .services.categories import bulk_update_categories
+from .services.category_stats import calculate_status, get_cached_category_stats, get_category_stats
+from .services.reports import apply_recommendation_updates, calculate_priority, generate_inventory_report
+from .services.rollup import rebuild_states
+from .services.versions import bump_for_instances, center_versions
+
+
+def _get_selects(client, url):
+    # ATOMIC_REQUESTS adds savepoint queries around each request
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    return response, [q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+
+
+class CategoryStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.other_center = Center.objects.create(name='Otro', address='Calle 2')
+        self.water = ProductCategory.objects.create(name='agua', ideal_count=100)
+        self.rice = ProductCategory.objects.create(name='arroz', ideal_count=40)
+        self.beans = ProductCategory.objects.create(name='habichuelas', ideal_count=0)
+
+        old = InventorySnapshot.objects.create(name='old', center=self.center)
+        InventoryItem.objects.create(snapshot=old, category=self.water, count=90)
+        InventoryItem.objects.create(snapshot=old, category=self.rice, count=35)
+        self.new = InventorySnapshot.objects.create(name='new', center=self.center)
+        InventoryItem.objects.create(snapshot=self.new, category=self.water, count=20)
+
+        other = InventorySnapshot.objects.create(name='other', center=self.other_center)
+        InventoryItem.objects.create(snapshot=other, category=self.beans, count=7)
+
+    def test_latest_count_per_category_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = {row['name']: row for row in get_category_stats(self.center.id)}
+
+        self.assertEqual(stats['agua']['current_count'], 20)
+        self.assertEqual(stats['agua']['last_updated'], self.new.created_at)
+        self.assertEqual(stats['arroz']['current_count'], 35)
+        self.assertEqual(stats['habichuelas']['current_count'], 0)
+        self.assertIsNone(stats['habichuelas']['last_updated'])
+
+    def test_status_matches_python_buckets(self):
+        for row in get_category_stats(self.center.id):
+            self.assertEqual(row['status'], calculate_status(row['current_count'], row['ideal_count']))
+
+    def test_cache_is_invalidated_by_new_snapshot(self):
+        get_cached_category_stats(self.center.id)
+        with self.assertNumQueries(0):
+            get_cached_category_stats(self.center.id)
+
+        snapshot = InventorySnapshot.objects.create(name='latest', center=self.center)
+        InventoryItem.objects.create(snapshot=snapshot, category=self.rice, count=2)
+
+        stats = {row['name']: row for row in get_cached_category_stats(self.center.id)}
+        self.assertEqual(stats['arroz']['current_count'], 2)
+        self.assertEqual(stats['arroz']['status'], 'critical')
+
+
+class CenterCategoryStateTests(TestCase):
+    def setUp(self):
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.water = ProductCategory.objects.create(name='agua', ideal_count=100)
+
+    def _state(self):
+        return CenterCategoryState.objects.get(center=self.center, category=self.water)
+
+    def test_state_follows_latest_snapshot(self):
+        first = InventorySnapshot.objects.create(name='first', center=self.center)
+        InventoryItem.objects.create(snapshot=first, category=self.water, count=80)
+        second = InventorySnapshot.objects.create(name='second', center=self.center)
+        InventoryItem.objects.create(snapshot=second, category=self.water, count=10)
+
+        state = self._state()
+        self.assertEqual((state.current_count, state.status, state.last_snapshot), (10, 'critical', second))
+
+        second.delete()
+        state = self._state()
+        self.assertEqual((state.current_count, state.status, state.last_snapshot), (80, 'good', first))
+
+    def test_category_edit_updates_status(self):
+        snapshot = InventorySnapshot.objects.create(name='snap', center=self.center)
+        InventoryItem.objects.create(snapshot=snapshot, category=self.water, count=40)
+
+        self.water.ideal_count = 50
+        self.water.save()
+        self.assertEqual(self._state().status, 'good')
+
+    def test_snapshot_delete_is_flat_in_items(self):
+        categories = [self.water] + [
+            ProductCategory.objects.create(name=f'cat-{i}', ideal_count=100) for i in range(10)
+        ]
+        first = InventorySnapshot.objects.create(name='first', center=self.center)
+        second = InventorySnapshot.objects.create(name='second', center=self.center)
+        for category in categories:
+            InventoryItem.objects.create(snapshot=first, category=category, count=80)
+            InventoryItem.objects.create(snapshot=second, category=category, count=10)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second.delete()
+        self.assertLess(len(ctx.captured_queries), 20)
+        states = CenterCategoryState.objects.filter(center=self.center)
+        self.assertEqual(
+            {(state.current_count, state.last_snapshot_id) for state in states}, {(80, first.id)}
+        )
+        self.assertEqual(states.count(), len(categories))
+
+        first.delete()
+        self.assertFalse(CenterCategoryState.objects.filter(center=self.center).exists())
+
+    def test_queryset_and_category_deletes(self):
+        rice = ProductCategory.objects.create(name='arroz', ideal_count=10)
+        first = InventorySnapshot.objects.create(name='first', center=self.center)
+        second = InventorySnapshot.objects.create(name='second', center=self.center)
+        for snapshot, count in ((first, 80), (second, 10)):
+            InventoryItem.objects.create(snapshot=snapshot, category=self.water, count=count)
+            InventoryItem.objects.create(snapshot=snapshot, category=rice, count=count)
+
+        InventorySnapshot.objects.filter(pk=second.pk).delete()
+        self.assertEqual((self._state().current_count, self._state().last_snapshot), (80, first))
+
+        rice.delete()
+        self.assertEqual(list(CenterCategoryState.objects.values_list('category', flat=True)), [self.water.id])
+
+    def test_center_delete(self):
+        snapshot = InventorySnapshot.objects.create(name='snap', center=self.center)
+        InventoryItem.objects.create(snapshot=snapshot, category=self.water, count=40)
+
+        self.center.delete()
+        self.assertFalse(CenterCategoryState.objects.exists())
+        self.assertFalse(InventoryItem.objects.exists())
+
+    def test_rebuild_matches_incremental_state(self):
+        for count in (5, 60, 30):
+            snapshot = InventorySnapshot.objects.create(name=f'snap-{count}', center=self.center)
+            InventoryItem.objects.create(snapshot=snapshot, category=self.water, count=count)
+        incremental = self._state()
+
+        self.assertEqual(rebuild_states(center_id=self.center.id), 1)
+        rebuilt = self._state()
+        self.assertEqual(
+            (rebuilt.current_count, rebuilt.status, rebuilt.last_snapshot_id),
+            (incremental.current_count, incremental.status, incremental.last_snapshot_id)
+        )
+
+
+class SnapshotCreateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.water = ProductCategory.objects.create(name='agua', ideal_count=100)
+
+    def _detections(self, n, prefix='cat'):
+        detections = []
+        for i in range(n):
+            detection = Deteccion(center=self.center, tipo_modelo='yolo')
+            detection.set_resultados({'detections': [
+                {'class': 'agua', 'confidence': 0.9},
+                {'class': f'{prefix}-{i % 30}', 'confidence': 0.8},
+                {'class': 'ruido', 'confidence': 0.1},
+            ]})
+            detection.save()
+            detections.append(detection)
+        return [str(detection.id) for detection in detections]
+
+    def _create(self, detection_ids):
+        serializer = InventorySnapshotSerializer(data={
+            'name': 'snap', 'center': self.center.id, 'source_detections': detection_ids
+        })
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as ctx:
+            snapshot = serializer.save()
+        return snapshot, len(ctx)
+
+    def test_query_count_is_flat_in_detections(self):
+        # Both runs update the existing 'agua' state and create new categories
+        self._create(self._detections(1, prefix='warmup'))
+        _, few = self._create(self._detections(3, prefix='few'))
+        _, many = self._create(self._detections(120, prefix='many'))
+        self.assertEqual(few, many)
+
+    def test_items_links_and_state(self):
+        snapshot, _ = self._create(self._detections(60))
+
+        counts = dict(snapshot.items.values_list('category__name', 'count'))
+        self.assertEqual(counts['agua'], 60)
+        self.assertEqual(counts['cat-0'], 2)
+        self.assertNotIn('ruido', counts)
+        self.assertEqual(len(counts), 31)
+        self.assertEqual(snapshot.source_detections.count(), 60)
+
+        state = CenterCategoryState.objects.get(center=self.center, category=self.water)
+        self.assertEqual((state.current_count, state.status, state.last_snapshot), (60, 'moderate', snapshot))
+
+
+class SnapshotListTests(TestCase):
+    def setUp(self):
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        categories = [ProductCategory.objects.create(name=f'cat-{i}') for i in range(5)]
+        for i in range(20):
+            snapshot = InventorySnapshot.objects.create(name=f'snap-{i}', center=self.center)
+            InventoryItem.objects.bulk_create(
+                InventoryItem(snapshot=snapshot, category=category, count=i) for category in categories
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(UserFactory(is_superuser=True))
+
+    def test_by_center_prefetches_items(self):
+        response, selects = _get_selects(self.client, f'/inventory/api/snapshots/by_center/?center_id={self.center.id}')
+        self.assertEqual(len(selects), 2)
+
+        self.assertEqual(len(response.data['results']), 20)
+        latest = response.data['results'][0]
+        self.assertEqual(latest['product_counts'], {f'cat-{i}': 19 for i in range(5)})
+        self.assertEqual(latest['items'][0]['category_name'], 'cat-0')
+
+    def test_sparse_fields_skip_items(self):
+        response, selects = _get_selects(self.client, '/inventory/api/snapshots/?fields=id,name')
+        self.assertEqual(len(selects), 1)
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        snapshots = [InventorySnapshot.objects.create(name=f'snap-{i}', center=self.center) for i in range(25)]
+        # Half of them share a timestamp, the id breaks the tie
+        same_time = timezone.now()
+        InventorySnapshot.objects.filter(id__in=[s.id for s in snapshots[5:17]]).update(created_at=same_time)
+        self.expected = list(
+            InventorySnapshot.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(UserFactory(is_superuser=True))
+
+    def _walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response, selects = _get_selects(self.client, url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(selects), 1)
+            ids.extend(row['id'] for row in response.data['results'])
+            url, pages = response.data['next'], pages + 1
+        return ids, pages
+
+    def test_pages_cover_every_row_once(self):
+        ids, pages = self._walk(f'/inventory/api/snapshots/by_center/?center_id={self.center.id}&fields=id&page_size=10')
+        self.assertEqual(ids, [str(pk) for pk in self.expected])
+        self.assertEqual(pages, 3)
+
+    def test_ascending_ordering(self):
+        ids, _ = self._walk('/inventory/api/snapshots/?fields=id&page_size=7&ordering=created_at')
+        self.assertEqual(ids, [str(pk) for pk in reversed(self.expected)])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get('/inventory/api/snapshots/?fields=id&page_size=100000')
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('nope', 'WyJ4IiwgIjEiXQ=='):
+            response = self.client.get(f'/inventory/api/snapshots/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.center.users.add(self.user)
+        other = Center.objects.create(name='Otro', address='Calle 2')
+        self.water = ProductCategory.objects.create(name='agua', ideal_count=10)
+        self.rice = ProductCategory.objects.create(name='arroz', ideal_count=10)
+
+        self.old = InventorySnapshot.objects.create(name='old', center=self.center)
+        InventorySnapshot.objects.filter(id=self.old.id).update(created_at=timezone.now() - datetime.timedelta(days=10))
+        self.new = InventorySnapshot.objects.create(name='new', center=self.center)
+        for snapshot in (self.old, self.new):
+            InventoryItem.objects.create(snapshot=snapshot, category=self.water, count=3)
+            InventoryItem.objects.create(snapshot=snapshot, category=self.rice, count=12)
+        InventoryItem.objects.create(
+            snapshot=InventorySnapshot.objects.create(name='other', center=other), category=self.water, count=1
+        )
+        generate_inventory_report(self.new, self.user)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_snapshot_items_ndjson(self):
+        rows = [json.loads(line) for line in self._content(self.client.get('/inventory/api/export/snapshots/')).splitlines()]
+        # Only the user's center, oldest first
+        self.assertEqual([(row['snapshot_name'], row['category_name']) for row in rows],
+                         [('old', 'agua'), ('old', 'arroz'), ('new', 'agua'), ('new', 'arroz')])
+        self.assertEqual(rows[0]['center_id'], self.center.id)
+
+    def test_csv_with_time_range_and_gzip(self):
+        since = (timezone.now() - datetime.timedelta(days=1)).date().isoformat()
+        response = self.client.get(
+            f'/inventory/api/export/snapshots/?output=csv&since={since}', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(self._content(response)).decode())))
+        self.assertEqual([(row['snapshot_name'], row['count']) for row in rows], [('new', '3'), ('new', '12')])
+
+    def test_recommendations(self):
+        rows = [json.loads(line) for line in self._content(self.client.get('/inventory/api/export/recommendations/')).splitlines()]
+        self.assertEqual({row['category_name']: row['replenish_amount'] for row in rows}, {'agua': 7, 'arroz': 0})
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get('/inventory/api/export/snapshots/?since=ayer').status_code, 400)
+        self.assertEqual(self.client.get('/inventory/api/export/snapshots/?output=xml').status_code, 400)
+
+    def test_view_needs_a_queryset(self):
+        class NoQuerysetExportView(StreamingExportView):
+            columns = ('id',)
+
+        with self.assertRaises(ImproperlyConfigured):
+            NoQuerysetExportView.as_view()
+
+
+class GenerateInventoryReportTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.snapshot = InventorySnapshot.objects.create(name='snap', center=self.center)
+
+    def _add_categories(self, amount, start=0):
+        for i in range(start, start + amount):
+            category = ProductCategory.objects.create(name=f'cat-{i}', ideal_count=10)
+            InventoryItem.objects.create(snapshot=self.snapshot, category=category, count=i % 10)
+
+    def _generate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            report = generate_inventory_report(self.snapshot, self.user)
+            InventoryReportSerializer(report).data
+        return report, len(ctx)
+
+    def test_query_count_is_flat_in_categories(self):
+        self._add_categories(3)
+        _, small = self._generate()
+        self._add_categories(30, start=3)
+        report, large = self._generate()
+
+        self.assertEqual(small, large)
+        self.assertEqual(report.recommendations.count(), 33)
+
+    def test_recommendations_match_snapshot(self):
+        self._add_categories(1)
+        ProductCategory.objects.create(name='missing', ideal_count=8)
+
+        report = generate_inventory_report(self.snapshot, self.user, custom_ideal_counts={'cat-0': 4})
+        recommendations = {rec.category.name: rec for rec in report.recommendations.all()}
+
+        self.assertEqual(recommendations['cat-0'].ideal_count, 4)
+        self.assertEqual(recommendations['missing'].current_count, 0)
+        self.assertEqual(recommendations['missing'].priority, calculate_priority(0, 8))
+        self.assertEqual(recommendations['missing'].note, 'URGENTE: No hay existencias')
+
+    def test_bulk_recommendation_updates(self):
+        self._add_categories(5)
+        report = generate_inventory_report(self.snapshot, self.user)
+        extra = [ProductCategory.objects.create(name=f'extra-{i}') for i in range(500)]
+        first = report.recommendations.all()[0]
+
+        rows = [
+            {'category': first.category_id, 'ideal_count': 100, 'current_count': 0},
+            {'category': first.category_id, 'ideal_count': 100, 'note': 'revisar'},
+            {'category': 999999, 'ideal_count': 1},
+        ]
+        rows += [{'category': category.id, 'ideal_count': 20, 'current_count': 18} for category in extra]
+
+        with CaptureQueriesContext(connection) as ctx:
+            updated_count, errors = apply_recommendation_updates(report, rows)
+        self.assertLessEqual(len(ctx), 10)
+
+        self.assertEqual(updated_count, 502)
+        self.assertEqual([error['error'] for error in errors], ['Category not found: 999999'])
+        first.refresh_from_db()
+        self.assertEqual((first.ideal_count, first.priority, first.note), (100, 5, 'revisar'))
+        self.assertEqual(report.recommendations.filter(category__in=extra, priority=1).count(), 500)
+
+    def test_upsert_of_a_name_created_concurrently(self):
+        ProductCategory.objects.create(name='nueva', ideal_count=1)
+        in_bulk = QuerySet.in_bulk
+
+        def in_bulk_before_insert(queryset, *args, **kwargs):
+            # 'nueva' is created by another request right after this read
+            return {name: category for name, category in in_bulk(queryset, *args, **kwargs).items() if name != 'nueva'}
+
+        with mock.patch.object(QuerySet, 'in_bulk', in_bulk_before_insert):
+            changed, unchanged, created, missing = bulk_update_categories(
+                [{'name': 'nueva', 'ideal_count': 5}], upsert=True
+            )
+
+        self.assertEqual(created, ['nueva'])
+        self.assertEqual(ProductCategory.objects.get(name='nueva').ideal_count, 5)
+
+    def test_endpoint_reports_invalid_rows(self):
+        self._add_categories(2)
+        report = generate_inventory_report(self.snapshot, self.user)
+        first, second = report.recommendations.order_by('category__name')
+        client = APIClient()
+        client.force_authenticate(UserFactory(is_superuser=True))
+
+        response = client.patch(f'/inventory/api/reports/{report.id}/update_recommendations/', {'recommendations': [
+            {'category': first.category_id, 'ideal_count': 'abc'},
+            {'category': first.category_id, 'ideal_count': 5, 'priority': 9, 'note': ['x']},
+            {'category': 'agua'},
+            'not a row',
+            {'category': second.category_id, 'ideal_count': 50, 'current_count': 1},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated_count'], 1)
+        self.assertEqual(len(response.data['errors']), 4)
+        self.assertEqual(set(response.data['errors'][1]['error']), {'priority', 'note'})
+        second.refresh_from_db()
+        self.assertEqual((second.ideal_count, second.priority), (50, 5))
+
+        response = client.patch(f'/inventory/api/reports/{report.id}/update_recommendations/', [], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class GenerateAnalyticsReportTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.water = ProductCategory.objects.create(name='agua', ideal_count=100)
+        self.rice = ProductCategory.objects.create(name='arroz', ideal_count=40)
+
+    def _snapshot(self, name, counts):
+        snapshot = InventorySnapshot.objects.create(name=name, center=self.center)
+        for category, count in counts.items():
+            InventoryItem.objects.create(snapshot=snapshot, category=category, count=count)
+        return snapshot
+
+    def test_movement_between_two_snapshots(self):
+        start = self._snapshot('start', {self.water: 50, self.rice: 10})
+        end = self._snapshot('end', {self.water: 20, self.rice: 10})
+
+        report = generate_analytics_report([start, end], self.user)
+        totals = {total.category.name: total.count for total in report.consumption_totals.all()}
+
+        self.assertEqual(totals, {'agua': 30})
+        self.assertEqual([point.note for point in report.data_points.all()], ['Consumo'])
+
+    def test_movement_netting_to_zero_keeps_daily_points(self):
+        start = self._snapshot('start', {self.water: 50, self.rice: 10})
+        middle = self._snapshot('middle', {self.water: 30, self.rice: 10})
+        end = self._snapshot('end', {self.water: 50, self.rice: 10})
+        now = timezone.now()
+        for days_ago, snapshot in zip([2, 1, 0], [start, middle, end]):
+            InventorySnapshot.objects.filter(pk=snapshot.pk).update(created_at=now - datetime.timedelta(days=days_ago))
+            snapshot.refresh_from_db()
+
+        report = generate_analytics_report([start, middle, end], self.user)
+
+        self.assertEqual([(total.category.name, total.count) for total in report.consumption_totals.all()], [('agua', 0)])
+        self.assertEqual(
+            [(point.count, point.note) for point in report.data_points.all()],
+            [(0, None), (20, 'Consumo'), (20, 'Aumento')]
+        )
+
+    def test_many_snapshots_in_one_pass(self):
+        snapshots = [
+            self._snapshot('s1', {self.water: 50}),
+            self._snapshot('s2', {self.water: 30, self.rice: 5}),
+            self._snapshot('s3', {self.water: 60, self.rice: 5}),
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            report = generate_analytics_report(snapshots, self.user, period_type='monthly')
+        queries = len(ctx)
+
+        totals = {total.category.name: total.count for total in report.consumption_totals.all()}
+        self.assertEqual(totals, {'agua': 10, 'arroz': 5})
+        # All snapshots were taken today, so each category gets a single daily point
+        self.assertEqual(
+            sorted((point.category.name, point.count, point.note) for point in report.data_points.all()),
+            [('agua', 10, 'Aumento'), ('arroz', 5, 'Aumento')]
+        )
+
+        more = [self._snapshot(f'extra-{i}', {self.water: i, self.rice: i}) for i in range(5)]
+        with CaptureQueriesContext(connection) as ctx:
+            generate_analytics_report(snapshots + more, self.user)
+        self.assertEqual(len(ctx), queries)
+
+    def test_response_reuses_generated_rows(self):
+        start = self._snapshot('start', {self.water: 50})
+        end = self._snapshot('end', {self.water: 20})
+        report = generate_analytics_report([start, end], self.user, selected_categories=['agua', 'nuevo'])
+
+        data = AnalyticsReportSerializer(report).data
+        self.assertEqual(data['categories'], ['agua', 'nuevo'])
+        self.assertEqual(len(data['consumption_totals']), 1)
+        self.assertTrue(ProductCategory.objects.filter(name='nuevo').exists())
+
+    def test_daily_series_is_dense_and_forward_filled(self):
+        day = timezone.make_aware(datetime.datetime(2025, 3, 1, 9))
+        snapshots = [
+            SimpleNamespace(id='a', created_at=day),
+            SimpleNamespace(id='b', created_at=day + datetime.timedelta(hours=5)),
+            SimpleNamespace(id='c', created_at=day + datetime.timedelta(days=3)),
+        ]
+        counts = {'a': {1: 50}, 'b': {1: 40}, 'c': {1: 70, 2: 4}}
+
+        days, series = build_daily_series(snapshots, counts, [1, 2])
+
+        self.assertEqual(len(days), 4)
+        self.assertEqual(list(series[1]), [-10, 0, 0, 30])
+        self.assertEqual(list(series[2]), [0, 0, 0, 4])
+
+
+class ReportListTests(TestCase):
+    def setUp(self):
+        user = UserFactory(is_superuser=True)
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        categories = [ProductCategory.objects.create(name=f'cat-{i}', ideal_count=10) for i in range(5)]
+
+        start = InventorySnapshot.objects.create(name='start', center=self.center)
+        end = InventorySnapshot.objects.create(name='end', center=self.center)
+        for i, category in enumerate(categories):
+            InventoryItem.objects.create(snapshot=start, category=category, count=10)
+            InventoryItem.objects.create(snapshot=end, category=category, count=i * 3)
+
+        for _ in range(50):
+            generate_inventory_report(end, user)
+            generate_analytics_report([start, end], user)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_inventory_reports_page(self):
+        response, selects = _get_selects(self.client, f'/inventory/api/reports/by_center/?center_id={self.center.id}')
+        self.assertEqual(len(selects), 2)
+
+        self.assertEqual(len(response.data['results']), 50)
+        report = response.data['results'][0]
+        self.assertEqual(len(report['recommendations']), 5)
+        self.assertEqual([rec['category_name'] for rec in report['priority_products']], ['cat-0', 'cat-1'])
+
+    def test_analytics_reports_page(self):
+        response, selects = _get_selects(self.client, '/inventory/api/analytics/')
+        self.assertEqual(len(selects), 3)
+
+        self.assertEqual(len(response.data['results']), 50)
+        report = response.data['results'][0]
+        self.assertEqual(len(report['data_points']), 5)
+        self.assertEqual(sorted(report['categories']), [f'cat-{i}' for i in range(5)])
+        self.assertEqual(report['most_consumed'], {'category': 'cat-0', 'count': 10, 'is_increase': False})
+        self.assertEqual(report['least_consumed'], {'category': 'cat-3', 'count': 1})
+
+        # Clients can leave the daily points out, they aren't loaded then
+        fields = 'id,categories,most_consumed,least_consumed'
+        response, selects = _get_selects(self.client, f'/inventory/api/analytics/?fields={fields}')
+        self.assertEqual(len(selects), 2)
+        self.assertEqual(set(response.data['results'][0]), set(fields.split(',')))
+        self.assertEqual(response.data['results'][0]['most_consumed'], report['most_consumed'])
+
+    def test_net_movement_matches_is_increase(self):
+        report = AnalyticsReport.objects.first()
+        report.consumption_totals.filter(category__name='cat-0').update(count=100)
+        report.data_points.filter(category__name='cat-0').update(note='Aumento')
+
+        url = f'/inventory/api/analytics/by_center/?center_id={self.center.id}&fields=id,most_consumed'
+        response = self.client.get(url)
+        listed = next(item for item in response.data['results'] if item['id'] == str(report.id))
+        detail = self.client.get(f'/inventory/api/analytics/{report.id}/').data
+        self.assertTrue(listed['most_consumed']['is_increase'])
+        self.assertEqual(listed['most_consumed'], detail['most_consumed'])
+
+
+class ConditionalResponseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory(is_superuser=True)
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.water = ProductCategory.objects.create(name='agua', ideal_count=100)
+        self.snapshot = InventorySnapshot.objects.create(name='snap', center=self.center)
+        InventoryItem.objects.create(snapshot=self.snapshot, category=self.water, count=10)
+        generate_inventory_report(self.snapshot, self.user)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/inventory/api/reports/latest/?center_id={self.center.id}'
+
+    def test_not_modified_skips_database(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')])
+
+        # Other centers and other endpoints keep their own ETags
+        other = Center.objects.create(name='Otro', address='Calle 2')
+        InventorySnapshot.objects.create(name='other', center=other)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        stats_url = f'/inventory/api/categories/categories_stats/?center_id={self.center.id}'
+        self.assertNotEqual(self.client.get(stats_url)['ETag'], etag)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        generate_inventory_report(self.snapshot, self.user, is_emergency=True)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.water.ideal_count = 20
+        self.water.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(INVENTORY_RESPONSE_CACHE_TIMEOUT=60)
+    def test_response_cache_follows_versions(self):
+        first = self.client.get(self.url).data
+        response, selects = _get_selects(self.client, self.url)
+        self.assertEqual((response.data, selects), (first, []))
+
+        report = generate_inventory_report(self.snapshot, self.user, is_emergency=True)
+        self.assertEqual(self.client.get(self.url).data['id'], str(report.id))
+
+
+class CenterVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+
+    def _version(self, scope):
+        return center_versions(self.center.id, scope)[0]
+
+    def test_scopes_are_bumped_independently(self):
+        inventory, detections = self._version('inventory'), self._version('detections')
+
+        deteccion = Deteccion(center=self.center, tipo_modelo='yolo')
+        deteccion.set_resultados({'detections': []})
+        deteccion.save()
+        self.assertEqual(self._version('inventory'), inventory)
+        self.assertGreater(self._version('detections'), detections)
+
+        detections = self._version('detections')
+        deteccion.delete()
+        self.assertGreater(self._version('detections'), detections)
+
+    def test_bulk_writes_bump_through_helper(self):
+        snapshot = InventorySnapshot.objects.create(name='snap', center=self.center)
+        category = ProductCategory.objects.create(name='agua')
+        version = self._version('inventory')
+
+        items = InventoryItem.objects.bulk_create([InventoryItem(snapshot=snapshot, category=category, count=3)])
+        self.assertEqual(self._version('inventory'), version)
+        bump_for_instances(InventoryItem, items)
+        self.assertGreater(self._version('inventory'), version)
+
+    def test_detections_by_center_etag(self):
+        client = APIClient()
+        client.force_authenticate(UserFactory(is_superuser=True))
+        url = f'/api/detecciones/by-center/?center_id={self.center.id}'
+
+        etag = client.get(url)['ETag']
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        deteccion = Deteccion(center=self.center, tipo_modelo='yolo')
+        deteccion.set_resultados({'detections': []})
+        deteccion.save()
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class BulkUpdateCategoriesTests(TestCase):
+    def setUp(self):
+        self.center = Center.objects.create(name='Centro', address='Calle 1')
+        self.categories = [
+            ProductCategory.objects.create(name=f'cat-{i}', ideal_count=10, emergency_priority=3)
+            for i in range(20)
+        ]
+        snapshot = InventorySnapshot.objects.create(name='snap', center=self.center)
+        InventoryItem.objects.create(snapshot=snapshot, category=self.categories[0], count=8)
+
+    def test_changed_unchanged_and_missing(self):
+        rows = [{'name': f'cat-{i}', 'ideal_count': 10 + i % 2} for i in range(20)]
+        rows.append({'name': 'nueva', 'ideal_count': 5})
+
+        with CaptureQueriesContext(connection) as ctx:
+            changed, unchanged, created, missing = bulk_update_categories(rows)
+        self.assertLessEqual(len(ctx), 8)
+
+        self.assertEqual(len(changed), 10)
+        self.assertEqual(len(unchanged), 10)
+        self.assertEqual((created, missing), ([], ['nueva']))
+        self.assertEqual(ProductCategory.objects.get(name='cat-1').ideal_count, 11)
+
+    def test_upsert_and_state_sync(self):
+        bulk_update_categories([
+            {'name': 'cat-0', 'ideal_count': 40},
+            {'name': 'nueva', 'ideal_count': 5, 'emergency_priority': 5},
+        ], upsert=True)
+
+        self.assertEqual(ProductCategory.objects.get(name='nueva').emergency_priority, 5)
+        state = CenterCategoryState.objects.get(category=self.categories[0])
+        self.assertEqual((state.ideal_count, state.status), (40, 'critical'))
+
+    def test_upsert_of_a_name_created_concurrently(self):
+        ProductCategory.objects.create(name='nueva', ideal_count=1)
+        in_bulk = QuerySet.in_bulk
+
+        def in_bulk_before_insert(queryset, *args, **kwargs):
+            # 'nueva' is created by another request right after this read
+            return {name: category for name, category in in_bulk(queryset, *args, **kwargs).items() if name != 'nueva'}
+
+        with mock.patch.object(QuerySet, 'in_bulk', in_bulk_before_insert):
+            changed, unchanged, created, missing = bulk_update_categories(
+                [{'name': 'nueva', 'ideal_count': 5}], upsert=True
+            )
+
+        self.assertEqual(created, ['nueva'])
+        self.assertEqual(ProductCategory.objects.get(name='nueva').ideal_count, 5)
+
+    def test_endpoint_reports_invalid_rows(self):
+        client = APIClient()
+        client.force_authenticate(UserFactory())
+
+        response = client.post('/inventory/api/categories/bulk_update/?upsert=true', [
+            {'name': 'cat-0', 'emergency_priority': 9},
+            {'name': 'cat-1', 'emergency_priority': 5},
+            {'name': 'nueva'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['changed'], ['cat-1'])
+        self.assertEqual(response.data['created'], ['nueva'])
+        self.assertEqual([error['category'] for error in response.data['errors']], ['cat-0'])
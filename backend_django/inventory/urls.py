@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from .api.exports import RecommendationExportView, SnapshotItemExportView
 from .api.views import (
     ProductCategoryViewSet, InventorySnapshotViewSet,
     InventoryReportViewSet, AnalyticsReportViewSet
@@ -13,5 +14,7 @@ router.register(r'reports', InventoryReportViewSet, basename='report')
 router.register(r'analytics', AnalyticsReportViewSet, basename='analytics')
 
 urlpatterns = [
+    path('api/export/snapshots/', SnapshotItemExportView.as_view(), name='export-snapshots'),
+    path('api/export/recommendations/', RecommendationExportView.as_view(), name='export-recommendations'),
     path('api/', include(router.urls)),
 ]
@@ -1,22 +1,19 @@
 from rest_framework import serializers
 
 from center.models import Center
+from core.fields import RawJSONField
 from deteccion_app.models import Deteccion
 from uploads.models import Image
 
 
 class DeteccionBriefSerializer(serializers.ModelSerializer):
     """Serializer simplificado para detecciones"""
-    resultados = serializers.SerializerMethodField()
+    resultados = RawJSONField(source='resultados_json')
 
     class Meta:
         model = Deteccion
         fields = ['id', 'fecha_creacion', 'tipo_modelo', 'resultados', 'numero_objetos']
 
-    def get_resultados(self, obj):
-        """Obtiene los resultados como diccionario Python"""
-        return obj.get_resultados()
-
 
 class ImageSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Image"""
@@ -4,8 +4,6 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
-from center.api.serializer import CenterSerializer
-from center.models import Center
 from deteccion_app.models import Deteccion
 from uploads.api.serializers import DeteccionBriefSerializer, ImageSerializer
 from uploads.models import Image
@@ -31,18 +29,18 @@ class ImageViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['GET'])
     def by_center(self, request):
         """
-        Obtiene todas las imágenes agrupadas por centro
+        Obtiene las imágenes agrupadas por centro, una página a la vez
         """
         # Verificar si se solicita un centro específico
         center_id = request.query_params.get('center_id')
 
-        queryset = self.get_queryset()
+        queryset = self.get_queryset().select_related('center')
         if center_id:
             queryset = queryset.filter(center_id=center_id)
 
-        # Agrupar por centro
+        # Agrupar por centro las imágenes de la página
         centers = {}
-        for image in queryset:
+        for image in self.paginate_queryset(queryset):
             center_id = str(image.center_id)
             if center_id not in centers:
                 centers[center_id] = {
@@ -55,7 +53,7 @@ class ImageViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(image)
             centers[center_id]['images'].append(serializer.data)
 
-        return Response(list(centers.values()))
+        return self.get_paginated_response(list(centers.values()))
 
     @action(detail=True, methods=['GET'])
     def detecciones(self, request, pk=None):
@@ -80,30 +78,6 @@ class ImageViewSet(viewsets.ModelViewSet):
             }
             return Response([deteccion_data])
 
-        serializer = DeteccionBriefSerializer(detecciones, many=True)
+        serializer = DeteccionBriefSerializer(detecciones, many=True, context={'request': request})
         return Response(serializer.data)
 
-
-class CenterViewSet(viewsets.ReadOnlyModelViewSet):
-    """
-    API endpoint para consultar centros
-    """
-    queryset = Center.objects.all()
-    serializer_class = CenterSerializer
-    permission_classes = [IsAuthenticated]
-
-    @action(detail=True, methods=['GET'])
-    def images(self, request, pk=None):
-        """
-        Obtiene todas las imágenes de un centro específico
-        """
-        center = self.get_object()
-        images = Image.objects.filter(center=center)
-
-        # Filtra por processed si se especifica
-        processed = request.query_params.get('processed')
-        if processed is not None:
-            images = images.filter(processed=(processed.lower() == 'true'))
-
-        serializer = ImageSerializer(images, many=True)
-        return Response(serializer.data)
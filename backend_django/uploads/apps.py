@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UploadsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'uploads'
+
+    def ready(self):
+        from inventory.services.versions import track_center_versions
+        from .models import Image
+
+        track_center_versions(Image, 'images')
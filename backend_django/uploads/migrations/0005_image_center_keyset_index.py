@@ -0,0 +1,17 @@
+# Generated by Django 5.0.11 on 2026-10-19 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0004_image_created_at_image_created_by_image_optional_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['center', '-created_at', '-id'], name='uploads_ima_center__de8497_idx'),
+        ),
+    ]
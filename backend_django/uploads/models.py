@@ -18,6 +18,9 @@ class Image(TimeStampedModelMixin):
     class Meta:
         verbose_name = 'Imagen'
         verbose_name_plural = 'Imagenes'
+        indexes = [
+            models.Index(fields=['center', '-created_at', '-id'])
+        ]
 
     def __str__(self):
         return self.file.name
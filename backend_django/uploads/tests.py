@@ -1,3 +1,28 @@
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from backend_django.users.tests.factories import UserFactory
+from center.models import Center
+from core.renderers import ORJSONRenderer
+from deteccion_app.models import Deteccion
+from uploads.api.views import ImageViewSet
+from uploads.models import Image
+
+
+class ImageDeteccionesTests(TestCase):
+    @mock.patch.object(ImageViewSet, 'renderer_classes', [ORJSONRenderer])
+    def test_detecciones_splice_stored_resultados(self):
+        center = Center.objects.create(name='Centro', address='Calle 1')
+        image = Image.objects.create(file='inventory_images/estante.jpg', center=center)
+        deteccion = Deteccion(tipo_modelo='yolo', center=center, image=image, imagen='inventory_images/estante.jpg')
+        deteccion.set_resultados({'detections': [{'class': 'agua', 'confidence': 0.8}]})
+        deteccion.save()
+
+        client = APIClient()
+        client.force_authenticate(UserFactory())
+        response = client.get(f'/api/images/{image.id}/detecciones/')
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'"resultados":' + deteccion.resultados_json.encode(), response.content)
@@ -1,10 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from uploads.api.views import ImageViewSet, CenterViewSet
+from uploads.api.views import ImageViewSet
 
 router = DefaultRouter()
-router.register(r'centers', CenterViewSet)
 router.register(r'images', ImageViewSet, basename='image')
 
 urlpatterns = [